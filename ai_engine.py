@@ -31,164 +31,106 @@ Corrections & améliorations apportées :
    On détermine quels Objectifs de Développement
    Durable sont atteints selon le profil.
 
-6. PLUS DE DÉPENDANCE NUMPY
-   np.clip remplacé par min/max natif Python.
-   numpy n'est pas nécessaire pour des calculs scalaires.
+6. CHEMIN SCALAIRE EN PYTHON NATIF
+   np.clip remplacé par min/max natif Python : un profil isolé
+   ne passe pas par numpy (réservé au chemin par lots, point 7).
+
+7. SCORING PAR LOTS (analyse_financiere_batch)
+   Pour re-scorer un portefeuille complet, numpy revient
+   uniquement sur le chemin vectorisé : mêmes barèmes,
+   mêmes résultats que le chemin scalaire, sans créer
+   un UserData ni un dict par client.
+
+8. INSTANTANÉ FINANCIER (FinancialSnapshot)
+   Composantes, score et tranche de profil sont calculés une
+   seule fois par requête ; recommander() et generer_coaching()
+   acceptent directement l'instantané au lieu de (user, score).
+
+9. BARÈMES EN DONNÉES (bareme.py)
+   Paliers, bonus et seuils de profil sont lus dans baremes/
+   (un fichier par banque), compilés en tableaux triés et
+   évalués par bisect (scalaire) ou np.searchsorted (lot).
+   Une nouvelle calibration est rechargée à chaud.
 """
 
+import numpy as np
 
-# ── Constantes ────────────────────────────────────────────────
-SCORE_MAX = 1000
-
-# Seuils de profil (sur 1000)
-SEUIL_EXCELLENT  = 750
-SEUIL_BON        = 550
-SEUIL_EQUILIBRE  = 350
-SEUIL_FRAGILE    = 150
-
-
-def _score_taux_epargne(taux: float) -> float:
-    """
-    Composante 1 — Taux d'épargne (0 à 200 pts)
-    taux : fraction du revenu épargnée (0.0 à 1.0)
-
-    Barème :
-      >= 30%  → 200 pts  (excellent)
-      >= 20%  → 160 pts
-      >= 10%  → 110 pts
-      >= 5%   →  60 pts
-      > 0%    →  20 pts
-      = 0%    →   0 pts
-    """
-    if taux >= 0.30: return 200
-    if taux >= 0.20: return 160
-    if taux >= 0.10: return 110
-    if taux >= 0.05: return  60
-    if taux >  0.00: return  20
-    return 0
+from bareme import BAREMES, Bareme
+from models import UserBatch, UserData
 
 
-def _score_ratio_depenses(ratio: float) -> float:
-    """
-    Composante 2 — Ratio d'endettement (0 à 200 pts)
-    ratio : part des charges dans le revenu (0.0 à 1.0)
-
-    Barème :
-      <= 40%  → 200 pts  (sain)
-      <= 55%  → 150 pts
-      <= 70%  → 100 pts
-      <= 85%  →  50 pts
-      > 85%   →   0 pts  (danger)
-    """
-    if ratio <= 0.40: return 200
-    if ratio <= 0.55: return 150
-    if ratio <= 0.70: return 100
-    if ratio <= 0.85: return  50
-    return 0
-
-
-def _score_coussin(mois: float) -> float:
-    """
-    Composante 3 — Coussin de sécurité (0 à 200 pts)
-    mois : nombre de mois de charges couverts par l'épargne
-
-    Barème :
-      >= 6 mois → 200 pts  (recommandation internationale)
-      >= 3 mois → 140 pts
-      >= 1 mois →  70 pts
-      < 1 mois  →  20 pts
-      = 0       →   0 pts
-    """
-    if mois >= 6: return 200
-    if mois >= 3: return 140
-    if mois >= 1: return  70
-    if mois >  0: return  20
-    return 0
-
+# ── Constantes ────────────────────────────────────────────────
+SCORE_MAX = 1000
 
-def _score_solde_net(solde: float, revenu: float) -> float:
-    """
-    Composante 4 — Solidité du solde net (0 à 200 pts)
-    Mesure la valeur absolue du surplus, normalisée par le revenu.
-    Corrige l'anomalie de l'ancien modèle qui ignorait les montants absolus.
-
-    Barème :
-      solde >= 30% du revenu → 200 pts
-      solde >= 15% du revenu → 140 pts
-      solde >= 5%  du revenu → 80  pts
-      solde > 0              → 30  pts
-      solde <= 0             →  0  pts
-    """
-    if revenu <= 0:
-        return 0
-    ratio = solde / revenu
-    if ratio >= 0.30: return 200
-    if ratio >= 0.15: return 140
-    if ratio >= 0.05: return  80
-    if ratio >  0:    return  30
-    return 0
+# Les barèmes des composantes 1 à 4 (taux d'épargne, endettement,
+# coussin, solde net) sont des données compilées : voir bareme.py
+# et baremes/defaut.json.
 
 
-def _score_bonus_contextuel(user) -> float:
+def _score_bonus_contextuel(user, bareme: Bareme) -> float:
     """
-    Composante 5 — Bonus contextuel (0 à 200 pts)
+    Composante 5 — Bonus contextuel (0 à 200 pts, barème par défaut)
     Récompense les comportements positifs :
       • Objectif d'épargne défini    → +50 pts
       • Revenu > dépenses * 1.5     → +50 pts  (marge confortable)
       • Horizon long (>= 12 mois)   → +50 pts
       • Autres revenus diversifiés  → +50 pts
     """
+    objectif, marge, marge_min, horizon, horizon_min, autres = bareme.bonus
     bonus = 0
     if getattr(user, 'objectif_epargne', 0) > 0:
-        bonus += 50
-    if user.depenses > 0 and user.revenu_total > user.depenses * 1.5:
-        bonus += 50
-    if getattr(user, 'horizon', 0) >= 12:
-        bonus += 50
+        bonus += objectif
+    if user.depenses > 0 and user.revenu_total > user.depenses * marge_min:
+        bonus += marge
+    if getattr(user, 'horizon', 0) >= horizon_min:
+        bonus += horizon
     if getattr(user, 'autres_revenus', 0) > 0:
-        bonus += 50
+        bonus += autres
     return bonus
 
 
-def _determiner_profil(score: float) -> dict:
-    """
-    Retourne le profil, l'emoji, la couleur CSS et une description
-    en fonction du score sur 1000.
-    """
-    if score >= SEUIL_EXCELLENT:
-        return {
-            "nom":         "Investisseur actif",
-            "emoji":       "🏆",
-            "couleur":     "green",
-            "description": "Votre situation financière est excellente. Vous êtes prêt pour des investissements durables."
-        }
-    if score >= SEUIL_BON:
-        return {
-            "nom":         "Épargnant prudent",
-            "emoji":       "📈",
-            "couleur":     "teal",
-            "description": "Bonne base financière. Quelques ajustements permettront d'accéder à l'investissement."
-        }
-    if score >= SEUIL_EQUILIBRE:
-        return {
-            "nom":         "Profil équilibré",
-            "emoji":       "⚖️",
-            "couleur":     "gold",
-            "description": "Situation correcte mais des marges de progression significatives existent."
-        }
-    if score >= SEUIL_FRAGILE:
-        return {
-            "nom":         "Profil fragile",
-            "emoji":       "⚠️",
-            "couleur":     "orange",
-            "description": "Votre situation nécessite une stabilisation avant tout investissement."
-        }
-    return {
+# Profils par tranche de score : l'indice est le nombre de seuils
+# franchis (0 = précaire, 4 = excellent), comme CODES_PROFIL.
+_PROFILS = (
+    {
         "nom":         "Profil précaire",
         "emoji":       "🆘",
         "couleur":     "red",
         "description": "Une restructuration financière est prioritaire. Un accompagnement est recommandé."
-    }
+    },
+    {
+        "nom":         "Profil fragile",
+        "emoji":       "⚠️",
+        "couleur":     "orange",
+        "description": "Votre situation nécessite une stabilisation avant tout investissement."
+    },
+    {
+        "nom":         "Profil équilibré",
+        "emoji":       "⚖️",
+        "couleur":     "gold",
+        "description": "Situation correcte mais des marges de progression significatives existent."
+    },
+    {
+        "nom":         "Épargnant prudent",
+        "emoji":       "📈",
+        "couleur":     "teal",
+        "description": "Bonne base financière. Quelques ajustements permettront d'accéder à l'investissement."
+    },
+    {
+        "nom":         "Investisseur actif",
+        "emoji":       "🏆",
+        "couleur":     "green",
+        "description": "Votre situation financière est excellente. Vous êtes prêt pour des investissements durables."
+    },
+)
+
+# Clés de niveau utilisées par recommendation.PRODUITS (même indice)
+NIVEAUX = ("precaire", "fragile", "equilibre", "bon", "excellent")
+
+
+def niveau_score(score: float, banque=None) -> int:
+    """Tranche du score : nombre de seuils de profil franchis (0 à 4)."""
+    return BAREMES.pour(banque).niveau(score)
 
 
 def _generer_conseils(user, score: float) -> list:
@@ -274,7 +216,7 @@ def _generer_conseils(user, score: float) -> list:
         priorite += 1
 
     # Capacité d'emprunt
-    if user.capacite_emprunt > 0 and score >= SEUIL_EQUILIBRE:
+    if user.capacite_emprunt > 0 and user.niveau >= 2:
         conseils.append({
             "priorite": priorite,
             "titre": "Capacité d'emprunt estimée",
@@ -306,7 +248,7 @@ def _alignement_odd(user, score: float) -> list:
     odds = []
 
     # ODD 1 — Fin de la pauvreté
-    if score >= SEUIL_FRAGILE:
+    if user.niveau >= 1:
         odds.append({"numero": 1, "nom": "Fin de la pauvreté",
                      "statut": "actif", "classe": "green"})
 
@@ -321,13 +263,70 @@ def _alignement_odd(user, score: float) -> list:
                      "statut": "actif", "classe": "gold"})
 
     # ODD 17 — Partenariats
-    if score >= SEUIL_BON:
+    if user.niveau >= 3:
         odds.append({"numero": 17, "nom": "Partenariats",
                      "statut": "actif", "classe": "blue"})
 
     return odds
 
 
+# ── Instantané financier ──────────────────────────────────────
+
+class FinancialSnapshot:
+    """
+    Vue figée d'un profil pour une requête : champs et métriques
+    de UserData, plus les 5 composantes, le score et sa tranche.
+
+    Il expose les mêmes attributs que UserData : les trois moteurs
+    (analyse_financiere, recommander, generer_coaching) le lisent
+    comme un profil ordinaire, sans rien recalculer.
+    """
+
+    _CHAMPS   = UserData._CHAMPS
+    _DERIVEES = UserData._DERIVEES
+    __slots__ = ("user",) + _CHAMPS + _DERIVEES + ("bareme", "composantes", "score", "niveau")
+
+    def __init__(self, user):
+        init = object.__setattr__
+        init(self, "user", user)
+        for nom in self._CHAMPS + self._DERIVEES:
+            init(self, nom, getattr(user, nom))
+
+        # Barème compilé de la banque, partagé entre requêtes
+        bareme = BAREMES.pour(user.banque)
+        revenu = user.revenu_total
+        composantes = (
+            bareme.taux_epargne.evaluer(user.taux_epargne),
+            bareme.ratio_depenses.evaluer(user.ratio_depenses),
+            bareme.coussin.evaluer(user.mois_securite),
+            bareme.solde_net.evaluer(user.solde / revenu) if revenu > 0 else 0,
+            _score_bonus_contextuel(user, bareme),
+        )
+        score = min(SCORE_MAX, max(0, round(sum(composantes))))
+
+        init(self, "bareme",      bareme)
+        init(self, "composantes", composantes)
+        init(self, "score",       score)
+        init(self, "niveau",      bareme.niveau(score))
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError(f"FinancialSnapshot est immuable (attribut '{nom}')")
+
+    def __delattr__(self, nom):
+        raise AttributeError(f"FinancialSnapshot est immuable (attribut '{nom}')")
+
+    def __reduce__(self):
+        return (FinancialSnapshot, (self.user,))
+
+    def __repr__(self):
+        return f"FinancialSnapshot(score={self.score}, user={self.user!r})"
+
+
+def instantane(user) -> FinancialSnapshot:
+    """Instantané d'un UserData (rendu tel quel s'il en est déjà un)."""
+    return user if isinstance(user, FinancialSnapshot) else FinancialSnapshot(user)
+
+
 # ── Point d'entrée principal ──────────────────────────────────
 
 def analyse_financiere(user) -> dict:
@@ -339,23 +338,20 @@ def analyse_financiere(user) -> dict:
     Après → analyse_financiere(user)  ← objet UserData complet
 
     Cela permet d'utiliser toutes les propriétés calculées
-    de UserData sans les recalculer ici.
+    de UserData sans les recalculer ici. Accepte aussi un
+    FinancialSnapshot : composantes et score sont alors repris
+    tels quels.
 
     Retourne un dict complet pour le template result.html.
     """
 
-    # ── Calcul des 5 composantes ──────────────────────────────
-    s1 = _score_taux_epargne(user.taux_epargne)
-    s2 = _score_ratio_depenses(user.ratio_depenses)
-    s3 = _score_coussin(user.mois_securite)
-    s4 = _score_solde_net(user.solde, user.revenu_total)
-    s5 = _score_bonus_contextuel(user)
-
-    score_brut = s1 + s2 + s3 + s4 + s5
-    score = min(SCORE_MAX, max(0, round(score_brut)))
+    # ── Calcul des 5 composantes (une fois, dans l'instantané) ─
+    user = instantane(user)
+    s1, s2, s3, s4, s5 = user.composantes
+    score = user.score
 
     # ── Profil, conseils, ODD ─────────────────────────────────
-    profil_data = _determiner_profil(score)
+    profil_data = dict(_PROFILS[user.niveau])
     conseils    = _generer_conseils(user, score)
     odds        = _alignement_odd(user, score)
 
@@ -402,4 +398,92 @@ def analyse_financiere(user) -> dict:
             "total":         score,
             "max":           SCORE_MAX,
         }
-    }
\ No newline at end of file
+    }
+
+# ── Scoring par lots (portefeuille complet) ───────────────────
+
+# Codes profil renvoyés par analyse_financiere_batch :
+# le code est le nombre de seuils franchis (0 = précaire, 4 = excellent).
+CODES_PROFIL = tuple(p["nom"] for p in _PROFILS)
+
+
+def analyse_financiere_batch(revenu, depenses=None, epargne=None,
+                             autres_revenus=0, objectif_epargne=0,
+                             horizon=12) -> dict:
+    """
+    Score vectorisé d'un lot de profils.
+
+    Accepte soit un UserBatch comme premier argument, soit les
+    colonnes (tableaux ou scalaires diffusés, longueur N). Les
+    valeurs sont normalisées exactement comme dans UserData et chaque
+    profil est scoré avec le barème compilé de sa banque (colonne
+    banque du lot, barème par défaut sinon) : le résultat est
+    identique, ligne à ligne, à analyse_financiere(UserData(...)).
+
+    Retourne un dict de tableaux numpy de longueur N :
+        score, taux_epargne, endettement, coussin, solde, bonus
+            → mêmes clés que "score_detail" du chemin scalaire
+        profil
+            → code entier, libellé dans CODES_PROFIL[code]
+    """
+    if isinstance(revenu, UserBatch):
+        lot = revenu
+    else:
+        lot = UserBatch(revenu, depenses, epargne, autres_revenus,
+                        objectif_epargne, horizon)
+
+    taux_epargne     = lot.taux_epargne
+    ratio_depenses   = lot.ratio_depenses
+    mois_securite    = lot.mois_securite
+    revenu_total     = lot.revenu_total
+    depenses         = lot.depenses
+    a_revenu         = revenu_total > 0
+    a_depenses       = depenses > 0
+    ratio_solde      = np.divide(lot.solde, revenu_total,
+                                 out=np.zeros_like(revenu_total), where=a_revenu)
+    objectif_epargne = lot.objectif_epargne
+    autres_revenus   = lot.autres_revenus
+    horizon          = lot.horizon
+
+    # ── Barème par profil : un groupe par barème distinct ─────
+    if lot.banque is None or not BAREMES.banques():
+        groupes = [(BAREMES.defaut, slice(None))]
+    else:
+        # Banques distinctes via np.unique (None → "" → barème par défaut)
+        noms, inverse = np.unique(np.where(np.equal(lot.banque, None), "", lot.banque).astype(str),
+                                  return_inverse=True)
+        par_bareme = {}
+        for code, nom in enumerate(noms):
+            par_bareme.setdefault(BAREMES.pour(nom or None), []).append(code)
+        groupes = [(b, np.flatnonzero(np.isin(inverse, codes))) for b, codes in par_bareme.items()]
+
+    # ── Les 5 composantes (barèmes compilés, cf. bareme.py) ───
+    n  = len(lot)
+    s1, s2, s3, s4, s5, profil = (np.zeros(n, dtype=np.int64) for _ in range(6))
+    for bareme, idx in groupes:
+        objectif, marge, marge_min, bonus_horizon, horizon_min, autres = bareme.bonus
+        s1[idx] = bareme.taux_epargne.lot(taux_epargne[idx])
+        s2[idx] = bareme.ratio_depenses.lot(ratio_depenses[idx])
+        s3[idx] = bareme.coussin.lot(mois_securite[idx])
+        s4[idx] = np.where(a_revenu[idx], bareme.solde_net.lot(ratio_solde[idx]), 0)
+        s5[idx] = (
+            objectif * (objectif_epargne[idx] > 0)
+            + marge * (a_depenses[idx] & (revenu_total[idx] > depenses[idx] * marge_min))
+            + bonus_horizon * (horizon[idx] >= horizon_min)
+            + autres * (autres_revenus[idx] > 0)
+        )
+        score_groupe = np.clip(s1[idx] + s2[idx] + s3[idx] + s4[idx] + s5[idx], 0, SCORE_MAX)
+        profil[idx]  = np.searchsorted(bareme.seuils_profil, score_groupe, side="right")
+
+    score  = np.clip(s1 + s2 + s3 + s4 + s5, 0, SCORE_MAX)
+    profil = profil.astype(np.int8)
+
+    return {
+        "score":        score,
+        "taux_epargne": s1,
+        "endettement":  s2,
+        "coussin":      s3,
+        "solde":        s4,
+        "bonus":        s5,
+        "profil":       profil,
+    }
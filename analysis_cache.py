@@ -0,0 +1,145 @@
+"""
+Cache des analyses — AI Inclusive Finance
+═════════════════════════════════════════
+
+Le trafic est dominé par un petit nombre de profils (salaires
+ronds, mêmes dépenses, même banque). Plutôt que de relancer
+analyse_financiere, recommander et generer_coaching à chaque
+requête, on mémorise le résultat par profil normalisé.
+
+Principes :
+  • Clé = champs normalisés de UserData (+ projet_perso éventuel).
+  • Valeur = résultat sérialisé (pickle) : chaque lecture rend une
+    copie neuve, un appelant ne peut jamais modifier le cache.
+    La taille en octets est exacte et sert à borner la mémoire.
+  • Éviction LRU (nombre d'entrées ET octets) + expiration TTL.
+  • invalider_tout() vide tous les caches quand le catalogue ou
+    les barèmes changent ; un résultat calculé avant l'invalidation
+    n'est jamais stocké après (compteur de génération).
+  • Compteurs hits / misses / évictions pour le suivi.
+"""
+
+import pickle
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+
+_CACHES = weakref.WeakSet()
+
+
+def invalider_tout():
+    """Vide tous les caches d'analyses (catalogue ou barème modifié)."""
+    for cache in list(_CACHES):
+        cache.invalider()
+
+
+def abonner(cache):
+    """Inscrit tout objet ayant une méthode invalider() auprès d'invalider_tout()."""
+    _CACHES.add(cache)
+
+
+def cle_profil(espace: str, user, projet_perso: dict = None) -> tuple:
+    """
+    Clé de cache d'un profil : espace de noms (type de résultat),
+    champs normalisés de UserData, puis projet personnel trié.
+    """
+    projet = tuple(sorted(projet_perso.items())) if projet_perso else None
+    return (espace, tuple(getattr(user, c) for c in user._CHAMPS), projet)
+
+
+class CacheAnalyses:
+    """Cache LRU + TTL borné en entrées et en octets, sûr entre threads."""
+
+    # Surcoût approximatif d'une entrée (clé, tuple, nœud OrderedDict)
+    _SURCOUT_ENTREE = 400
+
+    def __init__(self, max_entrees: int = 10_000, max_octets: int = 64 * 2**20,
+                 ttl: float = 600.0, actif: bool = True):
+        self.max_entrees = max_entrees
+        self.max_octets  = max_octets
+        self.ttl         = ttl
+        self.actif       = actif
+
+        self._entrees    = OrderedDict()   # cle → (expiration, pickle)
+        self._octets     = 0
+        self._generation = 0
+        self._verrou     = threading.Lock()
+        self._compteurs  = dict.fromkeys(
+            ("hits", "misses", "evictions", "expirations", "invalidations", "rejets"), 0
+        )
+        abonner(self)
+
+    # ── Lecture / écriture ────────────────────────────────────
+
+    def obtenir(self, cle, calcul):
+        """
+        Retourne une copie du résultat en cache pour `cle`, ou exécute
+        calcul() puis le mémorise. Le calcul se fait hors verrou.
+        """
+        if not self.actif:
+            return calcul()
+
+        donnees = None
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                expiration, donnees = entree
+                if expiration >= time.monotonic():
+                    self._entrees.move_to_end(cle)
+                    self._compteurs["hits"] += 1
+                else:
+                    self._retirer(cle)
+                    self._compteurs["expirations"] += 1
+                    donnees = None
+            if donnees is None:
+                self._compteurs["misses"] += 1
+                generation = self._generation
+
+        if donnees is not None:
+            return pickle.loads(donnees)
+
+        valeur  = calcul()
+        donnees = pickle.dumps(valeur, protocol=pickle.HIGHEST_PROTOCOL)
+        self._stocker(cle, donnees, generation)
+        return valeur
+
+    def _stocker(self, cle, donnees: bytes, generation: int):
+        taille = len(donnees) + self._SURCOUT_ENTREE
+        with self._verrou:
+            # Catalogue/barème changé pendant le calcul, ou entrée trop grosse
+            if generation != self._generation or taille > self.max_octets:
+                self._compteurs["rejets"] += 1
+                return
+            if cle in self._entrees:
+                self._retirer(cle)
+            self._entrees[cle] = (time.monotonic() + self.ttl, donnees)
+            self._octets += taille
+            while (len(self._entrees) > self.max_entrees
+                   or self._octets > self.max_octets):
+                self._retirer(next(iter(self._entrees)))
+                self._compteurs["evictions"] += 1
+
+    def _retirer(self, cle):
+        _, donnees = self._entrees.pop(cle)
+        self._octets -= len(donnees) + self._SURCOUT_ENTREE
+
+    # ── Administration ────────────────────────────────────────
+
+    def invalider(self):
+        """Vide le cache ; les calculs en cours ne seront pas stockés."""
+        with self._verrou:
+            self._entrees.clear()
+            self._octets = 0
+            self._generation += 1
+            self._compteurs["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._verrou:
+            stats = dict(self._compteurs)
+            stats["entrees"] = len(self._entrees)
+            stats["octets"]  = self._octets
+        lectures = stats["hits"] + stats["misses"]
+        stats["taux_hit"] = round(stats["hits"] / lectures, 4) if lectures else 0.0
+        return stats
@@ -1,75 +1,364 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+import itertools
+import time
+
+from flask import (Flask, render_template, request, redirect, url_for, flash, jsonify,
+                   session, stream_template, get_flashed_messages, g)
 from config import Config
 from models import UserData
-from ai_engine import analyse_financiere
+from ai_engine import analyse_financiere, instantane
 from recommendation import recommander
-from coach import generer_coaching
+from coach import generer_coaching, recharger_catalogue, rechercher_annonces, stats_facteurs
+from forecast import projeter
+from stress import stresser
+from analysis_cache import CacheAnalyses, cle_profil
+from session_store import SessionsResultats, StockageMemoire, StockageSQLite
+from persistence import JournalAnalyses
+from peer_percentiles import CentilesPairs
+from neighbours import ProfilsVoisins
+from bareme import BAREMES
+from static_pages import RessourcesStatiques
+from compression import compresser_reponse
+from instrumentation import (Metriques, etape, demarrer_requete, terminer_requete,
+                             server_timing)
+from profiling import Profilage
 
 app = Flask(__name__)
 app.config.from_object(Config)
+# JSON compact et UTF-8 brut (é = 2 octets au lieu de \u00e9)
+app.json.compact      = True
+app.json.ensure_ascii = False
+
+cache_analyses = CacheAnalyses(
+    max_entrees=app.config["ANALYSE_CACHE_ENTREES"],
+    max_octets=app.config["ANALYSE_CACHE_OCTETS"],
+    ttl=app.config["ANALYSE_CACHE_TTL"],
+    actif=app.config["ANALYSE_CACHE_ACTIF"],
+)
+
+# Résultats du parcours gardés sous un jeton (session_store.py) : les
+# étapes suivantes ne recalculent que ce qui leur manque
+sessions_resultats = SessionsResultats(
+    stockage=(StockageSQLite(app.config["SESSIONS_DB"], max_entrees=app.config["SESSIONS_ENTREES"])
+              if app.config["SESSIONS_DB"] else
+              StockageMemoire(max_entrees=app.config["SESSIONS_ENTREES"],
+                              max_octets=app.config["SESSIONS_OCTETS"])),
+    ttl=app.config["SESSIONS_TTL"],
+    actif=app.config["SESSIONS_ACTIVES"],
+)
+
+# Journal des analyses servies (persistence.py) : écriture SQLite par
+# lots dans un thread d'arrière-plan, jamais pendant la requête
+journal_analyses = JournalAnalyses(
+    app.config["JOURNAL_DB"],
+    taille_file=app.config["JOURNAL_FILE"],
+    taille_lot=app.config["JOURNAL_LOT"],
+    intervalle=app.config["JOURNAL_INTERVALLE"],
+    actif=bool(app.config["JOURNAL_DB"]),
+)
+
+# Centiles du score entre pairs (peer_percentiles.py) : esquisses
+# chargées au démarrage, rattrapées sur le journal existant, puis
+# complétées par le thread du journal
+centiles_pairs = (CentilesPairs.charger(app.config["CENTILES_FICHIER"])
+                  if app.config["CENTILES_FICHIER"] else CentilesPairs())
+centiles_pairs.min_pairs = app.config["CENTILES_MIN_PAIRS"]
+if journal_analyses.actif:
+    journal_analyses.abonner(centiles_pairs.rattraper)
+
+# Profils voisins (neighbours.py) : index KDTree construit hors ligne,
+# ouvert en mémoire partagée et rechargé à chaud comme le catalogue
+profils_voisins = (ProfilsVoisins(app.config["VOISINS_INDEX"],
+                                  intervalle=app.config["VOISINS_INTERVALLE"])
+                   if app.config["VOISINS_INDEX"] else None)
+
+# Bundles CSS/JS à empreinte et pages statiques précompilées
+ressources = RessourcesStatiques(app.static_folder)
+PAGES_STATIQUES = {"/": "index.html", "/banks": "banks.html", "/about": "about.html"}
+
+# Profilage d'une requête à la demande (profiling.py) : en-tête secret
+profilage = Profilage(
+    repertoire=app.config["PROFILAGE_REPERTOIRE"],
+    secret=app.config["PROFILAGE_SECRET"],
+    mode=app.config["PROFILAGE_MODE"],
+    intervalle=app.config["PROFILAGE_INTERVALLE"],
+    periode=app.config["PROFILAGE_PERIODE"],
+    duree_max=app.config["PROFILAGE_DUREE_MAX"],
+)
+
+@app.before_request
+def _debut_profilage():
+    # Premier hook enregistré : le profil couvre les autres hooks, la vue et le rendu
+    if not app.config["PROFILAGE_ACTIF"]:
+        return
+    secret = request.headers.get("X-Profilage")
+    if secret and profilage.autoriser(secret):
+        g.profil = profilage.demarrer(request.method, request.path)
+
+@app.after_request
+def _fin_profilage(reponse):
+    profil = g.pop("profil", None)
+    if profil is None:
+        return reponse
+    profileur, nom = profil
+    reponse.headers["X-Profilage-Fichier"] = nom
+    if reponse.is_streamed:
+        # Profil arrêté une fois la page entièrement rendue et envoyée
+        reponse.call_on_close(lambda: profilage.terminer(profileur, nom))
+    else:
+        profilage.terminer(profileur, nom)
+    return reponse
+
+@app.teardown_request
+def _abandon_profilage(exc):
+    # Exception non rattrapée (after_request sauté) : le verrou doit être rendu
+    profil = g.pop("profil", None)
+    if profil is not None:
+        profilage.terminer(*profil)
+
+# Latences par route et par étape (instrumentation.py), exposées sur /metrics
+metriques = Metriques()
+
+@app.before_request
+def _debut_mesures():
+    if app.config["METRIQUES_ACTIVES"]:
+        g.debut_requete = demarrer_requete()
+
+@app.after_request
+def _fin_mesures(reponse):
+    # Enregistré avant _compresser : exécuté après lui (ordre inverse)
+    if "debut_requete" not in g:
+        return reponse
+    debut   = g.debut_requete
+    mesures = terminer_requete()
+    total   = time.perf_counter() - debut
+    route   = request.url_rule.rule if request.url_rule else "(aucune)"
+    statut  = reponse.status_code
+    if app.config["SERVER_TIMING"]:
+        reponse.headers["Server-Timing"] = server_timing(mesures, total)
+    if reponse.is_streamed:
+        # La suite de la page est rendue pendant l'envoi : durée totale
+        # enregistrée à la fermeture du flux
+        reponse.call_on_close(lambda: metriques.observer_requete(
+            route, statut, time.perf_counter() - debut, mesures))
+    else:
+        metriques.observer_requete(route, statut, total, mesures)
+    return reponse
+
+@app.context_processor
+def _assets():
+    return {"asset_url": ressources.asset_url}
+
+@app.before_request
+def _recharger_donnees():
+    # Nouvelle calibration déposée dans baremes/ ou nouvelle base du
+    # catalogue : prise en compte sans redémarrer les workers
+    # (vérifications espacées, cf. bareme.py et catalogue.py)
+    BAREMES.recharger_si_modifie()
+    recharger_catalogue()
+    if profils_voisins is not None:
+        profils_voisins.recharger_si_modifie()
+
+@app.after_request
+def _compresser(reponse):
+    if not app.config["COMPRESSION_ACTIVE"]:
+        return reponse
+    return compresser_reponse(reponse,
+                              seuil=app.config["COMPRESSION_SEUIL"],
+                              niveau_gzip=app.config["COMPRESSION_NIVEAU_GZIP"],
+                              qualite_brotli=app.config["COMPRESSION_QUALITE_BROTLI"])
+
+def _regrouper(morceaux, taille):
+    """Regroupe les fragments de Jinja (souvent quelques octets) en morceaux de `taille`."""
+    tampon, n = [], 0
+    for morceau in morceaux:
+        tampon.append(morceau)
+        n += len(morceau)
+        if n >= taille:
+            yield "".join(tampon)
+            tampon, n = [], 0
+    if tampon:
+        yield "".join(tampon)
+
+# Fin de page envoyée si le rendu échoue après le premier morceau :
+# le statut 200 est déjà parti, on ferme la page sur un message
+# visible plutôt que de la laisser tronquée sans explication
+_FIN_RENDU_INTERROMPU = (
+    '<div class="flash-container"><div class="flash error">'
+    "Une erreur est survenue pendant l'affichage de cette page. "
+    'Veuillez <a href="/form">recommencer l\'analyse</a>.</div></div></body></html>'
+)
+
+def _terminer(morceaux, chemin):
+    """Suite du flux : une erreur de rendu est journalisée et clôt la page."""
+    # Hors contexte de requête ici (rendu par le serveur WSGI) : chemin passé en argument
+    try:
+        yield from morceaux
+    except Exception:
+        app.logger.exception("Rendu interrompu en cours de flux (%s)", chemin)
+        yield _FIN_RENDU_INTERROMPU
+
+def _rendre(template, **contexte):
+    """
+    Rend une page de résultats, en flux si STREAMING_RESULTATS : le
+    premier morceau part avant que la fin de la page soit calculée.
+    """
+    if not app.config["STREAMING_RESULTATS"]:
+        with etape("rendu"):
+            return render_template(template, **contexte)
+    # Les messages flash sont retirés de la session avant l'envoi des
+    # en-têtes (le cookie ne peut plus changer une fois le flux parti)
+    get_flashed_messages(with_categories=True)
+    morceaux = _regrouper(stream_template(template, **contexte),
+                          app.config["STREAMING_TRONCON"])
+    # Premier morceau rendu ici : une erreur de template en tête de
+    # page reste gérée par la route (flash + redirection)
+    with etape("rendu"):
+        premier = next(morceaux, "")
+    return app.response_class(itertools.chain((premier,), _terminer(morceaux, request.path)), mimetype="text/html")
 
 def _extraire_user(form):
-    def get_float(keys, default=0):
-        for key in keys:
-            val = form.get(key, "").strip()
-            if val:
-                try:
-                    return float(val)
-                except ValueError:
-                    raise ValueError(f"Le champ '{key}' doit être un nombre.")
-        return float(default)
-    def get_int(keys, default=0):
-        for key in keys:
-            val = form.get(key, "").strip()
-            if val:
-                try: return int(val)
-                except ValueError: return default
-        return default
-
-    revenu   = get_float(["revenu","salary"], default=0)
-    depenses = get_float(["depenses","expenses"], default=0)
-    epargne  = get_float(["epargne","savings"], default=0)
-    if revenu   <= 0: raise ValueError("Le revenu mensuel doit être supérieur à 0.")
-    if depenses <= 0: raise ValueError("Les dépenses mensuelles doivent être supérieures à 0.")
-    return UserData(
-        revenu=revenu, depenses=depenses, epargne=epargne,
-        autres_revenus=get_float(["autres_revenus"], default=0),
-        objectif_epargne=get_float(["objectif_epargne"], default=0),
-        horizon=get_int(["horizon"], default=12),
-        banque=form.get("banque","").strip() or None,
-        situation=form.get("situation","").strip() or None,
-        pays=form.get("pays","").strip() or None,
-        objectif=form.get("objectif","epargne"),
-    )
+    with etape("parse"):
+        return UserData.from_form(form)
 
 def _extraire_projet_perso(form):
     prix = form.get("projet_prix","").strip()
     if not prix: return None
     try:
-        return {
-            "nom":   form.get("projet_nom","Mon projet").strip() or "Mon projet",
-            "prix":  float(prix),
-            "type":  form.get("projet_type","immobilier"),
-            "duree": int(form.get("projet_duree",10)),
-            "apport":float(form.get("projet_apport",0.20)),
-            "loyer_estime": float(form.get("projet_loyer",0) or 0),
-        }
+        with etape("parse_projet"):
+            return {
+                "nom":   form.get("projet_nom","Mon projet").strip() or "Mon projet",
+                "prix":  float(prix),
+                "type":  form.get("projet_type","immobilier"),
+                "duree": int(form.get("projet_duree",10)),
+                "apport":float(form.get("projet_apport",0.20)),
+                "loyer_estime": float(form.get("projet_loyer",0) or 0),
+            }
     except: return None
 
+# Étapes chronométrées (instrumentation.py) : absentes de Server-Timing
+# quand le résultat vient du cache d'analyses
+
+def _scorer(user):
+    with etape("score"):
+        profil = instantane(user)   # score et ratios calculés une seule fois
+        return profil, analyse_financiere(profil)
+
+def _recommander(profil):
+    with etape("reco"):
+        return recommander(profil)
+
 def _analyser_complet(user):
-    resultat = analyse_financiere(user)
-    reco     = recommander(user, resultat["score"])
-    coaching = generer_coaching(user, resultat["score"])
-    return resultat, reco, coaching
+    def calcul():
+        profil, resultat = _scorer(user)
+        reco = _recommander(profil)
+        with etape("coaching"):
+            coaching = generer_coaching(profil)
+        return resultat, reco, coaching
+    return cache_analyses.obtenir(cle_profil("complet", user), calcul)
+
+def _analyser_reco(user):
+    def calcul():
+        profil, resultat = _scorer(user)
+        return resultat, _recommander(profil)
+    return cache_analyses.obtenir(cle_profil("reco", user), calcul)
+
+def _analyser_forecast(user):
+    def calcul():
+        profil, resultat = _scorer(user)
+        reco = _recommander(profil)
+        with etape("projection"):
+            projection = projeter(user)
+        return resultat, reco, projection
+    return cache_analyses.obtenir(cle_profil("forecast", user), calcul)
+
+def _analyser_coach(user, projet_perso):
+    def calcul():
+        profil, resultat = _scorer(user)
+        with etape("coaching"):
+            coaching = generer_coaching(profil, projet_perso=projet_perso)
+        return resultat, coaching
+    return cache_analyses.obtenir(cle_profil("coach", user, projet_perso), calcul)
+
+# ── Parcours : résultats repris d'une étape à l'autre ─────────
+
+def _cle_coaching(projet_perso):
+    return ("coaching", tuple(sorted(projet_perso.items()))) if projet_perso else "coaching"
+
+def _calculer_partie(partie, profil, projet_perso):
+    if partie == "reco":
+        return _recommander(profil)
+    if partie == "projection":
+        with etape("projection"):
+            return projeter(profil.user)
+    with etape("coaching"):
+        return generer_coaching(profil, projet_perso=projet_perso)
+
+def _parcours(form, analyser, parties, projet_perso=None):
+    """
+    Profil et résultats d'une étape du parcours. Avec un jeton de
+    session valide (champ caché « jeton »), UserData et les résultats
+    déjà calculés sont repris et seules les `parties` manquantes sont
+    calculées ; sinon le profil est lu dans le formulaire et
+    analyser(user) (cache d'analyses) fournit toutes les parties.
+
+    Retourne (user, jeton, [resultat, *parties]). L'étape servie est
+    journalisée dans tous les cas, calculée ou reprise du jeton.
+    """
+    noms  = ("resultat",) + parties
+    jeton = form.get("jeton", "")
+    etat  = sessions_resultats.lire(jeton)
+    if etat is None:
+        user = _extraire_user(form)
+        etat = dict(zip(noms, analyser(user)), user=user)
+        manquants = list(noms)
+    else:
+        user      = etat["user"]
+        manquants = [p for p in noms if p not in etat]
+        if manquants:
+            if "resultat" in manquants:
+                profil, etat["resultat"] = _scorer(user)
+            else:
+                profil = instantane(user)
+            for partie in manquants:
+                if partie != "resultat":
+                    etat[partie] = _calculer_partie(partie, profil, projet_perso)
+    valeurs = dict(zip(noms, (etat[p] for p in noms)))
+    journal_analyses.enregistrer(request.path, user, valeurs["resultat"], valeurs.get("reco"),
+                                 valeurs.get(_cle_coaching(projet_perso)), projet_perso)
+    if manquants:
+        # Un seul coaching avec projet gardé par session (le dernier)
+        for cle in [c for c in etat if isinstance(c, tuple) and c not in parties]:
+            del etat[cle]
+        # Jeton inconnu : état neuf (dict) → nouveau jeton, jamais celui du client
+        jeton = sessions_resultats.ecrire(etat) or ""
+    return user, jeton, list(valeurs.values())
+
+def _page_statique(template):
+    page = ressources.pages.get(request.path)
+    # Message flash en attente (redirection après erreur) : rendu Jinja
+    if page is None or session.get("_flashes"):
+        return render_template(template)
+    return page.reponse()
+
+def precompiler_pages():
+    """Rend les pages statiques une fois et les garde compressées en mémoire."""
+    for chemin, template in PAGES_STATIQUES.items():
+        with app.test_request_context(chemin):
+            ressources.ajouter_page(chemin, render_template(template))
 
 @app.route("/")
-def home(): return render_template("index.html")
+def home(): return _page_statique("index.html")
 
 @app.route("/banks")
-def banks(): return render_template("banks.html")
+def banks(): return _page_statique("banks.html")
 
 @app.route("/about")
-def about(): return render_template("about.html")
+def about(): return _page_statique("about.html")
+
+@app.route("/assets/<nom>")
+def assets(nom):
+    asset = ressources.assets.get(nom)
+    return asset.reponse() if asset else ("", 404)
 
 @app.route("/form")
 def form():
@@ -90,10 +379,11 @@ def situation():
 @app.route("/analyse", methods=["POST"])
 def analyse():
     try:
-        user = _extraire_user(request.form)
-        resultat, reco, coaching = _analyser_complet(user)
-        return render_template("result.html", data=resultat, reco=reco,
-                               coaching=coaching, user=user.to_dict())
+        user, jeton, (resultat, reco, coaching) = _parcours(
+            request.form, _analyser_complet, ("reco", "coaching"))
+        return _rendre("result.html", data=resultat, reco=reco, coaching=coaching,
+                       user=user.to_dict(), jeton=jeton,
+                       pairs=centiles_pairs.positionner(user, resultat["score"]))
     except ValueError as e:
         flash(str(e), "error"); return redirect(url_for("dashboard"))
     except Exception as e:
@@ -102,10 +392,11 @@ def analyse():
 @app.route("/result", methods=["POST"])
 def result():
     try:
-        user = _extraire_user(request.form)
-        resultat, reco, coaching = _analyser_complet(user)
-        return render_template("result.html", data=resultat, reco=reco,
-                               coaching=coaching, user=user.to_dict())
+        user, jeton, (resultat, reco, coaching) = _parcours(
+            request.form, _analyser_complet, ("reco", "coaching"))
+        return _rendre("result.html", data=resultat, reco=reco, coaching=coaching,
+                       user=user.to_dict(), jeton=jeton,
+                       pairs=centiles_pairs.positionner(user, resultat["score"]))
     except ValueError as e:
         flash(str(e), "error"); return redirect(url_for("situation"))
     except Exception as e:
@@ -115,23 +406,51 @@ def result():
 def forecast():
     """GPS Financier — simulation prédictive 3 ans + mode crise."""
     try:
-        user    = _extraire_user(request.form)
-        resultat = analyse_financiere(user)
-        reco     = recommander(user, resultat["score"])
-        return render_template("forecast.html", data=resultat, reco=reco, user=user.to_dict())
+        user, jeton, (resultat, reco, projection) = _parcours(
+            request.form, _analyser_forecast, ("reco", "projection"))
+        return _rendre("forecast.html", data=resultat, reco=reco,
+                       projection=projection, user=user.to_dict(), jeton=jeton)
     except ValueError as e:
         flash(str(e), "error"); return redirect(url_for("banks"))
     except Exception as e:
         flash(f"Erreur : {e}", "error"); return redirect(url_for("banks"))
 
+@app.route("/forecast/json", methods=["POST"])
+def forecast_json():
+    """Projection 36 mois (normal + crise) en JSON, pour le back-office."""
+    try:
+        user = _extraire_user(request.form)
+    except ValueError as e:
+        return jsonify({"erreur": str(e)}), 400
+    resultat, _, projection = _analyser_forecast(user)
+    return jsonify({"score": resultat["score"], "projection": projection})
+
+@app.route("/forecast/stress", methods=["POST"])
+def forecast_stress():
+    """Stress-test Monte Carlo (bandes P5/P50/P95, probabilités) en JSON."""
+    n_max = app.config["STRESS_CHEMINS_MAX"]
+    try:
+        user      = _extraire_user(request.form)
+        n_chemins = min(int(request.form.get("n_chemins") or 10_000), n_max)
+        seed      = request.form.get("seed", "").strip()
+        seed      = int(seed) if seed else None
+        if n_chemins <= 0:
+            raise ValueError("n_chemins doit être strictement positif.")
+        if seed is not None and not 0 <= seed < 2**63:
+            raise ValueError("seed doit être un entier entre 0 et 2^63 - 1.")
+    except ValueError as e:
+        return jsonify({"erreur": str(e)}), 400
+    with etape("stress"):
+        resultat = stresser(user, n_chemins=n_chemins, seed=seed)
+    return jsonify(resultat)
+
 @app.route("/opportunities", methods=["POST"])
 def opportunities():
     """Étape 3 — Affiche les opportunités IA selon le profil."""
     try:
-        user    = _extraire_user(request.form)
-        resultat = analyse_financiere(user)
-        reco     = recommander(user, resultat["score"])
-        return render_template("opportunities.html", data=resultat, reco=reco, user=user.to_dict())
+        user, jeton, (resultat, reco) = _parcours(request.form, _analyser_reco, ("reco",))
+        return _rendre("opportunities.html", data=resultat, reco=reco,
+                       user=user.to_dict(), jeton=jeton)
     except ValueError as e:
         flash(str(e), "error"); return redirect(url_for("dashboard"))
     except Exception as e:
@@ -140,23 +459,146 @@ def opportunities():
 @app.route("/coach", methods=["POST"])
 def coach():
     try:
-        user         = _extraire_user(request.form)
         projet_perso = _extraire_projet_perso(request.form)
-        resultat     = analyse_financiere(user)
-        coaching     = generer_coaching(user, resultat["score"], projet_perso)
-        return render_template("coach.html", data=resultat, coaching=coaching,
-                               user=user.to_dict(), projet_perso=projet_perso)
+        user, jeton, (resultat, coaching) = _parcours(
+            request.form, lambda u: _analyser_coach(u, projet_perso),
+            (_cle_coaching(projet_perso),), projet_perso)
+        return _rendre("coach.html", data=resultat, coaching=coaching,
+                       user=user.to_dict(), projet_perso=projet_perso, jeton=jeton)
     except ValueError as e:
         flash(str(e), "error"); return redirect(url_for("dashboard"))
     except Exception as e:
         flash(f"Erreur coach : {e}", "error"); return redirect(url_for("dashboard"))
 
+# ─────────────────────────────────────────────────────────────
+# API JSON v1 — mêmes résultats que les pages HTML, sans Jinja
+# ─────────────────────────────────────────────────────────────
+
+def _profil_api(donnees):
+    """
+    Ramène un profil JSON (ou formulaire) aux chaînes attendues par
+    _extraire_user / _extraire_projet_perso. Un projet personnel peut
+    être passé à plat (projet_prix…) ou imbriqué ("projet_perso": {...}).
+    """
+    if not isinstance(donnees, dict):
+        raise ValueError("Chaque profil doit être un objet JSON.")
+    champs = {k: "" if v is None else str(v)
+              for k, v in donnees.items() if not isinstance(v, (dict, list))}
+    projet = donnees.get("projet_perso")
+    if isinstance(projet, dict):
+        for cle, champ in (("nom", "projet_nom"), ("prix", "projet_prix"),
+                           ("type", "projet_type"), ("duree", "projet_duree"),
+                           ("apport", "projet_apport"), ("loyer_estime", "projet_loyer")):
+            if projet.get(cle) is not None:
+                champs[champ] = str(projet[cle])
+    return champs
+
+def _api_analyse(champs):
+    user = _extraire_user(champs)
+    resultat, reco, coaching = _analyser_complet(user)
+    journal_analyses.enregistrer(request.path, user, resultat, reco, coaching)
+    return {"analyse": resultat, "recommandation": reco, "coaching": coaching,
+            "pairs": centiles_pairs.positionner(user, resultat["score"])}
+
+def _api_recommend(champs):
+    user = _extraire_user(champs)
+    resultat, reco = _analyser_reco(user)
+    journal_analyses.enregistrer(request.path, user, resultat, reco)
+    return {"analyse": resultat, "recommandation": reco}
+
+def _api_coach(champs):
+    user, projet_perso = _extraire_user(champs), _extraire_projet_perso(champs)
+    resultat, coaching = _analyser_coach(user, projet_perso)
+    journal_analyses.enregistrer(request.path, user, resultat, coaching=coaching,
+                                 projet_perso=projet_perso)
+    return {"analyse": resultat, "coaching": coaching}
+
+def _api_forecast(champs):
+    user = _extraire_user(champs)
+    resultat, reco, projection = _analyser_forecast(user)
+    journal_analyses.enregistrer(request.path, user, resultat, reco)
+    return {"analyse": resultat, "recommandation": reco, "projection": projection}
+
+def _api_voisins(champs):
+    user = _extraire_user(champs)
+    if profils_voisins is None:
+        return {"voisins": []}
+    try:
+        k = int(champs.get("k") or app.config["VOISINS_K"])
+    except ValueError:
+        raise ValueError("k doit être un entier.")
+    k = min(max(k, 1), app.config["VOISINS_K_MAX"])
+    return {"voisins": profils_voisins.voisins(user, k)}
+
+_API_ETAPES = {
+    "analyse":   _api_analyse,
+    "recommend": _api_recommend,
+    "coach":     _api_coach,
+    "forecast":  _api_forecast,
+    "voisins":   _api_voisins,
+}
+
+def _corps_api():
+    if request.is_json:
+        return request.get_json(silent=True)
+    return request.form.to_dict()
+
+@app.route("/api/v1/<nom>", methods=["POST"])
+def api_v1(nom):
+    if nom not in _API_ETAPES:
+        return jsonify({"erreur": f"Endpoint inconnu : {nom}"}), 404
+    try:
+        return jsonify(_API_ETAPES[nom](_profil_api(_corps_api())))
+    except ValueError as e:
+        return jsonify({"erreur": str(e)}), 400
+
+@app.route("/api/v1/batch/<nom>", methods=["POST"])
+def api_v1_batch(nom):
+    """{"profils": [...]} → {"resultats": [...]} (une erreur par profil invalide)."""
+    if nom not in _API_ETAPES:
+        return jsonify({"erreur": f"Endpoint inconnu : {nom}"}), 404
+    corps   = _corps_api()
+    profils = corps.get("profils") if isinstance(corps, dict) else None
+    if not isinstance(profils, list):
+        return jsonify({"erreur": "Corps attendu : {\"profils\": [...]}"}), 400
+    if len(profils) > app.config["API_BATCH_MAX"]:
+        return jsonify({"erreur": f"Au plus {app.config['API_BATCH_MAX']} profils par requête."}), 413
+
+    resultats = []
+    for profil in profils:
+        try:
+            resultats.append(_API_ETAPES[nom](_profil_api(profil)))
+        except ValueError as e:
+            resultats.append({"erreur": str(e)})
+    return jsonify({"resultats": resultats})
+
+@app.route("/api/v1/annonces")
+def api_v1_annonces():
+    """Annonces du catalogue filtrées par categorie, quartier et prix_max (?limite=50, max 200)."""
+    limite = min(max(request.args.get("limite", 50, type=int), 0), 200)
+    return jsonify({"annonces": rechercher_annonces(categorie=request.args.get("categorie"),
+                                                    quartier=request.args.get("quartier"),
+                                                    prix_max=request.args.get("prix_max", type=float),
+                                                    limite=limite)})
+
+@app.route("/metrics")
+def metrics():
+    """Histogrammes de latence par route et par étape, caches de facteurs (format Prometheus)."""
+    if not app.config["METRIQUES_ACTIVES"]:
+        return ("", 404)
+    caches = {f"facteurs_{nom}": stats for nom, stats in stats_facteurs().items()}
+    return app.response_class(metriques.exporter(caches),
+                              content_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.errorhandler(404)
 def page_not_found(e): return render_template("404.html"), 404
 
 @app.errorhandler(500)
 def internal_error(e): return render_template("500.html"), 500
 
+if app.config["PAGES_PRECOMPILEES"]:
+    precompiler_pages()
+
 if __name__ == "__main__":
     import os
     app.run(debug=app.config["DEBUG"], host="0.0.0.0",
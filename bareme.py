@@ -0,0 +1,286 @@
+"""
+Barèmes de scoring — AI Inclusive Finance
+═════════════════════════════════════════
+
+Les paliers des 4 composantes, le bonus contextuel et les seuils
+de profil ne sont plus des if-chains dans ai_engine.py mais des
+données : baremes/defaut.json, plus un fichier par banque
+partenaire (baremes/<banque>.json) qui ne redéfinit que ce qui
+change par rapport au barème par défaut.
+
+Compilation :
+  Chaque composante devient deux tableaux triés, bornes (n) et
+  points (n + 1) ; sa valeur pour x est points[nb de bornes ≤ x],
+  soit bisect_right pour un scalaire et np.searchsorted(side="right")
+  pour un lot — une seule définition pour les deux chemins.
+  Les comparaisons strictes deviennent des bornes inclusives :
+      x > t  ⇔  x ≥ nextafter(t, +∞)
+  ce qui reproduit exactement les anciennes if-chains.
+
+Rechargement à chaud :
+  Les barèmes compilés sont immuables et partagés entre requêtes.
+  recharger_si_modifie() (appelé avant chaque requête, vérification
+  espacée) recompile le répertoire si un fichier a changé, puis vide
+  les caches d'analyses. Un fichier invalide est refusé : les
+  barèmes précédents restent en service.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+from analysis_cache import invalider_tout
+
+
+REPERTOIRE_DEFAUT   = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baremes")
+REPERTOIRE          = os.environ.get("BAREMES_REPERTOIRE", REPERTOIRE_DEFAUT)
+INTERVALLE_CONTROLE = float(os.environ.get("BAREMES_INTERVALLE", 2.0))   # secondes
+
+COMPOSANTES = ("taux_epargne", "ratio_depenses", "coussin", "solde_net")
+
+# Opérateur → borne inclusive équivalente
+_BORNES_BASSES = {">=": lambda t: t, ">": lambda t: math.nextafter(t, math.inf)}
+_BORNES_HAUTES = {"<=": lambda t: math.nextafter(t, math.inf), "<": lambda t: t}
+
+journal = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────
+# COMPILATION
+# ─────────────────────────────────────────────────────────────
+
+class TableBareme:
+    """
+    Barème compilé d'une composante : bornes croissantes et points,
+    valeur = points[nombre de bornes ≤ x]. Appel scalaire :
+    table.evaluer(x) ; appel vectorisé : table.lot(tableau).
+    """
+
+    __slots__ = ("bornes", "points", "evaluer", "_bornes_np", "_points_np")
+
+    def __init__(self, bornes, points):
+        bornes, points = tuple(bornes), tuple(points)
+        object.__setattr__(self, "bornes", bornes)
+        object.__setattr__(self, "points", points)
+        object.__setattr__(self, "_bornes_np", np.array(bornes, dtype=np.float64))
+        object.__setattr__(self, "_points_np", np.array(points))
+        object.__setattr__(self, "evaluer", _evaluateur(bornes, points))
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError(f"TableBareme est immuable (attribut '{nom}')")
+
+    def lot(self, x: np.ndarray) -> np.ndarray:
+        return self._points_np[np.searchsorted(self._bornes_np, x, side="right")]
+
+    def __repr__(self):
+        return f"TableBareme(bornes={self.bornes}, points={self.points})"
+
+
+def _evaluateur(bornes: tuple, points: tuple):
+    """Fonction scalaire x → points[bisect_right(bornes, x)]."""
+    def evaluer(x, _bornes=list(bornes), _points=points, _bisect=bisect_right):
+        return _points[_bisect(_bornes, x)]
+    return evaluer
+
+
+def _points(valeur) -> int:
+    """
+    Nombre de points entier : le chemin scalaire arrondit la somme des
+    composantes, le chemin par lots la garde en entiers — des points
+    fractionnaires donneraient deux scores différents.
+    """
+    if isinstance(valeur, bool) or not isinstance(valeur, (int, float)) \
+            or not float(valeur).is_integer():
+        raise ValueError(f"nombre de points entier attendu, reçu {valeur!r}")
+    return int(valeur)
+
+
+def compiler_paliers(spec: dict) -> TableBareme:
+    """
+    Compile une liste de paliers évalués dans l'ordre (premier
+    palier vérifié = points attribués) :
+        {"paliers": [[">=", 0.30, 200], [">", 0.0, 20]], "sinon": 0}
+    Les paliers d'une composante vont tous dans le même sens
+    (>= / > à seuils décroissants, ou <= / < à seuils croissants).
+    """
+    paliers = [(op, float(seuil), _points(points)) for op, seuil, points in spec["paliers"]]
+    sinon   = _points(spec.get("sinon", 0))
+    ops     = {op for op, _, _ in paliers}
+
+    if ops <= _BORNES_BASSES.keys():
+        # Le palier retenu est le plus haut atteint : on remonte la liste
+        bornes = [_BORNES_BASSES[op](s) for op, s, _ in reversed(paliers)]
+        points = [sinon] + [p for _, _, p in reversed(paliers)]
+    elif ops <= _BORNES_HAUTES.keys():
+        # Chaque borne franchie fait perdre un palier
+        bornes = [_BORNES_HAUTES[op](s) for op, s, _ in paliers]
+        points = [p for _, _, p in paliers] + [sinon]
+    else:
+        raise ValueError(f"opérateurs incompatibles dans un même barème : {sorted(ops)}")
+
+    if any(a >= b for a, b in zip(bornes, bornes[1:])):
+        raise ValueError("paliers non ordonnés (un palier serait inatteignable)")
+    return TableBareme(bornes, points)
+
+
+class Bareme:
+    """Barème complet compilé d'une banque (ou le barème par défaut)."""
+
+    __slots__ = ("nom", "banque", "seuils_profil", "bonus") + COMPOSANTES
+
+    def __init__(self, banque, donnees: dict):
+        init = object.__setattr__
+        init(self, "banque", banque)
+        init(self, "nom", donnees.get("nom", banque or "défaut"))
+
+        seuils = tuple(donnees["seuils_profil"])
+        if len(seuils) != 4 or list(seuils) != sorted(set(seuils)):
+            raise ValueError("seuils_profil : 4 seuils strictement croissants attendus")
+        init(self, "seuils_profil", seuils)
+
+        for nom in COMPOSANTES:
+            try:
+                init(self, nom, compiler_paliers(donnees["composantes"][nom]))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"composante '{nom}' : {e}") from None
+
+        bonus = donnees["bonus"]
+        try:
+            init(self, "bonus", (
+                _points(bonus["objectif_epargne"]), _points(bonus["marge"]), float(bonus["marge_min"]),
+                _points(bonus["horizon"]), bonus["horizon_min"], _points(bonus["autres_revenus"]),
+            ))
+        except ValueError as e:
+            raise ValueError(f"bonus : {e}") from None
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError(f"Bareme est immuable (attribut '{nom}')")
+
+    def niveau(self, score) -> int:
+        """Tranche du score : nombre de seuils de profil franchis (0 à 4)."""
+        return bisect_right(self.seuils_profil, score)
+
+    def __repr__(self):
+        return f"Bareme({self.nom!r})"
+
+
+def _fusionner(defaut: dict, surcharge: dict) -> dict:
+    """Barème d'une banque = défaut + clés redéfinies (composantes une à une)."""
+    donnees = {**defaut, **surcharge}
+    for cle in ("composantes", "bonus"):
+        donnees[cle] = {**defaut.get(cle, {}), **surcharge.get(cle, {})}
+    return donnees
+
+
+# ─────────────────────────────────────────────────────────────
+# REGISTRE ET RECHARGEMENT À CHAUD
+# ─────────────────────────────────────────────────────────────
+
+class RegistreBaremes:
+    """
+    Barèmes compilés d'un répertoire : defaut.json + <banque>.json.
+    pour(banque) est une simple lecture de dict ; le remplacement
+    après rechargement est atomique (un seul dict réaffecté).
+    """
+
+    def __init__(self, repertoire: str = REPERTOIRE,
+                 intervalle: float = INTERVALLE_CONTROLE):
+        self.repertoire  = repertoire
+        self.intervalle  = intervalle
+        self.erreur      = None
+        self._verrou     = threading.Lock()
+        self._prochain   = 0.0
+        self._refusee    = None   # signature d'un répertoire invalide déjà signalé
+        self._signature  = self._signer()
+        self._baremes    = self._compiler()
+        self.chargements = 1
+
+    def pour(self, banque) -> Bareme:
+        """Barème de la banque, ou le barème par défaut."""
+        baremes = self._baremes
+        return baremes.get(banque) or baremes[None]
+
+    @property
+    def defaut(self) -> Bareme:
+        return self._baremes[None]
+
+    def banques(self) -> list:
+        return sorted(b for b in self._baremes if b is not None)
+
+    # ── Chargement ────────────────────────────────────────────
+
+    def _fichiers(self) -> list:
+        return sorted(f for f in os.listdir(self.repertoire) if f.endswith(".json"))
+
+    def _signer(self) -> tuple:
+        signature = []
+        for nom in self._fichiers():
+            st = os.stat(os.path.join(self.repertoire, nom))
+            signature.append((nom, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _lire(self, nom: str) -> dict:
+        with open(os.path.join(self.repertoire, nom), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _compiler(self) -> dict:
+        baremes = {}
+        defaut  = None
+        # defaut.json d'abord : les barèmes des banques le complètent
+        for nom in ["defaut.json"] + [f for f in self._fichiers() if f != "defaut.json"]:
+            banque = nom.removesuffix(".json")
+            try:
+                if defaut is None:
+                    defaut = self._lire(nom)
+                    baremes[None] = Bareme(None, defaut)
+                else:
+                    baremes[banque] = Bareme(banque, _fusionner(defaut, self._lire(nom)))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{nom} : {e!r}") from None
+        return baremes
+
+    def recharger_si_modifie(self, forcer: bool = False) -> bool:
+        """
+        Recompile si un fichier a été ajouté, modifié ou supprimé.
+        Au plus une vérification du disque par intervalle ; retourne
+        True si de nouveaux barèmes sont en service.
+        """
+        maintenant = time.monotonic()
+        if not forcer and maintenant < self._prochain:
+            return False
+        with self._verrou:
+            self._prochain = maintenant + self.intervalle
+            try:
+                signature = self._signer()
+                if signature in (self._signature, self._refusee) and not forcer:
+                    return False
+                baremes = self._compiler()
+            except (OSError, ValueError) as e:
+                # Calibration en cours d'écriture ou invalide : on garde l'ancienne
+                self._refusee = signature if isinstance(e, ValueError) else None
+                self.erreur = str(e)
+                journal.error("Barèmes non rechargés : %s", e)
+                return False
+            self._baremes, self._signature = baremes, signature
+            self._refusee = None
+            self.erreur   = None
+            self.chargements += 1
+        invalider_tout()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "repertoire":  self.repertoire,
+            "banques":     self.banques(),
+            "chargements": self.chargements,
+            "erreur":      self.erreur,
+        }
+
+
+BAREMES = RegistreBaremes()
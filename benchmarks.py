@@ -0,0 +1,1165 @@
+"""
+Benchmarks — AI Inclusive Finance
+═════════════════════════════════
+
+Mesures de performance des chemins critiques :
+
+    python benchmarks.py                 # tous les benchmarks (sauf endurance)
+    python benchmarks.py --soak          # + soak_recommandation (1M appels)
+    python benchmarks.py duree_optimale  # un benchmark précis
+    python benchmarks.py -o perf.json                        # + mesures en JSON
+    python benchmarks.py -o perf.json --comparer base.json   # + garde-fou
+    python benchmarks.py moteurs routes --rapide
+
+Chaque benchmark vérifie d'abord que la nouvelle implémentation
+donne exactement les mêmes résultats que la référence, puis
+affiche les temps mesurés et enregistre ceux des chemins servis
+(_enregistrer) : ce sont eux que -o écrit et que --comparer
+confronte à une mesure précédente. Le garde-fou échoue (code 1)
+si un chemin critique est plus lent de plus de --seuil %.
+
+moteurs et routes mesurent chaque moteur et chaque route de app.py
+(client de test Flask, cache d'analyses désactivé : on mesure le
+vrai travail). Les profils sont tirés d'un générateur synthétique
+calé sur les revenus à Djibouti (profils_djibouti).
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+import coach
+from ai_engine import analyse_financiere, analyse_financiere_batch, instantane
+from bareme import BAREMES
+from catalogue import CatalogueSQLite, construire
+from coach import (OPPORTUNITES, calculer_mensualite, duree_minimale,
+                   generer_coaching, stats_facteurs)
+from forecast import projeter, projeter_lot
+from models import UserBatch, UserData
+from recommendation import PRODUITS, recommander
+from stress import stresser, stresser_lot
+
+
+BENCHMARKS = {}
+ENDURANCE  = set()              # longs et à assertion mémoire : seulement nommés ou avec --soak
+MESURES    = {}                 # "benchmark:cas" → {"us", "critique"}
+SEUIL_REGRESSION = 15.0         # % de ralentissement toléré sur un chemin critique
+REGLAGES   = {"profils": 200, "tours": 7, "soak": 1_000_000}    # --rapide : 20 × 3, soak 100k
+
+
+def benchmark(fn=None, *, endurance: bool = False):
+    """Enregistre un benchmark sous son nom sans le préfixe bench_."""
+    def enregistrer(fn):
+        nom = fn.__name__.removeprefix("bench_")
+        BENCHMARKS[nom] = fn
+        if endurance:
+            ENDURANCE.add(nom)
+        return fn
+    return enregistrer(fn) if fn is not None else enregistrer
+
+
+@contextmanager
+def _application(**config):
+    """
+    Module app avec le cache d'analyses désactivé (on mesure le vrai
+    travail) et les réglages `config` appliqués ; tout est rétabli en
+    sortie, même sur erreur.
+    """
+    import app as application
+
+    reglages = application.app.config
+    avant = {cle: reglages[cle] for cle in config}, application.cache_analyses.actif
+    reglages.update(config)
+    application.cache_analyses.actif = False
+    try:
+        yield application
+    finally:
+        reglages.update(avant[0])
+        application.cache_analyses.actif = avant[1]
+
+
+def _chrono(fn, repetitions: int = 5) -> float:
+    """Meilleur temps (s) sur plusieurs exécutions de fn()."""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fn()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def _enregistrer(nom: str, secondes: float, critique: bool = True):
+    """Garde le temps par opération d'un chemin servi (JSON, garde-fou)."""
+    MESURES[nom] = {"us": round(secondes * 1e6, 3), "critique": critique}
+
+
+# ─────────────────────────────────────────────────────────────
+# PROFILS SYNTHÉTIQUES — DJIBOUTI
+# ─────────────────────────────────────────────────────────────
+
+# Segment → (part de la population, revenu médian FDJ/mois, dispersion
+# log-normale, situations possibles)
+SEGMENTS = {
+    "informel":          (0.35,  45_000, 0.55, ("informel",)),
+    "salarie_prive":     (0.30, 110_000, 0.45, ("salarie",)),
+    "fonction_publique": (0.15, 170_000, 0.35, ("salarie",)),
+    "independant":       (0.12, 150_000, 0.75, ("independant", "entrepreneur")),
+    "cadre":             (0.05, 450_000, 0.45, ("salarie",)),
+    "sans_revenu_fixe":  (0.03,  15_000, 0.60, ("sans_emploi", "etudiant")),
+}
+BANQUES = {"bcimr": 0.30, "cac": 0.25, "salaam": 0.15, "exim": 0.10, "saba": 0.10, None: 0.10}
+
+TYPES_PROJET = {"immobilier": (6_000_000, 0.5), "terrain": (2_500_000, 0.5),
+                "auto": (2_000_000, 0.4), "locatif": (9_000_000, 0.4)}
+
+
+def _arrondi(x: float, pas: int = 1_000) -> int:
+    return int(round(x / pas) * pas)
+
+
+def profil_djibouti(rng: random.Random, projet: bool = False) -> dict:
+    """Un profil au format formulaire (chaînes), comme /analyse le reçoit."""
+    segment = rng.choices(list(SEGMENTS), weights=[s[0] for s in SEGMENTS.values()])[0]
+    _, mediane, sigma, situations = SEGMENTS[segment]
+
+    revenu = max(5_000, _arrondi(rng.lognormvariate(math.log(mediane), sigma)))
+    autres = _arrondi(revenu * rng.lognormvariate(math.log(0.25), 0.6)) if rng.random() < 0.25 else 0
+    # Charges : ~76 % des revenus en moyenne, déficit pour ~8 % des ménages
+    charges = (revenu + autres) * rng.betavariate(8, 2.5) * (1.15 if rng.random() < 0.08 else 1.0)
+    epargne = 0 if rng.random() < 0.20 else _arrondi(revenu * rng.lognormvariate(math.log(1.5), 1.0))
+
+    profil = {
+        "revenu":           str(revenu),
+        "depenses":         str(max(1_000, _arrondi(charges))),
+        "epargne":          str(epargne),
+        "autres_revenus":   str(autres),
+        "objectif_epargne": str(_arrondi(revenu * 0.10)) if rng.random() < 0.40 else "",
+        "horizon":          str(rng.choice((6, 12, 24, 36))),
+        "banque":           rng.choices(list(BANQUES), weights=list(BANQUES.values()))[0] or "",
+        "situation":        rng.choice(situations),
+        "pays":             "dj" if rng.random() < 0.90 else rng.choice(("sn", "ma", "other")),
+        "objectif":         str(rng.randrange(50, 300, 10)),
+    }
+    if projet:
+        type_projet = rng.choice(list(TYPES_PROJET))
+        mediane_prix, sigma_prix = TYPES_PROJET[type_projet]
+        profil.update({
+            "projet_nom":    f"Projet {type_projet}",
+            "projet_prix":   str(_arrondi(rng.lognormvariate(math.log(mediane_prix), sigma_prix), 10_000)),
+            "projet_type":   type_projet,
+            "projet_duree":  str(rng.choice((5, 10, 15, 20))),
+            "projet_apport": str(rng.choice((0.10, 0.20, 0.30))),
+            "projet_loyer":  str(_arrondi(rng.uniform(40_000, 120_000))) if type_projet == "locatif" else "0",
+        })
+    return profil
+
+
+def profils_djibouti(n: int, seed: int = 2024, projet: bool = False) -> list:
+    rng = random.Random(seed)
+    return [profil_djibouti(rng, projet) for _ in range(n)]
+
+
+def _projet(formulaire: dict) -> dict:
+    """Projet personnel au format attendu par generer_coaching."""
+    return {
+        "nom":          formulaire["projet_nom"],
+        "prix":         float(formulaire["projet_prix"]),
+        "type":         formulaire["projet_type"],
+        "duree":        int(formulaire["projet_duree"]),
+        "apport":       float(formulaire["projet_apport"]),
+        "loyer_estime": float(formulaire["projet_loyer"]),
+    }
+
+
+def _users_synthetiques(n: int, seed: int = 7) -> list:
+    """n UserData tirés de profils_djibouti."""
+    return [UserData.from_form(f) for f in profils_djibouti(n, seed)]
+
+
+def _catalogue_synthetique(n: int, seed: int = 42) -> list:
+    """n annonces de crédit plausibles (prix, apport, taux, durée max)."""
+    rng = random.Random(seed)
+    return [
+        {
+            "prix":         rng.randrange(200_000, 40_000_000, 10_000),
+            "apport_min":   rng.choice([0.10, 0.15, 0.20, 0.25, 0.30, 0.35]),
+            "taux_interet": rng.choice([0.0, 0.06, 0.07, 0.075, 0.08, 0.10, 0.12]),
+            "duree_max":    rng.randint(1, 25),
+        }
+        for _ in range(n)
+    ]
+
+
+def _catalogue_coach_synthetique(n: int, seed: int = 42) -> dict:
+    """Catalogue complet au format coach.OPPORTUNITES (n crédits + l'épargne)."""
+    categories = ("immobilier", "terrain", "auto", "locatif")
+    catalogue = {c: [] for c in categories}
+    for i, annonce in enumerate(_catalogue_synthetique(n, seed)):
+        categorie = categories[i % len(categories)]
+        annonce.update({"id": f"{categorie}_{i}", "nom": f"Annonce {i}",
+                        "description": "", "type": categorie, "emoji": ""})
+        catalogue[categorie].append(annonce)
+    catalogue["epargne"] = OPPORTUNITES["epargne"]
+    return catalogue
+
+
+# ─────────────────────────────────────────────────────────────
+# DURÉE OPTIMALE
+# ─────────────────────────────────────────────────────────────
+
+def _duree_optimale_boucle(prix, apport_pct, taux, duree_max, user) -> int:
+    """Implémentation de référence (boucle d'origine de coach.py)."""
+    for duree in range(duree_max, 0, -1):
+        sim = calculer_mensualite(prix, apport_pct, taux, duree)
+        if sim["mensualite"] <= user.revenu_total * 0.33:
+            return duree
+    return duree_max
+
+
+def _duree_minimale_boucle(prix, apport_pct, taux, plafond, duree_max):
+    for duree in range(1, duree_max + 1):
+        if calculer_mensualite(prix, apport_pct, taux, duree)["mensualite"] <= plafond:
+            return duree
+    return None
+
+
+@benchmark
+def bench_duree_optimale():
+    """_duree_optimale et duree_minimale contre les boucles d'origine."""
+    catalogue = [item for cat, items in OPPORTUNITES.items()
+                 if cat != "epargne" for item in items]
+    jeux = {
+        "catalogue actuel": (catalogue, _users_synthetiques(200)),
+        "10k annonces":     (_catalogue_synthetique(10_000), _users_synthetiques(5)),
+    }
+
+    for nom, (annonces, users) in jeux.items():
+        couples = [(a, u) for a in annonces for u in users]
+
+        for a, u in couples:
+            args = (a["prix"], a["apport_min"], a["taux_interet"], a["duree_max"])
+            plafond = u.revenu_total * 0.33
+            assert coach._duree_optimale(*args, u) == _duree_optimale_boucle(*args, u)
+            assert (duree_minimale(*args[:3], plafond, args[3])
+                    == _duree_minimale_boucle(*args[:3], plafond, args[3]))
+
+        def boucle():
+            for a, u in couples:
+                _duree_optimale_boucle(a["prix"], a["apport_min"],
+                                       a["taux_interet"], a["duree_max"], u)
+
+        def directe():
+            for a, u in couples:
+                coach._duree_optimale(a["prix"], a["apport_min"],
+                                      a["taux_interet"], a["duree_max"], u)
+
+        def solveur():
+            for a, u in couples:
+                duree_minimale(a["prix"], a["apport_min"], a["taux_interet"],
+                               u.revenu_total * 0.33, a["duree_max"])
+
+        def solveur_boucle():
+            for a, u in couples:
+                _duree_minimale_boucle(a["prix"], a["apport_min"], a["taux_interet"],
+                                       u.revenu_total * 0.33, a["duree_max"])
+
+        t_boucle, t_directe = _chrono(boucle, 3), _chrono(directe, 3)
+        t_solveur, t_solveur_boucle = _chrono(solveur, 3), _chrono(solveur_boucle, 3)
+        n = len(couples)
+        print(f"  [{nom}] {n} évaluations, résultats identiques")
+        print(f"    _duree_optimale : boucle {t_boucle / n * 1e6:8.2f} µs"
+              f"  →  {t_directe / n * 1e6:6.2f} µs  (×{t_boucle / t_directe:.0f})")
+        print(f"    duree_minimale  : boucle {t_solveur_boucle / n * 1e6:8.2f} µs"
+              f"  →  {t_solveur / n * 1e6:6.2f} µs  (×{t_solveur_boucle / t_solveur:.1f})")
+        _enregistrer(f"duree_optimale:{nom}:_duree_optimale", t_directe / n)
+        _enregistrer(f"duree_optimale:{nom}:duree_minimale", t_solveur / n)
+
+
+# ─────────────────────────────────────────────────────────────
+# CACHE DES FACTEURS D'ANNUITÉ
+# ─────────────────────────────────────────────────────────────
+
+def _mensualite_sans_cache(prix, apport_pct, taux_annuel, duree_ans):
+    """calculer_mensualite d'origine, puissance recalculée à chaque appel."""
+    apport    = prix * apport_pct
+    capital   = prix - apport
+    t_mensuel = taux_annuel / 12
+    n         = duree_ans * 12
+    if t_mensuel == 0:
+        mensualite = capital / n
+    else:
+        mensualite = capital * t_mensuel / (1 - (1 + t_mensuel) ** -n)
+    cout_total = mensualite * n
+    return {
+        "apport":      round(apport),
+        "capital":     round(capital),
+        "mensualite":  round(mensualite),
+        "cout_total":  round(cout_total),
+        "cout_credit": round(cout_total - capital),
+        "n_mois":      n,
+        "duree_ans":   duree_ans,
+        "taux_annuel": round(taux_annuel * 100, 2),
+    }
+
+
+@benchmark
+def bench_facteurs_annuite():
+    """calculer_mensualite avec le cache de facteurs contre la formule brute."""
+    annonces = [item for cat, items in OPPORTUNITES.items()
+                if cat != "epargne" for item in items]
+    for a in annonces:
+        args = (a["prix"], a["apport_min"], a["taux_interet"], a["duree_max"])
+        assert calculer_mensualite(*args) == _mensualite_sans_cache(*args)
+
+    def brute():
+        for a in annonces:
+            _mensualite_sans_cache(a["prix"], a["apport_min"], a["taux_interet"], a["duree_max"])
+
+    def cache():
+        for a in annonces:
+            calculer_mensualite(a["prix"], a["apport_min"], a["taux_interet"], a["duree_max"])
+
+    n = len(annonces)
+    t_brute, t_cache = _chrono(brute, 2000), _chrono(cache, 2000)
+    print(f"  sans cache                : {t_brute / n * 1e6:6.2f} µs / annonce")
+    print(f"  calculer_mensualite       : {t_cache / n * 1e6:6.2f} µs / annonce")
+
+    users = _users_synthetiques(500)
+    t_coaching = _chrono(lambda: [generer_coaching(u, 500) for u in users], 3)
+    print(f"  generer_coaching          : {t_coaching / len(users) * 1e6:6.1f} µs / rapport")
+    _enregistrer("facteurs_annuite:calculer_mensualite", t_cache / n)
+    _enregistrer("facteurs_annuite:generer_coaching", t_coaching / len(users))
+    for nom, s in stats_facteurs().items():
+        total = s["hits"] + s["misses"]
+        print(f"  cache {nom:<15}: {s['taille']} facteurs, "
+              f"taux de hit {s['hits'] / total:.2%}" if total else f"  cache {nom}: vide")
+
+
+# ─────────────────────────────────────────────────────────────
+# INDEX D'ACCESSIBILITÉ
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_index_accessibilite():
+    """generer_coaching complet contre sélection par index (faisable/tendu)."""
+    origine = coach.OPPORTUNITES, coach._INDEX, coach.MAX_ANNONCES_PAR_STATUT
+    users = _users_synthetiques(20)
+    # Catalogue entier évalué (sans la limite par statut) pour la comparaison
+    coach.MAX_ANNONCES_PAR_STATUT = None
+    try:
+        for n in (13, 1_000, 10_000):
+            if n == 13:
+                coach.OPPORTUNITES, coach._INDEX = origine[:2]
+            else:
+                catalogue = _catalogue_coach_synthetique(n)
+                debut = time.perf_counter()
+                coach.OPPORTUNITES, coach._INDEX = catalogue, coach.IndexAccessibilite(catalogue)
+                print(f"  [{n} annonces] index construit en "
+                      f"{(time.perf_counter() - debut) * 1e3:.0f} ms")
+
+            statuts = ("faisable", "tendu")
+            for u in users:
+                complet = generer_coaching(u, 500)
+                filtre  = generer_coaching(u, 500, statuts=statuts)
+                assert filtre["opportunites"] == [
+                    o for o in complet["opportunites"]
+                    if o["faisabilite"]["statut"] in statuts
+                ]
+                assert filtre["nb_faisables"] == complet["nb_faisables"]
+
+            t_complet = _chrono(lambda: [generer_coaching(u, 500) for u in users], 2)
+            t_filtre  = _chrono(lambda: [generer_coaching(u, 500, statuts=statuts)
+                                         for u in users], 2)
+            t_comptes = _chrono(lambda: [coach._INDEX.comptes(u) for u in users], 2)
+            k = len(users)
+            print(f"  [{n} annonces] complet {t_complet / k * 1e3:8.2f} ms"
+                  f" | faisable+tendu {t_filtre / k * 1e3:7.2f} ms"
+                  f" | comptes seuls {t_comptes / k * 1e3:6.3f} ms")
+            _enregistrer(f"index_accessibilite:{n}:faisable+tendu", t_filtre / k)
+            _enregistrer(f"index_accessibilite:{n}:comptes", t_comptes / k)
+    finally:
+        coach.OPPORTUNITES, coach._INDEX, coach.MAX_ANNONCES_PAR_STATUT = origine
+
+
+@benchmark
+def bench_catalogue_sqlite():
+    """Catalogue SQLite de 13 à 100k annonces : démarrage, requête et mémoire plats."""
+    origine = coach._INDEX
+    users = _users_synthetiques(200)
+    dossier = tempfile.mkdtemp()
+    try:
+        for n in (13, 10_000, 100_000):
+            chemin = os.path.join(dossier, f"catalogue_{n}.db")
+            catalogue = coach.OPPORTUNITES if n == 13 else _catalogue_coach_synthetique(n)
+            debut = time.perf_counter()
+            construire(chemin, catalogue, coach._preparer_credit)
+            t_construction = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            coach._INDEX = CatalogueSQLite(chemin)
+            t_ouverture = time.perf_counter() - debut
+            debut = time.perf_counter()
+            generer_coaching(users[0], 500)          # colonnes de seuils chargées ici
+            t_premiere = time.perf_counter() - debut
+
+            t_coaching = _chrono(lambda: [generer_coaching(u, 500) for u in users], 3)
+            tracemalloc.start()
+            for u in users[:50]:
+                generer_coaching(u, 500)
+            pic = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  [{n:>7,} annonces] base {os.path.getsize(chemin) / 2**20:6.1f} Mo "
+                  f"en {t_construction:5.2f} s | ouverture {t_ouverture * 1e3:5.2f} ms"
+                  f" | 1re requête {t_premiere * 1e3:6.1f} ms"
+                  f" | coaching {t_coaching / len(users) * 1e3:5.2f} ms"
+                  f" | pic mémoire {pic / 1024:5.0f} Ko")
+            _enregistrer(f"catalogue_sqlite:{n}:generer_coaching", t_coaching / len(users))
+    finally:
+        coach._INDEX = origine
+
+
+# ─────────────────────────────────────────────────────────────
+# USERDATA / USERBATCH
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_userdata():
+    """Construction et accès aux métriques : UserData contre UserBatch."""
+    n = 100_000
+    users = _users_synthetiques(n)
+
+    def acces():
+        for u in users:
+            (u.revenu_total, u.solde, u.taux_epargne, u.ratio_depenses,
+             u.mois_securite, u.capacite_emprunt)
+
+    valeurs = [(u.revenu, u.depenses, u.epargne) for u in users]
+    t_construction = _chrono(lambda: [UserData(*v) for v in valeurs], 2)
+    t_acces = _chrono(acces, 3)
+    t_lot = _chrono(lambda: UserBatch.from_users(users), 2)
+
+    colonnes = {c: np.array([getattr(u, c) for u in users])
+                for c in ("revenu", "depenses", "epargne")}
+    t_colonnes = _chrono(lambda: UserBatch(**colonnes), 5)
+    lot = UserBatch(**colonnes)
+    t_score_lot = _chrono(lambda: analyse_financiere_batch(lot), 5)
+    t_score = _chrono(lambda: [analyse_financiere(u) for u in users[:10_000]], 2) * n / 10_000
+
+    print(f"  UserData   : {t_construction / n * 1e6:.2f} µs / construction, "
+          f"{t_acces / n * 1e9:.0f} ns pour les 6 métriques")
+    print(f"  UserBatch  : {t_colonnes / n * 1e9:.0f} ns / profil depuis des colonnes, "
+          f"{t_lot / n * 1e6:.2f} µs / profil depuis des UserData")
+    print(f"  scoring    : {t_score / n * 1e6:.2f} µs / profil (scalaire) → "
+          f"{t_score_lot / n * 1e9:.0f} ns / profil (lot, ×{t_score / t_score_lot:.0f})")
+    _enregistrer("userdata:UserData", t_construction / n)
+    _enregistrer("userdata:UserBatch", t_colonnes / n)
+    _enregistrer("userdata:analyse_financiere_batch", t_score_lot / n)
+
+
+# ─────────────────────────────────────────────────────────────
+# GPS FINANCIER
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_forecast():
+    """Projection 36 mois : un profil, puis un portefeuille en un appel."""
+    users = _users_synthetiques(10_000)
+    t_unitaire = _chrono(lambda: [projeter(u) for u in users[:500]], 3) / 500
+    lot = UserBatch.from_users(users)
+    t_lot = _chrono(lambda: projeter_lot(lot), 3)
+    print(f"  projeter (1 profil, 2 scénarios) : {t_unitaire * 1e6:7.1f} µs")
+    print(f"  projeter_lot ({len(lot)} profils)     : {t_lot * 1e3:7.1f} ms "
+          f"({t_lot / len(lot) * 1e6:.2f} µs / profil)")
+    _enregistrer("forecast:projeter", t_unitaire)
+    _enregistrer("forecast:projeter_lot", t_lot / len(lot))
+
+
+# ─────────────────────────────────────────────────────────────
+# STRESS-TEST MONTE CARLO
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_stress():
+    """Stress-test : 10k chemins pour un profil, puis un petit portefeuille."""
+    user = _users_synthetiques(1)[0]
+    assert stresser(user, seed=1) == stresser(user, seed=1)
+    t = _chrono(lambda: stresser(user, seed=1), 5)
+    print(f"  stresser (10 000 chemins × 37 mois) : {t * 1e3:6.1f} ms")
+
+    lot = UserBatch.from_users(_users_synthetiques(200))
+    t_lot = _chrono(lambda: stresser_lot(lot, n_chemins=2_000, seed=1), 1)
+    print(f"  stresser_lot (200 profils × 2 000)  : {t_lot * 1e3:6.1f} ms "
+          f"({t_lot / len(lot) * 1e3:.2f} ms / profil)")
+    _enregistrer("stress:stresser", t)
+    _enregistrer("stress:stresser_lot", t_lot / len(lot))
+
+
+# ─────────────────────────────────────────────────────────────
+# /analyse DE BOUT EN BOUT
+# ─────────────────────────────────────────────────────────────
+
+def _pipeline_separe(user):
+    """Pipeline d'origine : chaque moteur relit le profil et le score."""
+    resultat = analyse_financiere(user)
+    reco     = recommander(user, resultat["score"])
+    coaching = generer_coaching(user, resultat["score"])
+    return resultat, reco, coaching
+
+
+def _pipeline_instantane(user):
+    profil = instantane(user)
+    return analyse_financiere(profil), recommander(profil), generer_coaching(profil)
+
+
+@benchmark
+def bench_analyse():
+    """/analyse : pipeline séparé contre FinancialSnapshot (cache désactivé)."""
+    users = _users_synthetiques(500)
+    for u in users[:100]:
+        assert _pipeline_separe(u)[0] == _pipeline_instantane(u)[0]
+        assert _pipeline_separe(u)[2] == _pipeline_instantane(u)[2]
+
+    t_separe = _chrono(lambda: [_pipeline_separe(u) for u in users], 5) / len(users)
+    t_inst   = _chrono(lambda: [_pipeline_instantane(u) for u in users], 5) / len(users)
+    print(f"  pipeline séparé     : {t_separe * 1e6:7.1f} µs / profil")
+    print(f"  pipeline instantané : {t_inst * 1e6:7.1f} µs / profil")
+
+    # Route complète (parsing, moteurs, rendu Jinja), sans le cache d'analyses
+    formulaires = [{"revenu": str(int(u.revenu)), "depenses": str(int(u.depenses)),
+                    "epargne": str(int(u.epargne))} for u in users[:100]]
+    with _application() as application:
+        client = application.app.test_client()
+        route = lambda: [client.post("/analyse", data=f) for f in formulaires]
+        complet = application._analyser_complet
+        try:
+            application._analyser_complet = _pipeline_separe
+            t_route_separe = _chrono(route, 3) / len(formulaires)
+            application._analyser_complet = _pipeline_instantane
+            t_route_inst = _chrono(route, 3) / len(formulaires)
+        finally:
+            application._analyser_complet = complet
+    print(f"  POST /analyse       : {t_route_separe * 1e3:6.2f} ms → "
+          f"{t_route_inst * 1e3:6.2f} ms / requête")
+    _enregistrer("analyse:pipeline_instantane", t_inst)
+    _enregistrer("analyse:POST /analyse", t_route_inst)
+
+
+# ─────────────────────────────────────────────────────────────
+# BARÈMES COMPILÉS
+# ─────────────────────────────────────────────────────────────
+
+def _taux_epargne_if(taux):
+    """If-chain d'origine de ai_engine._score_taux_epargne (référence)."""
+    if taux >= 0.30: return 200
+    if taux >= 0.20: return 160
+    if taux >= 0.10: return 110
+    if taux >= 0.05: return  60
+    if taux >  0.00: return  20
+    return 0
+
+
+def _ratio_depenses_if(ratio):
+    """If-chain d'origine de ai_engine._score_ratio_depenses (référence)."""
+    if ratio <= 0.40: return 200
+    if ratio <= 0.55: return 150
+    if ratio <= 0.70: return 100
+    if ratio <= 0.85: return  50
+    return 0
+
+
+@benchmark
+def bench_bareme():
+    """Barème compilé contre les if-chains d'origine (scalaire et lot)."""
+    bareme = BAREMES.defaut
+    users = _users_synthetiques(100_000)
+    taux   = [u.taux_epargne for u in users]
+    ratios = [u.ratio_depenses for u in users]
+    assert [bareme.taux_epargne.evaluer(x) for x in taux] == [_taux_epargne_if(x) for x in taux]
+    assert [bareme.ratio_depenses.evaluer(x) for x in ratios] == [_ratio_depenses_if(x) for x in ratios]
+
+    for nom, table, reference, valeurs in (
+        ("taux_epargne",   bareme.taux_epargne,   _taux_epargne_if,   taux),
+        ("ratio_depenses", bareme.ratio_depenses, _ratio_depenses_if, ratios),
+    ):
+        evaluer = table.evaluer
+        t_if    = _chrono(lambda: [reference(x) for x in valeurs], 5) / len(valeurs)
+        t_table = _chrono(lambda: [evaluer(x) for x in valeurs], 5) / len(valeurs)
+        tableau = np.array(valeurs)
+        t_lot   = _chrono(lambda: table.lot(tableau), 5) / len(valeurs)
+        print(f"  {nom:<15}: if-chain {t_if * 1e9:5.0f} ns, compilé {t_table * 1e9:5.0f} ns, "
+              f"lot {t_lot * 1e9:4.1f} ns / valeur")
+        _enregistrer(f"bareme:{nom}", t_table)
+        _enregistrer(f"bareme:{nom}:lot", t_lot)
+
+    t_inst = _chrono(lambda: [instantane(u) for u in users], 3) / len(users)
+    print(f"  FinancialSnapshot (5 composantes + tranche) : {t_inst * 1e6:.2f} µs")
+    _enregistrer("bareme:instantane", t_inst)
+
+
+# ─────────────────────────────────────────────────────────────
+# PAGES STATIQUES PRÉCOMPILÉES
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_pages_statiques():
+    """/, /banks, /about : rendu Jinja à chaque visite contre pages précompilées."""
+    import app as application
+
+    if not application.ressources.pages:
+        application.precompiler_pages()
+    client = application.app.test_client()
+    mobile = {"Accept-Encoding": "gzip, deflate, br"}
+
+    pages = application.ressources.pages
+    for chemin in application.PAGES_STATIQUES:
+        requetes = lambda: [client.get(chemin, headers=mobile) for _ in range(200)]
+        # Sans page précompilée, la route retombe sur render_template
+        application.ressources.pages = {}
+        try:
+            t_jinja = _chrono(requetes, 3) / 200
+            octets_jinja = len(client.get(chemin, headers=mobile).data)
+        finally:
+            application.ressources.pages = pages
+        t_page  = _chrono(requetes, 3) / 200
+        reponse = client.get(chemin, headers=mobile)
+        revisite = client.get(chemin, headers={**mobile, "If-None-Match": reponse.headers["ETag"]})
+        print(f"  {chemin:<7}: Jinja {t_jinja * 1e3:5.2f} ms / {octets_jinja:6,} o → "
+              f"précompilée {t_page * 1e3:5.2f} ms / {len(reponse.data):6,} o "
+              f"{reponse.headers.get('Content-Encoding', '')}, revisite {revisite.status_code}")
+        _enregistrer(f"pages_statiques:GET {chemin}", t_page)
+    stats = application.ressources.stats()
+    print(f"  {stats['assets']} bundles à empreinte, cache 1 an : "
+          f"{stats['octets']['identity']:,} o en clair, {stats['octets']['gzip']:,} o gzip, "
+          f"{stats['octets']['br']:,} o brotli (pages + bundles)")
+
+
+# ─────────────────────────────────────────────────────────────
+# PAGES DE RÉSULTATS — FLUX ET COMPRESSION
+# ─────────────────────────────────────────────────────────────
+
+def _mesurer_requete(client, route, formulaire, encodage):
+    """(premier octet, fin, octets transférés) d'une requête POST non bufferisée."""
+    debut = time.perf_counter()
+    reponse = client.post(route, data=formulaire, buffered=False,
+                          headers={"Accept-Encoding": encodage})
+    corps = iter(reponse.response)
+    premier = next(corps, b"")
+    t_premier = time.perf_counter() - debut
+    octets = len(premier) + sum(len(m) for m in corps)
+    t_fin = time.perf_counter() - debut
+    reponse.close()
+    return t_premier, t_fin, octets
+
+
+@benchmark
+def bench_flux_compression():
+    """Routes POST : premier octet, durée totale et octets, rendu complet contre flux."""
+    formulaire = {"revenu": "150000", "depenses": "60000", "epargne": "400000",
+                  "banque": "bcimr", "projet_prix": "8000000"}
+    routes = ("/analyse", "/forecast", "/opportunities", "/coach")
+    with _application(STREAMING_RESULTATS=True, COMPRESSION_ACTIVE=True) as application:
+        client = application.app.test_client()
+        config = application.app.config
+        for route in routes:
+            print(f"  {route}")
+            for nom, flux, compression, encodage in (
+                ("complet, en clair", False, False, "identity"),
+                ("flux, en clair   ", True,  False, "identity"),
+                ("flux, gzip       ", True,  True,  "gzip"),
+                ("flux, brotli     ", True,  True,  "br, gzip"),
+            ):
+                config["STREAMING_RESULTATS"], config["COMPRESSION_ACTIVE"] = flux, compression
+                mesures = [_mesurer_requete(client, route, formulaire, encodage) for _ in range(30)]
+                t_premier = min(m[0] for m in mesures)
+                t_fin     = min(m[1] for m in mesures)
+                print(f"    {nom} : 1er octet {t_premier * 1e3:5.2f} ms, "
+                      f"total {t_fin * 1e3:5.2f} ms, {mesures[0][2]:7,} o")
+                _enregistrer(f"flux_compression:{route}:{nom.strip()}", t_fin, critique=False)
+
+
+# ─────────────────────────────────────────────────────────────
+# PARCOURS — RÉSULTATS DE SESSION
+# ─────────────────────────────────────────────────────────────
+
+_JETON = re.compile(r'name="jeton" value="([^"]+)"')
+
+
+def _sans_jeton(page: str) -> str:
+    return re.sub(r'<input type="hidden" name="jeton" value="[^"]+">', "", page)
+
+
+@benchmark
+def bench_parcours_session():
+    """Étapes /forecast → /coach (+ projet) après /opportunities : formulaire renvoyé contre jeton."""
+    from werkzeug.datastructures import MultiDict
+
+    formulaires = [{"revenu": str(int(u.revenu)), "depenses": str(int(u.depenses)),
+                    "epargne": str(int(u.epargne)), "banque": u.banque or "", "pays": "DJ"}
+                   for u in _users_synthetiques(50)]
+    projet = {"projet_prix": "8000000", "projet_type": "immobilier"}
+    etapes = (("/forecast", {}), ("/coach", {}), ("/coach", projet))
+
+    with _application(STREAMING_RESULTATS=False, COMPRESSION_ACTIVE=False) as application:
+        client = application.app.test_client()
+        # Jeton rendu par la première étape du parcours
+        suites = [{**f, "jeton": _JETON.search(client.post("/opportunities", data=f)
+                                               .get_data(as_text=True)).group(1)}
+                  for f in formulaires]
+        pages = lambda lot: [client.post(route, data={**f, **extra}).get_data(as_text=True)
+                             for f in lot for route, extra in etapes]
+        assert list(map(_sans_jeton, pages(suites))) == list(map(_sans_jeton, pages(formulaires)))
+        t_formulaire = _chrono(lambda: pages(formulaires), 3) / len(formulaires)
+        t_jeton      = _chrono(lambda: pages(suites), 3) / len(formulaires)
+
+        # Calculs seuls (hors rendu Jinja), pour l'étape /forecast
+        forecast = lambda lot: [application._parcours(MultiDict(f), application._analyser_forecast,
+                                                      ("reco", "projection")) for f in lot]
+        with application.app.test_request_context("/forecast", method="POST"):
+            c_formulaire = _chrono(lambda: forecast(formulaires), 3) / len(formulaires)
+            c_jeton      = _chrono(lambda: forecast(suites), 3) / len(formulaires)
+    stats = application.sessions_resultats.stats()
+    print(f"  3 pages après /opportunities : {t_formulaire * 1e3:6.2f} ms → {t_jeton * 1e3:6.2f} ms "
+          f"(pages identiques)")
+    print(f"  /forecast hors rendu         : {c_formulaire * 1e6:6.0f} µs → {c_jeton * 1e6:6.0f} µs")
+    _enregistrer("parcours_session:3 pages avec jeton", t_jeton)
+    _enregistrer("parcours_session:/forecast avec jeton", c_jeton)
+    print(f"  {stats['entrees']} sessions, {stats['octets'] / 1024:,.0f} Kio, taux de reprise "
+          f"{stats['taux_hit']:.0%}")
+
+
+# ─────────────────────────────────────────────────────────────
+# JOURNAL DES ANALYSES — ÉCRITURE DIFFÉRÉE
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_journal_analyses(n: int = 20_000):
+    """Coût côté requête de enregistrer() et débit d'écriture, ligne à ligne contre par lots."""
+    import sqlite3
+    from persistence import SCHEMA, _INSERTION, JournalAnalyses, ligne_analyse
+
+    users = _users_synthetiques(1_000)
+    analyses = []
+    for u in users:
+        profil = instantane(u)
+        analyses.append((u, analyse_financiere(profil), recommander(profil)))
+
+    with tempfile.TemporaryDirectory() as dossier:
+        # Référence : une transaction (et un fsync) par analyse, dans la requête
+        con = sqlite3.connect(os.path.join(dossier, "ligne.db"))
+        con.executescript(SCHEMA)
+        debut = time.perf_counter()
+        for u, resultat, reco in analyses:
+            with con:
+                con.execute(_INSERTION, ligne_analyse(time.time(), "bench", u, resultat, reco))
+        t_ligne = (time.perf_counter() - debut) / len(analyses)
+        con.close()
+
+        journal = JournalAnalyses(os.path.join(dossier, "lots.db"), taille_file=n, intervalle=0.05)
+        debut = time.perf_counter()
+        for i in range(n):
+            u, resultat, reco = analyses[i % len(analyses)]
+            journal.enregistrer("bench", u, resultat, reco)
+        t_requete = (time.perf_counter() - debut) / n
+        assert journal.vider(60)
+        t_total = time.perf_counter() - debut
+        journal.arreter()
+        stats = journal.stats()
+        con = sqlite3.connect(os.path.join(dossier, "lots.db"))
+        assert con.execute("SELECT count(*) FROM analyses").fetchone()[0] == n == stats["ecrites"]
+        con.close()
+
+    print(f"  ligne à ligne dans la requête : {t_ligne * 1e6:7.1f} µs / analyse")
+    print(f"  file + lots de 500            : {t_requete * 1e6:7.1f} µs / analyse côté requête, "
+          f"{n / t_total:,.0f} analyses/s écrites ({stats['lots']} lots)")
+    _enregistrer("journal_analyses:enregistrer", t_requete)
+
+
+# ─────────────────────────────────────────────────────────────
+# CENTILES ENTRE PAIRS
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_centiles_pairs():
+    """Rang centile par groupe de pairs : esquisse exacte contre tri de la population."""
+    from bisect import bisect_left, bisect_right
+    from peer_percentiles import CentilesPairs
+
+    rng = np.random.default_rng(5)
+    pays_possibles = np.array(["dj", "dj", "dj", "sn", "ma"])
+    situations     = np.array(["salarie", "entrepreneur", "etudiant", ""])
+    banques        = np.array(["bcimr", "cac", "salaam", "exim", ""])
+    requetes = _users_synthetiques(1_000)
+    for n in (10_000, 1_000_000):
+        scores = rng.integers(0, 1001, n)
+        pays, situation, banque = (rng.choice(v, n) for v in (pays_possibles, situations, banques))
+        debut = time.perf_counter()
+        centiles = CentilesPairs()
+        for i in range(0, n, 100_000):
+            lot = slice(i, i + 100_000)
+            centiles.ajouter_lot(pays[lot], situation[lot], banque[lot], scores[lot])
+        t_construction = time.perf_counter() - debut
+
+        # Référence : population triée, bisect (mémoire proportionnelle à n)
+        tries = sorted(scores.tolist())
+        for s in (0, 250, 500, 999, 1000):
+            attendu = 100 * (bisect_left(tries, s) + 0.5 * (bisect_right(tries, s) - bisect_left(tries, s))) / n
+            assert abs(centiles.groupes[("tous", "")].centile(s) - attendu) < 1e-9
+
+        t_requete = _chrono(lambda: [centiles.positionner(u, 500) for u in requetes]) / len(requetes)
+        stats = centiles.stats()
+        print(f"  {n:>9,} profils : construction {t_construction:5.2f} s, positionner "
+              f"{t_requete * 1e6:5.1f} µs, {stats['groupes']} groupes, {stats['octets'] / 1024:,.0f} Kio")
+        _enregistrer(f"centiles_pairs:{n}:positionner", t_requete)
+
+
+# ─────────────────────────────────────────────────────────────
+# PROFILS VOISINS
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_profils_voisins():
+    """K plus proches à 1 M profils : KDTree en mmap contre force brute numpy."""
+    from neighbours import ProfilsVoisins, ajouter, caracteristiques, construire as construire_index
+
+    rng = np.random.default_rng(9)
+    n = 1_000_000
+
+    def points(m):
+        return {
+            "brut":          caracteristiques(rng.uniform(-0.5, 0.6, m), rng.uniform(0.2, 1.5, m),
+                                              rng.exponential(4, m), rng.normal(0, 2e5, m)),
+            "score_avant":   rng.integers(0, 1001, m).astype(np.int16),
+            "score_apres":   rng.integers(0, 1001, m).astype(np.int16),
+            "epargne_avant": rng.uniform(0, 2e6, m),
+            "epargne_apres": rng.uniform(0, 2e6, m),
+            "mois":          rng.uniform(1, 24, m).astype(np.float32),
+        }
+
+    base = points(n)
+    requetes = _users_synthetiques(200)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "voisins.joblib")
+        debut = time.perf_counter()
+        construire_index(base, chemin)
+        t_construction = time.perf_counter() - debut
+        debut = time.perf_counter()
+        index = ProfilsVoisins(chemin)
+        t_ouverture = time.perf_counter() - debut
+
+        # Référence : distance à tous les points centrés-réduits
+        centre, echelle = base["brut"].mean(axis=0), base["brut"].std(axis=0)
+        reduits = (base["brut"] - centre) / echelle
+
+        def force_brute(u, k=5):
+            x = (caracteristiques(u.taux_epargne, u.ratio_depenses, u.mois_securite, u.solde)
+                 - centre) / echelle
+            d2 = ((reduits - x) ** 2).sum(axis=1)
+            return np.sort(np.sqrt(d2[np.argpartition(d2, k)[:k]]))
+
+        for u in requetes[:20]:
+            attendu = force_brute(u)
+            obtenu = [v["distance"] for v in index.voisins(u)]
+            assert np.allclose(obtenu, np.round(attendu, 3), atol=1e-3)
+
+        t_index = _chrono(lambda: [index.voisins(u) for u in requetes]) / len(requetes)
+        t_brute = _chrono(lambda: [force_brute(u) for u in requetes[:20]], 1) / 20
+
+        ajouter(points(10_000), chemin)
+        index.recharger_si_modifie(forcer=True)
+        t_complement = _chrono(lambda: [index.voisins(u) for u in requetes]) / len(requetes)
+
+    print(f"  construction {n:,} profils : {t_construction:5.1f} s, ouverture (mmap) "
+          f"{t_ouverture * 1e3:5.1f} ms")
+    print(f"  force brute       : {t_brute * 1e6:9.1f} µs / requête")
+    print(f"  KDTree            : {t_index * 1e6:9.1f} µs / requête")
+    print(f"  + 10 000 ajoutés  : {t_complement * 1e6:9.1f} µs / requête")
+    _enregistrer("profils_voisins:voisins", t_index)
+    _enregistrer("profils_voisins:voisins+complement", t_complement)
+
+
+# ─────────────────────────────────────────────────────────────
+# ANALYSE DE PORTEFEUILLE
+# ─────────────────────────────────────────────────────────────
+
+@benchmark
+def bench_analyse_portefeuille():
+    """Tableaux de bord d'un portefeuille : agrégats en flux contre pipeline ligne à ligne."""
+    from portfolio_analytics import AnalysePortefeuille
+
+    # Référence : le pipeline de l'application, profil par profil
+    index = coach.IndexAccessibilite(OPPORTUNITES)
+    ids = [item["id"] for items in OPPORTUNITES.values() for item in items]
+    users = _users_synthetiques(5_000)
+
+    def ligne_a_ligne():
+        for u in users:
+            recommander(u, analyse_financiere(u)["score"])
+            for i in ids:
+                index.statut(i, u)
+
+    t_ligne = _chrono(ligne_a_ligne, 1) / len(users)
+
+    rng = np.random.default_rng(11)
+    n, taille_lot = 1_000_000, 50_000
+    banques = np.array(["bcimr", "cac", "salaam", "exim", None], dtype=object)
+    pays    = np.array(["dj", "dj", "sn", "ma"], dtype=object)
+    tracemalloc.start()
+    debut = time.perf_counter()
+    analyse = AnalysePortefeuille()
+    for _ in range(n // taille_lot):
+        analyse.ajouter_lot(UserBatch(
+            rng.integers(30_000, 1_500_000, taille_lot), rng.integers(20_000, 900_000, taille_lot),
+            rng.integers(0, 5_000_000, taille_lot),
+            banque=rng.choice(banques, taille_lot), pays=rng.choice(pays, taille_lot)))
+    t_flux = (time.perf_counter() - debut) / n
+    pic = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert analyse.clients == n
+
+    t_rapport = _chrono(analyse.rapport)
+    print(f"  ligne à ligne    : {t_ligne * 1e6:6.1f} µs / profil")
+    print(f"  agrégats en flux : {t_flux * 1e6:6.1f} µs / profil ({n:,} profils, lots de {taille_lot:,}, "
+          f"{len(analyse.groupes)} groupes, pic mémoire {pic / 2**20:.0f} Mio)")
+    print(f"  rapport          : {t_rapport * 1e3:6.1f} ms")
+    _enregistrer("analyse_portefeuille:ajouter_lot", t_flux)
+    _enregistrer("analyse_portefeuille:rapport", t_rapport)
+
+
+# ─────────────────────────────────────────────────────────────
+# RECOMMANDATIONS — ENDURANCE MÉMOIRE
+# ─────────────────────────────────────────────────────────────
+
+@benchmark(endurance=True)
+def bench_soak_recommandation():
+    """1M appels à recommander : la mémoire doit rester plate (tracemalloc)."""
+    n_requetes = REGLAGES["soak"]
+    profils = [instantane(u) for u in _users_synthetiques(1_000, seed=11)]
+    tailles = {niveau: len(p) for niveau, p in PRODUITS.items()}
+
+    # Échauffement : caches internes de Python stabilisés avant la mesure
+    for p in profils * 10:
+        recommander(p)
+
+    tracemalloc.start()
+    avant = tracemalloc.take_snapshot()
+    debut = time.perf_counter()
+    for i in range(n_requetes):
+        recommander(profils[i % len(profils)])
+    duree = time.perf_counter() - debut
+    apres = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    croissance = sum(s.size_diff for s in apres.compare_to(avant, "filename"))
+    assert {niveau: len(p) for niveau, p in PRODUITS.items()} == tailles
+    assert croissance < 64 * 1024, f"fuite mémoire : +{croissance} octets"
+    print(f"  {n_requetes:,} requêtes en {duree:.1f} s (sous tracemalloc), "
+          f"mémoire : {croissance:+,} octets, catalogue PRODUITS inchangé")
+    _enregistrer("soak_recommandation:recommander", duree / n_requetes, critique=False)
+
+
+# ─────────────────────────────────────────────────────────────
+# MOTEURS ET ROUTES — RÉFÉRENCE PAR COMMIT
+# ─────────────────────────────────────────────────────────────
+
+def _mesurer_cas(groupe: str, cas: list):
+    """
+    cas : (nom, operation(i), n, critique). Temps par opération, le
+    meilleur de REGLAGES["tours"] tours de n opérations.
+    """
+    for nom, operation, n, critique in cas:
+        premiere = operation(0)           # échauffement (imports, caches Jinja)
+        statut = getattr(premiere, "status_code", 200)
+        if statut >= 400:
+            raise RuntimeError(f"{nom} : HTTP {statut}, mesure d'une page d'erreur refusée")
+        t = _chrono(lambda: [operation(i) for i in range(n)], REGLAGES["tours"]) / n
+        _enregistrer(f"{groupe}:{nom}", t, critique)
+        print(f"  {nom:<36} {t * 1e6:>11,.1f} µs")
+
+
+@benchmark
+def bench_moteurs():
+    """analyse_financiere, recommander, generer_coaching (± projet), crédits."""
+    n = REGLAGES["profils"]
+    formulaires = profils_djibouti(n, projet=True)
+    users   = [UserData.from_form(f) for f in formulaires]
+    scores  = [analyse_financiere(u)["score"] for u in users]
+    projets = [_projet(f) for f in formulaires]
+    credits = [item for cat, items in OPPORTUNITES.items() if cat != "epargne" for item in items]
+
+    def duree(i):
+        for c in credits:
+            coach._duree_optimale(c["prix"], c["apport_min"], c["taux_interet"], c["duree_max"], users[i])
+
+    def mensualites(i):
+        p = projets[i]
+        for duree_ans in (5, 10, 15, 20, 25):
+            calculer_mensualite(p["prix"], p["apport"], 0.07, duree_ans)
+
+    def pipeline(i):
+        profil = instantane(users[i])
+        return analyse_financiere(profil), recommander(profil), generer_coaching(profil)
+
+    _mesurer_cas("moteurs", [
+        ("analyse_financiere",      lambda i: analyse_financiere(users[i]), n, True),
+        ("recommander",             lambda i: recommander(users[i], scores[i]), n, True),
+        ("generer_coaching",        lambda i: generer_coaching(users[i], scores[i]), n, True),
+        ("generer_coaching_projet", lambda i: generer_coaching(users[i], scores[i], projets[i]), n, True),
+        ("pipeline_instantane",     pipeline, n, True),
+        ("calculer_mensualite_x5",  mensualites, n, True),
+        (f"duree_optimale_x{len(credits)}", duree, n, True),
+    ])
+
+
+@benchmark
+def bench_routes():
+    """Chaque route de app.py via le client de test Flask (cache d'analyses désactivé)."""
+    n = REGLAGES["profils"]
+    formulaires = profils_djibouti(n, seed=2025, projet=True)
+    json_profils = [{k: v for k, v in f.items() if not k.startswith("projet_")} for f in formulaires]
+    lot = {"profils": json_profils[:50]}
+
+    def lire(reponse):
+        # Les pages en flux ne sont rendues qu'à la lecture du corps
+        reponse.get_data()
+        reponse.close()
+        return reponse
+
+    def get(chemin):
+        return lambda i: lire(client.get(chemin))
+
+    def post(chemin, **extra):
+        return lambda i: lire(client.post(chemin, data={**formulaires[i], **extra}))
+
+    def api(etape):
+        return lambda i: lire(client.post(f"/api/v1/{etape}", json=json_profils[i]))
+
+    # Le cache d'analyses masquerait le coût réel des moteurs
+    with _application() as application:
+        client = application.app.test_client()
+        asset  = next(iter(application.ressources.assets), None)
+        cas = [
+            ("GET /",                  get("/"), n, True),
+            ("GET /banks",             get("/banks"), n, True),
+            ("GET /about",             get("/about"), n, False),
+            ("GET /form",              get("/form?banque=bcimr"), n, False),
+            ("GET /dashboard",         get("/dashboard?banque=bcimr"), n, True),
+            ("POST /analyse",          post("/analyse"), n, True),
+            ("POST /result",           post("/result"), n, False),
+            ("POST /forecast",         post("/forecast"), n, True),
+            ("POST /forecast/json",    post("/forecast/json"), n, True),
+            ("POST /forecast/stress",  post("/forecast/stress", n_chemins="1000", seed="1"), max(5, n // 10), True),
+            ("POST /opportunities",    post("/opportunities"), n, True),
+            ("POST /coach",            post("/coach"), n, True),
+            ("POST /api/v1/analyse",   api("analyse"), n, True),
+            ("POST /api/v1/recommend", api("recommend"), n, True),
+            ("POST /api/v1/coach",     api("coach"), n, False),
+            ("POST /api/v1/forecast",  api("forecast"), n, False),
+            ("POST /api/v1/voisins",   api("voisins"), n, False),
+            ("POST /api/v1/batch/analyse (50)",
+             lambda i: lire(client.post("/api/v1/batch/analyse", json=lot)), max(3, n // 20), True),
+        ]
+        if asset:
+            cas.append(("GET /assets/<bundle>", get(f"/assets/{asset}"), n, False))
+        # /situation n'a pas de template dans le dépôt : route non mesurée
+
+        _mesurer_cas("routes", cas)
+
+
+# ─────────────────────────────────────────────────────────────
+# MESURES JSON ET GARDE-FOU DE RÉGRESSION
+# ─────────────────────────────────────────────────────────────
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def comparer(reference: dict, actuel: dict, seuil: float = SEUIL_REGRESSION) -> list:
+    """
+    Compare les chemins critiques présents dans les deux mesures.
+    Retourne la liste des régressions (nom, avant, après, %).
+    """
+    regressions = []
+    for nom, r in actuel["resultats"].items():
+        avant = reference["resultats"].get(nom)
+        if not avant or not r["critique"]:
+            continue
+        ecart = (r["us"] - avant["us"]) / avant["us"] * 100
+        marque = "RÉGRESSION" if ecart > seuil else ""
+        print(f"  {nom:<56} {avant['us']:>11,.1f} → {r['us']:>11,.1f} µs "
+              f"({ecart:+6.1f} %) {marque}", file=sys.stderr)
+        if ecart > seuil:
+            regressions.append((nom, avant["us"], r["us"], round(ecart, 1)))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques.")
+    parser.add_argument("noms", nargs="*", help="benchmarks à lancer (défaut : tous)")
+    parser.add_argument("-o", "--sortie", help="fichier JSON des mesures enregistrées")
+    parser.add_argument("--comparer", metavar="REFERENCE",
+                        help="JSON d'une mesure précédente : échoue en cas de régression")
+    parser.add_argument("--seuil", type=float, default=SEUIL_REGRESSION,
+                        help=f"ralentissement toléré en %% (défaut : {SEUIL_REGRESSION})")
+    parser.add_argument("--rapide", action="store_true",
+                        help="moteurs et routes : 20 profils × 3 tours ; soak : 100 000 appels")
+    parser.add_argument("--soak", action="store_true",
+                        help=f"inclut les benchmarks d'endurance ({', '.join(sorted(ENDURANCE))})")
+    args = parser.parse_args(argv)
+
+    noms = args.noms or [n for n in BENCHMARKS if args.soak or n not in ENDURANCE]
+    inconnus = [n for n in noms if n not in BENCHMARKS]
+    if inconnus:
+        print(f"Benchmarks inconnus : {', '.join(inconnus)} "
+              f"(disponibles : {', '.join(BENCHMARKS)})", file=sys.stderr)
+        return 2
+    if args.rapide:
+        REGLAGES.update(profils=20, tours=3, soak=100_000)
+    for nom in noms:
+        print(f"── {nom} ──")
+        BENCHMARKS[nom]()
+
+    mesure = {
+        "meta": {
+            "commit":     _commit(),
+            "date":       datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python":     platform.python_version(),
+            "machine":    platform.platform(),
+            "benchmarks": noms,
+        },
+        "resultats": MESURES,
+    }
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(mesure, f, indent=2, ensure_ascii=False)
+
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            reference = json.load(f)
+        print(f"── comparaison avec {reference['meta'].get('commit') or args.comparer} "
+              f"(seuil {args.seuil} %) ──", file=sys.stderr)
+        regressions = comparer(reference, mesure, args.seuil)
+        if regressions:
+            print(f"{len(regressions)} chemin(s) critique(s) en régression", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Scoring en masse — AI Inclusive Finance
+═══════════════════════════════════════
+
+Point d'entrée en ligne de commande pour scorer un portefeuille
+complet de clients (fichiers CSV des IMF partenaires).
+
+Chaque ligne suit exactement le pipeline de app._analyser_complet :
+    UserData.from_form → instantane → analyse_financiere → recommander
+    → generer_coaching (optionnel, --coaching)
+
+Le fichier est lu et écrit par lots de taille fixe : la mémoire
+reste bornée quelle que soit la taille du portefeuille.
+Avec --workers, les lots sont répartis sur un pool de processus
+avec un nombre limité de lots en vol (pas de lecture anticipée
+du fichier entier).
+
+Usage :
+    python bulk_scoring.py clients.csv -o scores.csv
+    python bulk_scoring.py clients.csv -o scores.jsonl --coaching --workers 0
+    cat clients.csv | python bulk_scoring.py - -o - --format jsonl
+
+Colonnes reconnues en entrée (mêmes noms que les formulaires) :
+    revenu|salary, depenses|expenses, epargne|savings, autres_revenus,
+    objectif_epargne, horizon, banque, situation, pays, objectif
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from models import UserData
+from ai_engine import analyse_financiere, instantane
+from recommendation import recommander
+from coach import generer_coaching
+
+
+TAILLE_LOT_DEFAUT = 5_000
+
+COLONNES_SORTIE = [
+    "id",
+    "score",
+    "profil",
+    "impact",
+    "decision",
+    "decision_type",
+    "capacite_emprunt",
+    "top_opportunite",
+    "top_statut",
+    "top_mensualite",
+    "nb_faisables",
+    "erreur",
+]
+
+
+# ─────────────────────────────────────────────────────────────
+# TRAITEMENT D'UN LOT
+# ─────────────────────────────────────────────────────────────
+
+def analyser_ligne(ligne: dict, coaching: bool = False,
+                   colonne_id: str = "id") -> dict:
+    """
+    Score une ligne CSV et retourne la ligne de sortie (dict plat).
+    Une ligne invalide produit une sortie avec le champ "erreur"
+    renseigné au lieu d'interrompre tout le fichier.
+    """
+    sortie = dict.fromkeys(COLONNES_SORTIE, "")
+    sortie["id"] = ligne.get(colonne_id) or ""
+
+    try:
+        user = UserData.from_form(ligne)
+    except ValueError as e:
+        sortie["erreur"] = str(e)
+        return sortie
+
+    profil   = instantane(user)
+    resultat = analyse_financiere(profil)
+    reco     = recommander(profil)
+
+    sortie.update({
+        "score":            resultat["score"],
+        "profil":           resultat["profil"],
+        "impact":           resultat["impact"],
+        "decision":         reco["decision"],
+        "decision_type":    reco["decision_type"],
+        "capacite_emprunt": reco["capacite_emprunt"],
+    })
+
+    if coaching:
+        rapport = generer_coaching(profil)
+        if rapport["opportunites"]:
+            top = rapport["opportunites"][0]
+            sortie["top_opportunite"] = top["id"]
+            sortie["top_statut"]      = top["faisabilite"]["statut"]
+            sortie["top_mensualite"]  = top["simulation"].get("mensualite", "")
+        sortie["nb_faisables"] = rapport["nb_faisables"]
+
+    return sortie
+
+
+def analyser_lot(lignes: list, coaching: bool = False,
+                 colonne_id: str = "id") -> list:
+    """Traite un lot de lignes (fonction de niveau module → picklable)."""
+    return [analyser_ligne(l, coaching, colonne_id) for l in lignes]
+
+
+# ─────────────────────────────────────────────────────────────
+# LECTURE / ÉCRITURE EN FLUX
+# ─────────────────────────────────────────────────────────────
+
+def lire_lots(fichier, taille_lot: int):
+    """Générateur de lots de lignes CSV — jamais plus d'un lot en mémoire."""
+    lecteur = csv.DictReader(fichier, restval="")
+    while True:
+        lot = list(islice(lecteur, taille_lot))
+        if not lot:
+            return
+        yield lot
+
+
+class _EcrivainCSV:
+    def __init__(self, fichier):
+        self._w = csv.DictWriter(fichier, fieldnames=COLONNES_SORTIE)
+        self._w.writeheader()
+
+    def ecrire(self, lignes):
+        self._w.writerows(lignes)
+
+
+class _EcrivainJSONL:
+    def __init__(self, fichier):
+        self._f = fichier
+
+    def ecrire(self, lignes):
+        self._f.write("".join(
+            json.dumps(l, ensure_ascii=False) + "\n" for l in lignes
+        ))
+
+
+def _resultats_sequentiels(lots, coaching, colonne_id):
+    for lot in lots:
+        yield analyser_lot(lot, coaching, colonne_id)
+
+
+def _resultats_parallele(lots, coaching, colonne_id, workers):
+    """
+    Répartit les lots sur un pool de processus en conservant l'ordre.
+    Au plus 2 × workers lots sont en vol : la lecture du fichier
+    avance au rythme du traitement (pas de Pool.imap, qui consomme
+    tout l'itérable d'entrée en arrière-plan).
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_vol = deque()
+        for lot in lots:
+            en_vol.append(pool.submit(analyser_lot, lot, coaching, colonne_id))
+            if len(en_vol) >= 2 * workers:
+                yield en_vol.popleft().result()
+        while en_vol:
+            yield en_vol.popleft().result()
+
+
+def scorer_fichier(entree, sortie, format_sortie: str = "csv",
+                   taille_lot: int = TAILLE_LOT_DEFAUT, coaching: bool = False,
+                   workers: int = None, colonne_id: str = "id") -> dict:
+    """
+    Score un flux CSV vers un flux CSV ou JSONL, lot par lot.
+
+    workers : None → séquentiel, 0 → tous les cœurs, n → n processus.
+    Retourne un petit bilan {lignes, erreurs, duree_s}.
+    """
+    ecrivain = _EcrivainJSONL(sortie) if format_sortie == "jsonl" else _EcrivainCSV(sortie)
+    lots = lire_lots(entree, taille_lot)
+
+    if workers is None:
+        resultats = _resultats_sequentiels(lots, coaching, colonne_id)
+    else:
+        workers = workers or os.cpu_count() or 1
+        resultats = _resultats_parallele(lots, coaching, colonne_id, workers)
+
+    debut = time.perf_counter()
+    nb_lignes = nb_erreurs = 0
+    for lot in resultats:
+        ecrivain.ecrire(lot)
+        nb_lignes  += len(lot)
+        nb_erreurs += sum(1 for l in lot if l["erreur"])
+
+    return {
+        "lignes":  nb_lignes,
+        "erreurs": nb_erreurs,
+        "duree_s": round(time.perf_counter() - debut, 3),
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# LIGNE DE COMMANDE
+# ─────────────────────────────────────────────────────────────
+
+def _ouvrir(chemin, mode):
+    if chemin == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(chemin, mode, newline="", encoding="utf-8")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Scoring en masse d'un portefeuille clients (CSV → CSV/JSONL)."
+    )
+    parser.add_argument("entree", help="fichier CSV d'entrée ('-' pour stdin)")
+    parser.add_argument("-o", "--sortie", default="-",
+                        help="fichier de sortie ('-' pour stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="format de sortie (déduit de l'extension par défaut)")
+    parser.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT,
+                        help=f"lignes par lot (défaut : {TAILLE_LOT_DEFAUT})")
+    parser.add_argument("--coaching", action="store_true",
+                        help="exécuter aussi generer_coaching (top opportunité)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="pool de processus : 0 = tous les cœurs")
+    parser.add_argument("--colonne-id", default="id",
+                        help="colonne identifiant client recopiée en sortie")
+    args = parser.parse_args(argv)
+
+    if args.taille_lot <= 0:
+        parser.error("--taille-lot doit être strictement positif")
+
+    format_sortie = args.format or (
+        "jsonl" if args.sortie.endswith((".jsonl", ".ndjson")) else "csv"
+    )
+
+    entree = _ouvrir(args.entree, "r")
+    sortie = _ouvrir(args.sortie, "w")
+    try:
+        bilan = scorer_fichier(
+            entree, sortie,
+            format_sortie=format_sortie,
+            taille_lot=args.taille_lot,
+            coaching=args.coaching,
+            workers=args.workers,
+            colonne_id=args.colonne_id,
+        )
+    finally:
+        if entree is not sys.stdin:
+            entree.close()
+        if sortie is not sys.stdout:
+            sortie.close()
+
+    print(f"{bilan['lignes']} lignes scorées ({bilan['erreurs']} erreurs) "
+          f"en {bilan['duree_s']} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
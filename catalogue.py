@@ -0,0 +1,475 @@
+"""
+Catalogue des annonces — AI Inclusive Finance
+═════════════════════════════════════════════
+
+Les annonces des partenaires (biens, terrains, véhicules, locatif,
+placements) sont trop nombreuses pour le dict littéral de coach.py :
+elles vivent dans une base SQLite, construite hors ligne et lue par
+l'application.
+
+    python catalogue.py construire annonces.json --db catalogue.db
+    python catalogue.py construire annonces.csv  --db catalogue.db
+    python catalogue.py demo --db catalogue.db     # catalogue de coach.py
+    CATALOGUE_DB=catalogue.db gunicorn app:app
+
+Construction (hors ligne) :
+  Pour chaque crédit, la durée retenue, la simulation et les deux
+  seuils de revenu (faisable ≤ 33 %, tendu ≤ 40 %) ne dépendent pas
+  du profil : ils sont calculés une fois et stockés en colonnes
+  indexées. La base est écrite à côté puis renommée (os.replace) :
+  un lecteur voit l'ancienne ou la nouvelle, jamais un état partiel.
+
+Lecture (par requête) :
+  • tranche(user, limite) : par catégorie, les `limite` annonces les
+    plus pertinentes de chaque statut — faisables les plus ambitieuses,
+    tendues, déconseillées les plus proches d'être accessibles — en
+    une requête SQL qui descend les index (categorie, seuil) : coût
+    indépendant de la taille du catalogue ;
+  • comptes(user) : nombre d'annonces par statut sur tout le
+    catalogue, par recherche dichotomique dans les colonnes de seuils
+    chargées en mémoire (numpy) à la première utilisation ;
+  • rechercher(categorie, quartier, prix_max) : index (categorie, prix),
+    (quartier, prix) ou (prix).
+
+Rien n'est lu au démarrage. La base est surveillée (même principe que
+bareme.py) : remplacée sur disque, elle est rouverte et les caches
+d'analyses sont vidés.
+"""
+
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import numpy as np
+
+from analysis_cache import invalider_tout
+
+
+INTERVALLE_CONTROLE = float(os.environ.get("CATALOGUE_INTERVALLE", 2.0))   # secondes
+MAX_CONNEXIONS      = 8        # connexions en lecture gardées ouvertes
+
+SCHEMA = """
+CREATE TABLE annonces (
+    position        INTEGER PRIMARY KEY,   -- ordre d'affichage du catalogue
+    id              TEXT    NOT NULL UNIQUE,
+    categorie       TEXT    NOT NULL,
+    quartier        TEXT,
+    prix            REAL,
+    duree_choisie   INTEGER,               -- crédits seulement
+    seuil_faisable  REAL,                  -- revenu_total minimal (≤ 33 %)
+    seuil_tendu     REAL,                  -- revenu_total minimal (≤ 40 %)
+    simulation      TEXT,                  -- calculer_mensualite (JSON)
+    donnees         TEXT    NOT NULL       -- annonce complète (JSON)
+);
+"""
+
+# Créés après l'insertion (plus rapide). Le id final des index de
+# seuils rend l'ordre (seuil, id) de tranche() lisible dans l'index
+# même, sans tri.
+INDEX = """
+CREATE INDEX annonces_faisable  ON annonces (categorie, seuil_faisable, id);
+CREATE INDEX annonces_tendu     ON annonces (categorie, seuil_tendu, id);
+CREATE INDEX annonces_categorie ON annonces (categorie);
+CREATE INDEX annonces_prix      ON annonces (categorie, prix);
+CREATE INDEX annonces_quartier  ON annonces (quartier, prix);
+CREATE INDEX annonces_prix_seul ON annonces (prix);
+"""
+
+_COLONNES = "position, categorie, duree_choisie, simulation, donnees"
+
+journal = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────
+# CONSTRUCTION
+# ─────────────────────────────────────────────────────────────
+
+def construire(chemin: str, opportunites: dict, preparer) -> int:
+    """
+    Écrit la base du catalogue {categorie: [annonce, …]}.
+    preparer(annonce) → (duree_choisie, simulation, (seuil_faisable,
+    seuil_tendu)) pour chaque crédit (coach._preparer_credit).
+    Retourne le nombre d'annonces.
+    """
+    def lignes():
+        position = 0
+        for categorie, items in opportunites.items():
+            for item in items:
+                try:
+                    if categorie == "epargne":
+                        duree, sim, seuils = None, None, (None, None)
+                    else:
+                        duree, sim, seuils = preparer(item)
+                    yield (position, item["id"], categorie, item.get("quartier"),
+                           item.get("prix"), duree, *seuils,
+                           json.dumps(sim) if sim is not None else None,
+                           json.dumps(item, ensure_ascii=False))
+                except (KeyError, TypeError, ValueError) as e:
+                    raise ValueError(f"annonce {item.get('id', position)!r} ({categorie}) : {e!r}") from None
+                position += 1
+
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    if os.path.exists(temporaire):
+        os.remove(temporaire)
+    con = sqlite3.connect(temporaire)
+    try:
+        con.executescript(SCHEMA)
+        try:
+            con.executemany("INSERT INTO annonces VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", lignes())
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"identifiant d'annonce en double : {e}") from None
+        con.executescript(INDEX)
+        con.execute("ANALYZE")
+        con.commit()
+        n = con.execute("SELECT COUNT(*) FROM annonces").fetchone()[0]
+    except BaseException:
+        con.close()
+        os.remove(temporaire)
+        raise
+    con.close()
+    os.replace(temporaire, chemin)
+    return n
+
+
+def _nombre(texte: str):
+    """Valeur d'une cellule CSV : entier, réel, ou texte inchangé."""
+    for conversion in (int, float):
+        try:
+            return conversion(texte)
+        except ValueError:
+            pass
+    return texte
+
+
+def lire_source(chemin: str) -> dict:
+    """
+    Annonces d'un partenaire : JSON {categorie: [annonce, …]} ou liste
+    d'annonces, ou CSV (une colonne par champ). La catégorie vient de
+    "categorie", sinon de "type".
+    """
+    with open(chemin, encoding="utf-8", newline="") as f:
+        if chemin.endswith(".csv"):
+            annonces = [{k: _nombre(v) for k, v in ligne.items() if v != ""}
+                        for ligne in csv.DictReader(f)]
+        else:
+            annonces = json.load(f)
+    if isinstance(annonces, dict):
+        return annonces
+    catalogue = {}
+    for annonce in annonces:
+        categorie = annonce.pop("categorie", None) or annonce["type"]
+        catalogue.setdefault(categorie, []).append(annonce)
+    return catalogue
+
+
+# ─────────────────────────────────────────────────────────────
+# STATUT D'UN CRÉDIT
+# ─────────────────────────────────────────────────────────────
+
+def statut_groupe(groupe: int, categorie: str, user) -> str:
+    """
+    Statut final d'une annonce d'après sa tranche de revenu (0 : ≤ 33 %,
+    1 : ≤ 40 %, 2 : au-delà) et les règles du profil, comme
+    evaluer_faisabilite : solde ≤ 0 → impossible, réserve < 3 mois →
+    faisable rétrogradé en tendu.
+    """
+    if categorie == "epargne":
+        return "faisable" if user.solde > 0 else "impossible"
+    if user.revenu_total <= 0 or user.solde <= 0:
+        return "impossible"
+    if groupe == 0:
+        return "tendu" if user.mois_securite < 3 else "faisable"
+    return "tendu" if groupe == 1 else "deconseille"
+
+
+# ─────────────────────────────────────────────────────────────
+# LECTURE
+# ─────────────────────────────────────────────────────────────
+
+def _requete_tranche(categories: tuple) -> str:
+    """
+    Une seule requête pour toutes les catégories : pour chacune, trois
+    sous-requêtes bornées (faisables, tendues, déconseillées), chacune
+    lue dans l'ordre d'un index. Paramètres : le revenu :r, les
+    catégories :c<k>, une limite par tranche (:n0, :n1, :n2) et celle
+    de l'épargne (:ne) ; une limite nulle écarte la tranche en SQL.
+    """
+    parties = []
+    for groupe, condition, ordre in (
+        (0, "seuil_faisable <= :r", "seuil_faisable DESC, id DESC"),
+        (1, "seuil_tendu <= :r AND seuil_faisable > :r", "seuil_tendu DESC, id DESC"),
+        (2, "seuil_tendu > :r", "seuil_tendu, id"),
+    ):
+        for k in range(len(categories)):
+            parties.append(f"SELECT * FROM (SELECT {groupe} AS groupe, {_COLONNES} FROM annonces "
+                           f"WHERE categorie = :c{k} AND {condition} ORDER BY {ordre} LIMIT :n{groupe})")
+    parties.append(f"SELECT * FROM (SELECT 0 AS groupe, {_COLONNES} FROM annonces "
+                   f"WHERE categorie = 'epargne' ORDER BY position LIMIT :ne)")
+    return " UNION ALL ".join(parties)
+
+
+class _Colonnes:
+    """Seuils triés par catégorie, pour les comptes (une version de la base)."""
+
+    __slots__ = ("version", "categories", "faisable", "tendu", "n_epargne", "n_credits", "requete")
+
+    def __init__(self, version: int, con):
+        self.version = version
+        def colonne(nom, categorie):
+            # Lue dans l'index (categorie, seuil, id) : déjà triée
+            curseur = con.execute(f"SELECT {nom} FROM annonces WHERE categorie = ? "
+                                  f"ORDER BY {nom}", (categorie,))
+            return np.fromiter((v for v, in curseur), dtype=np.float64)
+
+        self.categories = tuple(c for c, in con.execute(
+            "SELECT DISTINCT categorie FROM annonces WHERE categorie != 'epargne'"))
+        self.faisable   = {c: colonne("seuil_faisable", c) for c in self.categories}
+        self.tendu      = {c: colonne("seuil_tendu", c) for c in self.categories}
+        self.n_credits  = sum(len(v) for v in self.faisable.values())
+        self.n_epargne  = con.execute("SELECT COUNT(*) FROM annonces "
+                                      "WHERE categorie = 'epargne'").fetchone()[0]
+        self.requete    = _requete_tranche(self.categories)
+
+
+class CatalogueSQLite:
+    """
+    Catalogue servi depuis une base SQLite (voir construire). Même
+    interface que coach.IndexAccessibilite : tranche, selection,
+    comptes, simulation, seuils, rechercher.
+    """
+
+    def __init__(self, chemin: str, intervalle: float = INTERVALLE_CONTROLE):
+        self.chemin      = os.path.abspath(chemin)
+        self.intervalle  = intervalle
+        self.version     = 0
+        self.chargements = 1
+        self.erreur      = None
+        self._verrou     = threading.Lock()
+        self._prochain   = 0.0
+        self._connexions = []          # (version, connexion) libres
+        self._colonnes   = None
+        self._refusee    = None        # signature d'une base invalide déjà signalée
+        self._signature  = self._signer()
+
+    # ── Connexions ────────────────────────────────────────────
+
+    def _signer(self) -> tuple:
+        st = os.stat(self.chemin)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _ouvrir(self):
+        con = sqlite3.connect(f"file:{quote(self.chemin)}?mode=ro", uri=True,
+                              check_same_thread=False)
+        con.execute("PRAGMA query_only = 1")
+        return con
+
+    @contextmanager
+    def _connexion(self):
+        """Connexion en lecture empruntée au pool (une par requête en cours)."""
+        version = self.version
+        with self._verrou:
+            while self._connexions:
+                v, con = self._connexions.pop()
+                if v == version:
+                    break
+                con.close()
+            else:
+                con = None
+        if con is None:
+            con = self._ouvrir()
+        try:
+            yield con
+        finally:
+            with self._verrou:
+                if version == self.version and len(self._connexions) < MAX_CONNEXIONS:
+                    self._connexions.append((version, con))
+                    con = None
+            if con is not None:
+                con.close()
+
+    def _donnees(self) -> _Colonnes:
+        colonnes = self._colonnes
+        if colonnes is None or colonnes.version != self.version:
+            version = self.version
+            with self._connexion() as con:
+                colonnes = _Colonnes(version, con)
+            self._colonnes = colonnes
+        return colonnes
+
+    # ── Requêtes ──────────────────────────────────────────────
+
+    def _lignes(self, user, limite, groupes=(0, 1, 2), epargne: bool = True):
+        """
+        (groupe, categorie, item, (duree, simulation) | None) triés par
+        position, limités aux tranches de crédit `groupes` (et à
+        l'épargne si `epargne`) : les autres ne sont ni lues ni décodées.
+        """
+        colonnes = self._donnees()
+        n = -1 if limite is None else limite
+        parametres = {"r": max(user.revenu_total, 0.0), "ne": n if epargne else 0}
+        parametres.update({f"n{g}": n if g in groupes else 0 for g in (0, 1, 2)})
+        parametres.update({f"c{k}": c for k, c in enumerate(colonnes.categories)})
+        with self._connexion() as con:
+            lignes = con.execute(colonnes.requete, parametres).fetchall()
+        lignes.sort(key=lambda l: l[1])
+        return [(groupe, categorie, json.loads(donnees),
+                 (duree, json.loads(sim)) if sim is not None else None)
+                for groupe, _, categorie, duree, sim, donnees in lignes]
+
+    def tranche(self, user, limite=None) -> list:
+        """
+        (categorie, item, (duree_choisie, simulation) | None) : par
+        catégorie, au plus `limite` annonces de chaque tranche de revenu,
+        dans l'ordre du catalogue (limite=None : tout le catalogue).
+        """
+        return [(categorie, item, credit) for _, categorie, item, credit in self._lignes(user, limite)]
+
+    def selection(self, user, statuts) -> list:
+        """Comme tranche(user), restreint aux annonces dont le statut est dans `statuts`."""
+        # Le statut d'un crédit ne dépend que de sa tranche : le filtre passe en SQL
+        groupes = tuple(g for g in (0, 1, 2) if statut_groupe(g, None, user) in statuts)
+        epargne = statut_groupe(0, "epargne", user) in statuts
+        return [(categorie, item, credit)
+                for _, categorie, item, credit in self._lignes(user, None, groupes, epargne)]
+
+    def comptes(self, user) -> dict:
+        """Nombre d'annonces par statut pour ce profil (tout le catalogue)."""
+        colonnes = self._donnees()
+        comptes = {"faisable": 0, "tendu": 0, "deconseille": 0, "impossible": 0}
+        comptes["faisable" if user.solde > 0 else "impossible"] += colonnes.n_epargne
+
+        revenu = user.revenu_total
+        if revenu <= 0 or user.solde <= 0:
+            comptes["impossible"] += colonnes.n_credits
+            return comptes
+
+        k_f = k_t = 0
+        for categorie in colonnes.categories:
+            k_f += int(np.searchsorted(colonnes.faisable[categorie], revenu, side="right"))
+            k_t += int(np.searchsorted(colonnes.tendu[categorie], revenu, side="right"))
+        comptes["tendu" if user.mois_securite < 3 else "faisable"] += k_f
+        comptes["tendu"]       += k_t - k_f
+        comptes["deconseille"] += colonnes.n_credits - k_t
+        return comptes
+
+    def simulation(self, id_annonce: str) -> tuple:
+        """(duree_choisie, simulation) précalculés d'un crédit."""
+        with self._connexion() as con:
+            ligne = con.execute("SELECT duree_choisie, simulation FROM annonces "
+                                "WHERE id = ? AND simulation IS NOT NULL", (id_annonce,)).fetchone()
+        if ligne is None:
+            raise KeyError(id_annonce)
+        return ligne[0], json.loads(ligne[1])
+
+    def grille_taux(self) -> dict:
+        """Couples (taux, durée) distincts : {"credits": {…}, "epargne": {…}}."""
+        with self._connexion() as con:
+            return {cle: set(con.execute(
+                        f"SELECT DISTINCT json_extract(donnees, '$.{taux}'), "
+                        f"json_extract(donnees, '$.{duree}') FROM annonces WHERE {condition}"))
+                    for cle, taux, duree, condition in (
+                        ("credits", "taux_interet", "duree_max", "categorie != 'epargne'"),
+                        ("epargne", "taux", "duree", "categorie = 'epargne'"))}
+
+    def seuils(self) -> dict:
+        """id → (revenu minimal "faisable", revenu minimal "tendu") des crédits."""
+        with self._connexion() as con:
+            return {i: (f, t) for i, f, t in con.execute(
+                "SELECT id, seuil_faisable, seuil_tendu FROM annonces WHERE categorie != 'epargne'")}
+
+    def rechercher(self, categorie: str = None, quartier: str = None,
+                   prix_max: float = None, limite: int = 50) -> list:
+        """Annonces filtrées, de la moins chère à la plus chère."""
+        conditions, parametres = [], []
+        for colonne, valeur, operateur in (("categorie", categorie, "="),
+                                           ("quartier", quartier, "="),
+                                           ("prix", prix_max, "<=")):
+            if valeur is not None:
+                conditions.append(f"{colonne} {operateur} ?")
+                parametres.append(valeur)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connexion() as con:
+            lignes = con.execute(f"SELECT donnees FROM annonces {where} "
+                                 f"ORDER BY prix, position LIMIT ?", (*parametres, limite)).fetchall()
+        return [json.loads(donnees) for donnees, in lignes]
+
+    # ── Rechargement à chaud ──────────────────────────────────
+
+    def recharger_si_modifie(self, forcer: bool = False) -> bool:
+        """
+        Nouvelle version en service si la base a été remplacée ou
+        modifiée (au plus une vérification par intervalle). Une base
+        illisible est refusée : l'ancienne version reste en service.
+        """
+        maintenant = time.monotonic()
+        if not forcer and maintenant < self._prochain:
+            return False
+        self._prochain = maintenant + self.intervalle
+        try:
+            signature = self._signer()
+            if signature in (self._signature, self._refusee) and not forcer:
+                return False
+            con = self._ouvrir()
+            try:
+                con.execute("SELECT COUNT(*) FROM annonces").fetchone()
+            finally:
+                con.close()
+        except (OSError, sqlite3.Error) as e:
+            # Base en cours d'écriture ou invalide : on garde l'ancienne
+            self._refusee = signature if isinstance(e, sqlite3.Error) else None
+            self.erreur = str(e)
+            journal.error("Catalogue non rechargé : %s", e)
+            return False
+        with self._verrou:
+            self._signature = signature
+            self._refusee   = None
+            self.version   += 1
+            self.chargements += 1
+            self.erreur     = None
+            anciennes, self._connexions = self._connexions, []
+        for _, con in anciennes:
+            con.close()
+        invalider_tout()
+        return True
+
+    def stats(self) -> dict:
+        with self._connexion() as con:
+            n = con.execute("SELECT COUNT(*) FROM annonces").fetchone()[0]
+        return {"chemin": self.chemin, "annonces": n, "version": self.version,
+                "chargements": self.chargements, "erreur": self.erreur}
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    import coach
+
+    parser = argparse.ArgumentParser(description="Construit la base SQLite du catalogue d'annonces.")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("construire", help="depuis un fichier JSON ou CSV de partenaire")
+    p.add_argument("source")
+    p.add_argument("--db", default="catalogue.db")
+    p = sous.add_parser("demo", help="depuis le catalogue de démonstration de coach.py")
+    p.add_argument("--db", default="catalogue.db")
+    args = parser.parse_args(argv)
+
+    source = coach.OPPORTUNITES if args.commande == "demo" else lire_source(args.source)
+    debut = time.perf_counter()
+    try:
+        n = construire(args.db, source, coach._preparer_credit)
+    except ValueError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    print(f"{n} annonces écrites dans {args.db} en {time.perf_counter() - debut:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
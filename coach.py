@@ -17,13 +17,43 @@ Il reçoit un profil UserData + score et génère :
 
 Tous les prix sont en FDJ (Franc Djiboutien).
 1 EUR ≈ 200 FDJ (taux approximatif 2024)
+
+Le catalogue ci-dessous sert de démonstration. Les annonces réelles
+des partenaires sont servies depuis une base SQLite (catalogue.py)
+quand CATALOGUE_DB est défini ; une base inutilisable au démarrage
+est signalée et remplacée par le catalogue de démonstration.
 """
 
+import logging
+import math
+import os
+import sqlite3
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+from bareme import BAREMES
+from catalogue import CatalogueSQLite
+
+# Base SQLite des annonces partenaires (python catalogue.py construire …) ;
+# sans elle, le catalogue de démonstration ci-dessous
+CATALOGUE_DB = os.environ.get("CATALOGUE_DB")
+
+journal = logging.getLogger(__name__)
+
+# Annonces montrées par catégorie et par tranche (faisable / tendu /
+# déconseillé) ; les compteurs nb_* portent toujours sur tout le catalogue
+MAX_ANNONCES_PAR_STATUT = int(os.environ.get("CATALOGUE_MAX_ANNONCES", 5))
+
 # ─────────────────────────────────────────────────────────────
 # CATALOGUE DES OPPORTUNITÉS — Prix réels Djibouti 2024
 # Source : marché immobilier djiboutien, concessionnaires locaux
 # ─────────────────────────────────────────────────────────────
 
+# Statuts de faisabilité, du meilleur au pire (codes de statuts_lot)
+STATUTS = ("faisable", "tendu", "deconseille", "impossible")
+
 OPPORTUNITES = {
 
     # ── IMMOBILIER ────────────────────────────────────────────
@@ -230,6 +260,37 @@ OPPORTUNITES = {
 # CALCULS FINANCIERS
 # ─────────────────────────────────────────────────────────────
 
+# Les puissances (1 + t)^±n sont le seul calcul coûteux des simulations.
+# Le catalogue n'utilise qu'une poignée de couples (taux, durée) : on
+# met les facteurs en cache (borné) et chaque simulation se réduit à
+# quelques multiplications. Les expressions sont celles d'origine, les
+# résultats sont donc identiques au bit près.
+TAILLE_CACHE_FACTEURS = 4096
+
+
+@lru_cache(maxsize=TAILLE_CACHE_FACTEURS)
+def facteur_annuite(taux_annuel: float, n_mois: int) -> float:
+    """Dénominateur de l'annuité : 1 - (1 + t/12)^-n."""
+    return 1 - (1 + taux_annuel / 12) ** -n_mois
+
+
+@lru_cache(maxsize=TAILLE_CACHE_FACTEURS)
+def facteur_capitalisation(taux_annuel: float, n_mois: int) -> float:
+    """Numérateur de la capitalisation : (1 + t/12)^n - 1."""
+    return (1 + taux_annuel / 12) ** n_mois - 1
+
+
+def stats_facteurs() -> dict:
+    """Compteurs du cache de facteurs (hits, misses, taille), exposés par /metrics."""
+    stats = {}
+    for nom, fn in (("annuite", facteur_annuite),
+                    ("capitalisation", facteur_capitalisation)):
+        info = fn.cache_info()
+        stats[nom] = {"hits": info.hits, "misses": info.misses,
+                      "taille": info.currsize, "max": info.maxsize}
+    return stats
+
+
 def calculer_mensualite(prix: float, apport_pct: float,
                         taux_annuel: float, duree_ans: int) -> dict:
     """
@@ -251,7 +312,7 @@ def calculer_mensualite(prix: float, apport_pct: float,
     if t_mensuel == 0:
         mensualite = capital / n
     else:
-        mensualite = capital * t_mensuel / (1 - (1 + t_mensuel) ** -n)
+        mensualite = capital * t_mensuel / facteur_annuite(taux_annuel, n)
 
     cout_total  = mensualite * n
     cout_credit = cout_total - capital
@@ -325,7 +386,7 @@ def calculer_epargne(versement: float, taux_annuel: float,
     if t == 0:
         total = versement * duree_mois
     else:
-        total = versement * ((1 + t) ** duree_mois - 1) / t
+        total = versement * facteur_capitalisation(taux_annuel, duree_mois) / t
 
     interets = total - (versement * duree_mois)
     return {
@@ -340,72 +401,78 @@ def calculer_epargne(versement: float, taux_annuel: float,
 # MOTEUR PRINCIPAL DU COACH
 # ─────────────────────────────────────────────────────────────
 
-def generer_coaching(user, score: float,
-                     projet_perso: dict = None) -> dict:
+def generer_coaching(user, score: float = None,
+                     projet_perso: dict = None, statuts=None) -> dict:
     """
     Génère le rapport complet du coach financier.
 
     Paramètres :
-        user         : objet UserData
-        score        : score calculé par ai_engine
+        user         : objet UserData ou ai_engine.FinancialSnapshot
+        score        : score calculé par ai_engine (facultatif avec un
+                       FinancialSnapshot, qui le porte déjà)
         projet_perso : dict optionnel si l'utilisateur entre son propre projet
                        {"nom": "...", "prix": 5000000, "type": "immobilier",
                         "duree": 15, "apport": 0.20}
+        statuts      : optionnel, ex. ("faisable", "tendu") — ne simule que
+                       les opportunités ayant ces statuts (trouvées par
+                       recherche dichotomique dans l'index d'accessibilité).
+                       Les compteurs nb_* portent toujours sur tout le catalogue.
 
     Retourne un dict avec :
-        opportunites  : liste d'opportunités évaluées (vert/orange/rouge)
+        opportunites  : opportunités évaluées (vert/orange/rouge) — par
+                        catégorie, au plus MAX_ANNONCES_PAR_STATUT annonces
+                        de chaque statut, les plus pertinentes pour ce revenu
         projet_perso  : évaluation du projet personnalisé si fourni
         plan_action   : plan mensuel chiffré
         verdict       : message global du coach
         epargne_cible : combien épargner/mois pour débloquer les opportunités
     """
 
+    if score is None:
+        score = user.score
+
     opportunites_evaluees = []
 
-    # ── Évaluation de chaque opportunité du catalogue ─────────
-    for categorie, items in OPPORTUNITES.items():
+    if statuts is None:
+        annonces = _INDEX.tranche(user, MAX_ANNONCES_PAR_STATUT)
+    else:
+        annonces = _INDEX.selection(user, statuts)
+
+    # ── Évaluation de chaque opportunité retenue ──────────────
+    for categorie, item, credit in annonces:
+        opp = dict(item)  # copie pour ne pas modifier l'original
+
+        if categorie == "epargne":
+            # Pour l'épargne : versement = 10% du solde disponible
+            versement = max(5_000, round(user.solde * 0.10))
+            opp["versement_mensuel"] = versement
+            sim = calculer_epargne(versement, opp["taux"], opp["duree"] * 30 // 10)
+            opp["simulation"] = sim
+            opp["faisabilite"] = {
+                "statut":  "faisable" if user.solde > 0 else "impossible",
+                "couleur": "green"    if user.solde > 0 else "red",
+                "ratio":   round(versement / user.revenu_total * 100, 1) if user.revenu_total > 0 else 0,
+                "message": f"Versement de {versement:,} FDJ/mois ({round(versement/user.revenu_total*100, 1)}% de vos revenus)" if user.revenu_total > 0 else "Revenu insuffisant",
+            }
+
+        else:
+            # Pour crédit : durée et simulation ne dépendent pas du
+            # profil, elles sont précalculées dans l'index
+            duree_choisie, sim = credit
+            sim = dict(sim)
+            faisabilite = evaluer_faisabilite(sim["mensualite"], user)
 
-        # Filtrer selon le score — ne pas proposer le très haut de gamme
-        # à quelqu'un avec un score faible (inutile et décourageant)
-        for item in items:
-            opp = dict(item)  # copie pour ne pas modifier l'original
+            opp["simulation"]   = sim
+            opp["faisabilite"]  = faisabilite
+            opp["duree_choisie"] = duree_choisie
 
-            if categorie == "epargne":
-                # Pour l'épargne : versement = 10% du solde disponible
-                versement = max(5_000, round(user.solde * 0.10))
-                opp["versement_mensuel"] = versement
-                sim = calculer_epargne(versement, opp["taux"], opp["duree"] * 30 // 10)
-                opp["simulation"] = sim
-                opp["faisabilite"] = {
-                    "statut":  "faisable" if user.solde > 0 else "impossible",
-                    "couleur": "green"    if user.solde > 0 else "red",
-                    "ratio":   round(versement / user.revenu_total * 100, 1) if user.revenu_total > 0 else 0,
-                    "message": f"Versement de {versement:,} FDJ/mois ({round(versement/user.revenu_total*100, 1)}% de vos revenus)" if user.revenu_total > 0 else "Revenu insuffisant",
-                }
+            # Ajouter info rendement locatif
+            if categorie == "locatif" and "loyer_estime" in opp:
+                cash_flow = opp["loyer_estime"] - sim["mensualite"]
+                opp["cash_flow"] = round(cash_flow)
+                opp["cash_flow_positif"] = cash_flow > 0
 
-            else:
-                # Pour crédit : chercher la durée optimale
-                duree_choisie = _duree_optimale(
-                    opp["prix"], opp["apport_min"],
-                    opp["taux_interet"], opp["duree_max"], user
-                )
-                sim = calculer_mensualite(
-                    opp["prix"], opp["apport_min"],
-                    opp["taux_interet"], duree_choisie
-                )
-                faisabilite = evaluer_faisabilite(sim["mensualite"], user)
-
-                opp["simulation"]   = sim
-                opp["faisabilite"]  = faisabilite
-                opp["duree_choisie"] = duree_choisie
-
-                # Ajouter info rendement locatif
-                if categorie == "locatif" and "loyer_estime" in opp:
-                    cash_flow = opp["loyer_estime"] - sim["mensualite"]
-                    opp["cash_flow"] = round(cash_flow)
-                    opp["cash_flow_positif"] = cash_flow > 0
-
-            opportunites_evaluees.append(opp)
+        opportunites_evaluees.append(opp)
 
     # ── Trier : faisable → tendu → déconseillé ────────────────
     ordre = {"faisable": 0, "tendu": 1, "deconseille": 2, "impossible": 3}
@@ -444,11 +511,14 @@ def generer_coaching(user, score: float,
         except (ValueError, TypeError):
             pass  # projet perso ignoré si données invalides
 
+    # ── Compteurs (tout le catalogue, même si filtré) ─────────
+    comptes = _INDEX.comptes(user)
+
     # ── Plan d'action mensuel ──────────────────────────────────
     plan = _generer_plan_action(user, score, opportunites_evaluees)
 
     # ── Verdict global du coach ────────────────────────────────
-    verdict = _generer_verdict(user, score, opportunites_evaluees)
+    verdict = _generer_verdict(user, score, comptes.get("faisable", 0))
 
     # ── Épargne cible pour débloquer les opportunités ─────────
     epargne_cible = _calculer_epargne_cible(user, opportunites_evaluees)
@@ -460,15 +530,244 @@ def generer_coaching(user, score: float,
         "verdict":        verdict,
         "epargne_cible":  epargne_cible,
         # Stats rapides pour l'affichage
-        "nb_faisables":   sum(1 for o in opportunites_evaluees
-                              if o["faisabilite"]["statut"] == "faisable"),
-        "nb_tendus":      sum(1 for o in opportunites_evaluees
-                              if o["faisabilite"]["statut"] == "tendu"),
-        "nb_deconseillee":sum(1 for o in opportunites_evaluees
-                              if o["faisabilite"]["statut"] in ("deconseille","impossible")),
+        "nb_faisables":   comptes.get("faisable", 0),
+        "nb_tendus":      comptes.get("tendu", 0),
+        "nb_deconseillee":comptes.get("deconseille", 0) + comptes.get("impossible", 0),
     }
 
 
+# ─────────────────────────────────────────────────────────────
+# INDEX D'ACCESSIBILITÉ DU CATALOGUE
+# ─────────────────────────────────────────────────────────────
+
+def _seuil_revenu(mensualite: float, ratio_max: float) -> float:
+    """
+    Plus petit revenu R tel que mensualite / R <= ratio_max,
+    au bit près (même division flottante que evaluer_faisabilite).
+    """
+    if mensualite <= 0:
+        return 0.0
+    seuil = mensualite / ratio_max
+    while mensualite / seuil > ratio_max:
+        seuil = math.nextafter(seuil, math.inf)
+    while True:
+        precedent = math.nextafter(seuil, 0.0)
+        if precedent <= 0 or mensualite / precedent > ratio_max:
+            return seuil
+        seuil = precedent
+
+
+def _preparer_credit(item) -> tuple:
+    """
+    (duree_choisie, simulation, (seuil faisable, seuil tendu)) d'un
+    crédit : rien ne dépend du profil, calculé une fois par annonce.
+    """
+    duree = _duree_optimale(item["prix"], item["apport_min"],
+                            item["taux_interet"], item["duree_max"], None)
+    sim = calculer_mensualite(item["prix"], item["apport_min"],
+                              item["taux_interet"], duree)
+    seuils = (_seuil_revenu(sim["mensualite"], 0.33),
+              _seuil_revenu(sim["mensualite"], 0.40))
+    return duree, sim, seuils
+
+
+class IndexAccessibilite:
+    """
+    Index des opportunités de crédit par seuil de revenu.
+
+    Pour un crédit, la durée retenue (_duree_optimale) et donc la
+    simulation ne dépendent pas du profil : on les calcule une fois,
+    ainsi que le revenu_total minimal pour être "faisable" (≤ 33%)
+    et "tendu" (≤ 40%). Les seuils sont triés par catégorie : le
+    statut d'une annonce pour un revenu donné s'obtient par recherche
+    dichotomique, sans simulation.
+
+    Les règles propres au profil (solde ≤ 0 → impossible, réserve
+    < 3 mois → faisable rétrogradé en tendu) sont appliquées ensuite,
+    exactement comme dans evaluer_faisabilite.
+
+    Index en mémoire du catalogue de démonstration ; catalogue.py
+    fournit la même interface sur une base SQLite.
+    """
+
+    def __init__(self, opportunites: dict):
+        self._position    = {}   # id → rang dans le catalogue
+        self._annonces    = {}   # id → (categorie, item)
+        self._simulations = {}   # id → (duree_choisie, simulation)
+        self._seuils      = {}   # id → (seuil faisable, seuil tendu)
+        self._epargne     = []   # ids des placements (statut selon le solde)
+        self._faisable    = {}   # categorie → (seuils triés, ids)
+        self._tendu       = {}   # categorie → (seuils triés, ids)
+
+        par_categorie = {}
+        for categorie, items in opportunites.items():
+            for item in items:
+                self._position[item["id"]] = len(self._position)
+                self._annonces[item["id"]] = (categorie, item)
+                if categorie == "epargne":
+                    self._epargne.append(item["id"])
+                    continue
+                duree, sim, seuils = _preparer_credit(item)
+                self._simulations[item["id"]] = (duree, sim)
+                self._seuils[item["id"]] = seuils
+                par_categorie.setdefault(categorie, []).append((*seuils, item["id"]))
+
+        for categorie, lignes in par_categorie.items():
+            f = sorted((sf, i) for sf, _, i in lignes)
+            t = sorted((st, i) for _, st, i in lignes)
+            self._faisable[categorie] = ([s for s, _ in f], [i for _, i in f])
+            self._tendu[categorie]    = ([s for s, _ in t], [i for _, i in t])
+
+    def grille_taux(self) -> dict:
+        """Couples (taux, durée) distincts : {"credits": {…}, "epargne": {…}}."""
+        grille = {"credits": set(), "epargne": set()}
+        for categorie, item in self._annonces.values():
+            if categorie == "epargne":
+                grille["epargne"].add((item["taux"], item["duree"]))
+            else:
+                grille["credits"].add((item["taux_interet"], item["duree_max"]))
+        return grille
+
+    def seuils(self) -> dict:
+        """id → (revenu minimal "faisable", revenu minimal "tendu") des crédits."""
+        return dict(self._seuils)
+
+    def simulation(self, id_annonce: str) -> tuple:
+        """(duree_choisie, simulation) précalculés d'un crédit."""
+        return self._simulations[id_annonce]
+
+    def _credits(self, revenu: float):
+        """
+        Par catégorie : (ids faisables, ids ≤ 40%, ids > 40%) au sens du
+        seul ratio mensualité / revenu — trois tranches des index triés.
+        """
+        for categorie, (seuils_f, ids_f) in self._faisable.items():
+            seuils_t, ids_t = self._tendu[categorie]
+            k_f = bisect_right(seuils_f, revenu)
+            k_t = bisect_right(seuils_t, revenu)
+            yield ids_f[:k_f], ids_t[:k_t], ids_t[k_t:]
+
+    def statut(self, id_annonce: str, user) -> str:
+        """Statut de faisabilité d'une annonce pour ce profil."""
+        categorie, _ = self._annonces[id_annonce]
+        revenu = user.revenu_total
+        if categorie == "epargne":
+            return "faisable" if user.solde > 0 else "impossible"
+        if revenu <= 0 or user.solde <= 0:
+            return "impossible"
+        seuil_f, seuil_t = self._seuils[id_annonce]
+        if revenu >= seuil_f:
+            return "tendu" if user.mois_securite < 3 else "faisable"
+        if revenu >= seuil_t:
+            return "tendu"
+        return "deconseille"
+
+    def statuts_lot(self, lot) -> tuple:
+        """
+        Statuts de toutes les annonces pour un UserBatch, vectorisé :
+        (ids dans l'ordre du catalogue, codes (n_annonces, n) int8,
+        indices dans STATUTS). Mêmes règles que statut().
+        """
+        ids = sorted(self._annonces, key=self._position.__getitem__)
+        codes = np.empty((len(ids), len(lot)), dtype=np.int8)
+        revenu, mois_securite = lot.revenu_total, lot.mois_securite
+        impossible = (revenu <= 0) | (lot.solde <= 0)
+        placement  = np.where(lot.solde > 0, 0, 3).astype(np.int8)
+        for k, id_annonce in enumerate(ids):
+            if id_annonce not in self._seuils:
+                codes[k] = placement
+                continue
+            seuil_f, seuil_t = self._seuils[id_annonce]
+            codes[k] = np.select(
+                [impossible, revenu >= seuil_f, revenu >= seuil_t],
+                [3, np.where(mois_securite < 3, 1, 0), 1], 2)
+        return ids, codes
+
+    def _par_statut(self, user) -> dict:
+        """ids regroupés par statut final (listes, ordre non garanti)."""
+        groupes = {"faisable": [], "tendu": [], "deconseille": [], "impossible": []}
+        groupes["faisable" if user.solde > 0 else "impossible"].extend(self._epargne)
+
+        revenu = user.revenu_total
+        if revenu <= 0 or user.solde <= 0:
+            for ids_f, ids_t, ids_d in self._credits(max(revenu, 0.0)):
+                groupes["impossible"].extend(ids_t)
+                groupes["impossible"].extend(ids_d)
+            return groupes
+
+        retrograde = user.mois_securite < 3
+        for ids_f, ids_t, ids_d in self._credits(revenu):
+            faisables = set(ids_f)
+            groupes["tendu" if retrograde else "faisable"].extend(ids_f)
+            groupes["tendu"].extend(i for i in ids_t if i not in faisables)
+            groupes["deconseille"].extend(ids_d)
+        return groupes
+
+    def comptes(self, user) -> dict:
+        """
+        Nombre d'annonces par statut pour ce profil, en O(log n) par
+        catégorie : un crédit faisable au sens du ratio (≤ 33%) l'est
+        aussi à 40%, donc les tendus sont k_40 - k_33.
+        """
+        comptes = {"faisable": 0, "tendu": 0, "deconseille": 0, "impossible": 0}
+        comptes["faisable" if user.solde > 0 else "impossible"] += len(self._epargne)
+
+        revenu = user.revenu_total
+        n_credits = sum(len(ids) for _, ids in self._faisable.values())
+        if revenu <= 0 or user.solde <= 0:
+            comptes["impossible"] += n_credits
+            return comptes
+
+        k_f = k_t = 0
+        for categorie, (seuils_f, _) in self._faisable.items():
+            k_f += bisect_right(seuils_f, revenu)
+            k_t += bisect_right(self._tendu[categorie][0], revenu)
+        comptes["tendu" if user.mois_securite < 3 else "faisable"] += k_f
+        comptes["tendu"]       += k_t - k_f
+        comptes["deconseille"] += n_credits - k_t
+        return comptes
+
+    def _annonces_triees(self, ids) -> list:
+        """(categorie, item, (duree_choisie, simulation) | None) dans l'ordre du catalogue."""
+        ids.sort(key=self._position.__getitem__)
+        return [(*self._annonces[i], self._simulations.get(i)) for i in ids]
+
+    def selection(self, user, statuts) -> list:
+        """Annonces dont le statut est dans `statuts`, dans l'ordre du catalogue."""
+        groupes = self._par_statut(user)
+        return self._annonces_triees([i for st in statuts for i in groupes.get(st, ())])
+
+    def tranche(self, user, limite=None) -> list:
+        """
+        Par catégorie, au plus `limite` annonces de chaque tranche de
+        revenu : les faisables les plus chères, les tendues, puis les
+        déconseillées les plus proches d'être accessibles (limite=None :
+        tout le catalogue). Dans l'ordre du catalogue.
+        """
+        ids = list(self._epargne[:limite])
+        for ids_f, ids_t, ids_d in self._credits(max(user.revenu_total, 0.0)):
+            faisables = set(ids_f)
+            tendus = [i for i in ids_t if i not in faisables]
+            if limite is None:
+                ids += ids_f + tendus + ids_d
+            else:
+                ids += ids_f[-limite:] + tendus[-limite:] + ids_d[:limite]
+        return self._annonces_triees(ids)
+
+    def rechercher(self, categorie: str = None, quartier: str = None,
+                   prix_max: float = None, limite: int = 50) -> list:
+        """Annonces filtrées, de la moins chère à la plus chère."""
+        trouvees = [
+            item for cat, item in self._annonces.values()
+            if (categorie is None or cat == categorie)
+            and (quartier is None or item.get("quartier") == quartier)
+            and (prix_max is None or item.get("prix") is not None and item["prix"] <= prix_max)
+        ]
+        # Comme SQLite : les annonces sans prix (placements) en premier
+        trouvees.sort(key=lambda item: (item.get("prix") is not None, item.get("prix") or 0))
+        return trouvees[:limite]
+
+
 # ─────────────────────────────────────────────────────────────
 # HELPERS INTERNES
 # ─────────────────────────────────────────────────────────────
@@ -487,15 +786,59 @@ def _taux_par_type(type_bien: str) -> float:
 
 def _duree_optimale(prix, apport_pct, taux, duree_max, user) -> int:
     """
-    Trouve la durée minimale pour que la mensualité soit
-    ≤ 33% des revenus. Commence par la durée max et descend.
-    Retourne la durée choisie (entre 1 et duree_max ans).
+    Durée retenue pour simuler une opportunité (entre 1 et duree_max ans).
+
+    L'ancienne version testait chaque durée de duree_max à 1 et gardait
+    la première dont la mensualité passe sous 33% des revenus, sinon
+    duree_max. La mensualité décroît avec la durée : si duree_max ne
+    passe pas, aucune durée plus courte ne passe, et si elle passe
+    c'est la première testée. Le résultat est donc toujours duree_max,
+    sans aucun calcul d'annuité.
+
+    Pour la durée la plus courte supportable, voir duree_minimale().
     """
-    for duree in range(duree_max, 0, -1):
-        sim = calculer_mensualite(prix, apport_pct, taux, duree)
-        if sim["mensualite"] <= user.revenu_total * 0.33:
-            return duree
-    return duree_max  # même si ça dépasse 33%, on retourne le max
+    return duree_max
+
+
+def duree_minimale(prix, apport_pct, taux, plafond, duree_max):
+    """
+    Plus courte durée (en années, 1..duree_max) pour laquelle la
+    mensualité arrondie de calculer_mensualite reste ≤ plafond.
+    Retourne None si même duree_max ne suffit pas.
+
+    Inversion directe de la formule d'annuité :
+        M(n) ≤ P  ⇔  n ≥ -ln(1 - K·t/P) / ln(1 + t)     (t > 0)
+                  ⇔  n ≥ K / P                          (t = 0)
+    puis correction d'au plus quelques années pour retrouver
+    exactement l'arrondi de calculer_mensualite.
+    """
+    if duree_max < 1:
+        return None
+
+    def passe(duree):
+        return calculer_mensualite(prix, apport_pct, taux, duree)["mensualite"] <= plafond
+
+    capital   = prix - prix * apport_pct
+    t_mensuel = taux / 12
+
+    if capital <= 0:
+        estimation = 1
+    elif plafond <= 0:
+        estimation = duree_max + 1
+    elif t_mensuel == 0:
+        estimation = math.ceil(capital / plafond / 12)
+    elif t_mensuel > 0 and capital * t_mensuel >= plafond:
+        estimation = duree_max + 1   # les intérêts seuls dépassent le plafond
+    else:
+        n = -math.log1p(-capital * t_mensuel / plafond) / math.log1p(t_mensuel)
+        estimation = math.ceil(n / 12)
+
+    duree = min(max(1, estimation), duree_max)
+    while duree > 1 and passe(duree - 1):
+        duree -= 1
+    while duree <= duree_max and not passe(duree):
+        duree += 1
+    return duree if duree <= duree_max else None
 
 
 def _generer_plan_action(user, score: float, opportunites: list) -> list:
@@ -570,8 +913,8 @@ def _generer_plan_action(user, score: float, opportunites: list) -> list:
                 "type":   "faisable",
             })
 
-    # Étape 4 — diversification
-    if score >= 550:
+    # Étape 4 — diversification (profil « bon » ou mieux pour la banque)
+    if BAREMES.pour(user.banque).niveau(score) >= 3:
         plan.append({
             "numero": len(plan) + 1,
             "titre":  "Diversifier votre patrimoine",
@@ -586,14 +929,11 @@ def _generer_plan_action(user, score: float, opportunites: list) -> list:
     return plan
 
 
-def _generer_verdict(user, score: float, opportunites: list) -> dict:
+def _generer_verdict(user, score: float, nb_faisables: int) -> dict:
     """
     Génère le verdict global du coach en une phrase forte
     + un message détaillé.
     """
-    nb_faisables = sum(1 for o in opportunites
-                       if o["faisabilite"]["statut"] == "faisable")
-
     if user.solde <= 0:
         return {
             "titre":   "⚠️ Stabilisation financière prioritaire",
@@ -656,4 +996,60 @@ def _calculer_epargne_cible(user, opportunites: list) -> dict:
         "revenu_necessaire": round(revenu_necessaire),
         "effort_mensuel":    round(effort_mensuel),
         "mois_pour_debloquer": round(effort_mensuel / max(1, user.solde * 0.15)) if user.solde > 0 else 99,
-    }
\ No newline at end of file
+    }
+
+
+def _prechauffer_facteurs(index) -> int:
+    """
+    Précalcule les facteurs de la grille (taux, durée) du catalogue
+    servi : chaque durée de 1 an à duree_max pour un crédit (projet et
+    duree_minimale), la durée du placement pour l'épargne. Au plus
+    TAILLE_CACHE_FACTEURS facteurs. Retourne le nombre de facteurs.
+    """
+    grille = index.grille_taux()
+    couples = [(facteur_capitalisation, taux, duree * 30 // 10)
+               for taux, duree in sorted(grille["epargne"]) if taux]
+    couples += [(facteur_annuite, taux, ans * 12)
+                for taux, duree_max in sorted(grille["credits"]) if taux
+                for ans in range(1, int(duree_max) + 1)]
+    for facteur, taux, n_mois in couples[:TAILLE_CACHE_FACTEURS]:
+        facteur(taux, n_mois)
+    return min(len(couples), TAILLE_CACHE_FACTEURS)
+
+
+def _ouvrir_catalogue():
+    """
+    Base SQLite de CATALOGUE_DB, ou catalogue de démonstration si elle
+    est absente, illisible ou invalide : le service démarre quand même.
+    """
+    if CATALOGUE_DB:
+        try:
+            catalogue = CatalogueSQLite(CATALOGUE_DB)
+            _prechauffer_facteurs(catalogue)         # lit la table : base invalide refusée ici
+            return catalogue
+        except (OSError, sqlite3.Error) as e:
+            journal.error("Catalogue %s inutilisable, catalogue de démonstration servi : %s",
+                          CATALOGUE_DB, e)
+    index = IndexAccessibilite(OPPORTUNITES)
+    _prechauffer_facteurs(index)
+    return index
+
+
+_INDEX = _ouvrir_catalogue()
+
+
+def recharger_catalogue(forcer: bool = False) -> bool:
+    """Base du catalogue remplacée sur disque : nouvelle version en service."""
+    if not (isinstance(_INDEX, CatalogueSQLite) and _INDEX.recharger_si_modifie(forcer)):
+        return False
+    try:
+        _prechauffer_facteurs(_INDEX)
+    except sqlite3.Error as e:
+        journal.error("Facteurs du catalogue non précalculés : %s", e)
+    return True
+
+
+def rechercher_annonces(categorie: str = None, quartier: str = None,
+                        prix_max: float = None, limite: int = 50) -> list:
+    """Annonces du catalogue filtrées, de la moins chère à la plus chère."""
+    return _INDEX.rechercher(categorie, quartier, prix_max, limite)
@@ -0,0 +1,98 @@
+"""
+Compression des réponses — AI Inclusive Finance
+═══════════════════════════════════════════════
+
+Négociation gzip / brotli des réponses dynamiques (pages de
+résultats, API JSON) pour les utilisateurs mobiles à faible débit.
+
+  • Encodage choisi selon Accept-Encoding : brotli si le module
+    optionnel est installé et accepté par le client, sinon gzip.
+  • Réponse complète : compressée seulement au-delà d'un seuil
+    (en dessous, l'en-tête coûte plus que le gain).
+  • Réponse en flux (stream_template) : compressée morceau par
+    morceau, avec un flush à chaque morceau pour que le navigateur
+    puisse commencer à afficher la page sans attendre la fin.
+  • Les réponses déjà encodées (pages statiques précompilées,
+    bundles) et les types non textuels ne sont pas touchés.
+"""
+
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:          # dépendance optionnelle : gzip seul
+    brotli = None
+
+
+TYPES_COMPRESSIBLES = {
+    "text/html", "text/css", "text/javascript", "text/plain",
+    "application/json", "application/javascript", "image/svg+xml",
+}
+ENCODAGES = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choisir_encodage(disponibles=ENCODAGES) -> str:
+    """Meilleur encodage accepté par le client parmi `disponibles` (br > gzip)."""
+    acceptes = request.accept_encodings
+    for encodage in ("br", "gzip"):
+        if encodage in disponibles and acceptes[encodage]:
+            return encodage
+    return "identity"
+
+
+def _compresseur(encodage: str, niveau_gzip: int, qualite_brotli: int):
+    """Fonctions (compresser, vider, terminer) d'un flux compressé."""
+    if encodage == "br":
+        c = brotli.Compressor(quality=qualite_brotli)
+        return c.process, c.flush, c.finish
+    c = zlib.compressobj(niveau_gzip, zlib.DEFLATED, 31)    # 31 → en-tête gzip
+    return c.compress, lambda: c.flush(zlib.Z_SYNC_FLUSH), c.flush
+
+
+def _flux_compresse(morceaux, encodage, niveau_gzip, qualite_brotli):
+    compresser, vider, terminer = _compresseur(encodage, niveau_gzip, qualite_brotli)
+    for morceau in morceaux:
+        if isinstance(morceau, str):
+            morceau = morceau.encode()
+        sortie = compresser(morceau) + vider()
+        if sortie:
+            yield sortie
+    yield terminer()
+
+
+def compresser_reponse(reponse, seuil: int = 1024, niveau_gzip: int = 6,
+                       qualite_brotli: int = 4):
+    """Hook after_request : compresse la réponse si le client l'accepte."""
+    if (reponse.status_code < 200 or reponse.status_code in (204, 304)
+            or "Content-Encoding" in reponse.headers
+            or reponse.direct_passthrough
+            or reponse.mimetype not in TYPES_COMPRESSIBLES):
+        return reponse
+
+    reponse.vary.add("Accept-Encoding")
+    encodage = choisir_encodage()
+    if encodage == "identity":
+        return reponse
+
+    if reponse.is_streamed:
+        reponse.response = _flux_compresse(reponse.response, encodage,
+                                           niveau_gzip, qualite_brotli)
+        reponse.headers.pop("Content-Length", None)
+    else:
+        donnees = reponse.get_data()
+        if len(donnees) < seuil:
+            return reponse
+        if encodage == "br":
+            donnees = brotli.compress(donnees, quality=qualite_brotli)
+        else:
+            donnees = zlib.compress(donnees, niveau_gzip, wbits=31)
+        reponse.set_data(donnees)
+
+    reponse.headers["Content-Encoding"] = encodage
+    # Un ETag calculé sur le contenu en clair ne désigne plus ces octets
+    if "ETag" in reponse.headers:
+        etag, faible = reponse.get_etag()
+        reponse.set_etag(f"{etag}-{encodage}", weak=faible)
+    return reponse
@@ -11,6 +11,93 @@ class Config:
     # En production, mettre DEBUG=False dans les variables d'env.
     DEBUG = os.environ.get("DEBUG", "true").lower() == "true"
 
+    # ── Cache des analyses ──────────────────────────────────────
+    # Résultats mémorisés par profil normalisé (voir analysis_cache.py).
+    ANALYSE_CACHE_ACTIF   = os.environ.get("ANALYSE_CACHE_ACTIF", "true").lower() == "true"
+    ANALYSE_CACHE_ENTREES = int(os.environ.get("ANALYSE_CACHE_ENTREES", 10_000))
+    ANALYSE_CACHE_OCTETS  = int(os.environ.get("ANALYSE_CACHE_OCTETS", 64 * 2**20))
+    ANALYSE_CACHE_TTL     = float(os.environ.get("ANALYSE_CACHE_TTL", 600))
+
+    # ── Résultats de session ────────────────────────────────────
+    # Résultats du parcours gardés sous un jeton opaque (session_store.py).
+    # SESSIONS_DB vide : en mémoire (par worker) ; sinon fichier SQLite
+    # partagé par les workers de la machine.
+    SESSIONS_ACTIVES = os.environ.get("SESSIONS_ACTIVES", "true").lower() == "true"
+    SESSIONS_DB      = os.environ.get("SESSIONS_DB", "")
+    SESSIONS_ENTREES = int(os.environ.get("SESSIONS_ENTREES", 10_000))
+    SESSIONS_OCTETS  = int(os.environ.get("SESSIONS_OCTETS", 32 * 2**20))
+    SESSIONS_TTL     = float(os.environ.get("SESSIONS_TTL", 1800))
+
+    # ── Journal des analyses ────────────────────────────────────
+    # Chaque analyse servie est écrite dans JOURNAL_DB (SQLite) par un
+    # thread d'arrière-plan, par lots (persistence.py). Vide : désactivé.
+    # File pleine (JOURNAL_FILE analyses en attente) : analyses perdues.
+    JOURNAL_DB         = os.environ.get("JOURNAL_DB", "")
+    JOURNAL_FILE       = int(os.environ.get("JOURNAL_FILE", 10_000))
+    JOURNAL_LOT        = int(os.environ.get("JOURNAL_LOT", 500))
+    JOURNAL_INTERVALLE = float(os.environ.get("JOURNAL_INTERVALLE", 1.0))
+
+    # ── Centiles entre pairs ────────────────────────────────────
+    # Esquisses des scores par pays, situation et banque construites
+    # hors ligne (python peer_percentiles.py construire …), puis
+    # complétées par les analyses du journal. Un groupe de moins de
+    # CENTILES_MIN_PAIRS profils n'est pas affiché.
+    CENTILES_FICHIER   = os.environ.get("CENTILES_FICHIER", "")
+    CENTILES_MIN_PAIRS = int(os.environ.get("CENTILES_MIN_PAIRS", 30))
+
+    # ── Profils voisins ─────────────────────────────────────────
+    # Index KDTree construit hors ligne (python neighbours.py construire …)
+    # et servi par /api/v1/voisins ; vide = désactivé. Base et
+    # complément vérifiés toutes les VOISINS_INTERVALLE secondes.
+    VOISINS_INDEX      = os.environ.get("VOISINS_INDEX", "")
+    VOISINS_INTERVALLE = float(os.environ.get("VOISINS_INTERVALLE", 10.0))
+    VOISINS_K          = int(os.environ.get("VOISINS_K", 5))
+    VOISINS_K_MAX      = int(os.environ.get("VOISINS_K_MAX", 50))
+
+    # ── API JSON ────────────────────────────────────────────────
+    API_BATCH_MAX = int(os.environ.get("API_BATCH_MAX", 1000))
+
+    # ── Stress-test Monte Carlo ─────────────────────────────────
+    # Trajectoires au plus par requête /forecast/stress (mémoire et
+    # temps CPU proportionnels : ~2 Kio et ~4 µs par trajectoire)
+    STRESS_CHEMINS_MAX = int(os.environ.get("STRESS_CHEMINS_MAX", 20_000))
+
+    # ── Pages statiques ─────────────────────────────────────────
+    # /, /banks et /about rendus une fois au démarrage (static_pages.py).
+    # À désactiver en développement pour voir les templates modifiés.
+    PAGES_PRECOMPILEES = os.environ.get("PAGES_PRECOMPILEES", "true").lower() == "true"
+
+    # ── Pages de résultats : flux et compression ────────────────
+    # Rendu en flux des routes POST (result, coach, forecast…) par
+    # morceaux de STREAMING_TRONCON caractères ; compression gzip/brotli
+    # des réponses dynamiques au-delà de COMPRESSION_SEUIL octets.
+    STREAMING_RESULTATS        = os.environ.get("STREAMING_RESULTATS", "true").lower() == "true"
+    STREAMING_TRONCON          = int(os.environ.get("STREAMING_TRONCON", 16_384))
+    COMPRESSION_ACTIVE         = os.environ.get("COMPRESSION_ACTIVE", "true").lower() == "true"
+    COMPRESSION_SEUIL          = int(os.environ.get("COMPRESSION_SEUIL", 1024))
+    COMPRESSION_NIVEAU_GZIP    = int(os.environ.get("COMPRESSION_NIVEAU_GZIP", 6))
+    COMPRESSION_QUALITE_BROTLI = int(os.environ.get("COMPRESSION_QUALITE_BROTLI", 4))
+
+    # ── Instrumentation ─────────────────────────────────────────
+    # Chronométrage des étapes de chaque requête (instrumentation.py) :
+    # en-tête Server-Timing et histogrammes Prometheus sur /metrics.
+    # Désactivé, le coût est négligeable et /metrics répond 404.
+    METRIQUES_ACTIVES = os.environ.get("METRIQUES_ACTIVES", "false").lower() == "true"
+    SERVER_TIMING     = os.environ.get("SERVER_TIMING", "true").lower() == "true"
+
+    # ── Profilage à la demande ──────────────────────────────────
+    # Une requête portant l'en-tête « X-Profilage: <PROFILAGE_SECRET> »
+    # est profilée (profiling.py) : piles repliées (mode echantillons)
+    # ou .prof (mode cprofile) écrits dans PROFILAGE_REPERTOIRE.
+    # Au plus un profil toutes les PROFILAGE_INTERVALLE secondes.
+    PROFILAGE_ACTIF      = os.environ.get("PROFILAGE_ACTIF", "false").lower() == "true"
+    PROFILAGE_SECRET     = os.environ.get("PROFILAGE_SECRET", "")
+    PROFILAGE_MODE       = os.environ.get("PROFILAGE_MODE", "echantillons")
+    PROFILAGE_REPERTOIRE = os.environ.get("PROFILAGE_REPERTOIRE", "profils")
+    PROFILAGE_INTERVALLE = float(os.environ.get("PROFILAGE_INTERVALLE", 60))
+    PROFILAGE_PERIODE    = float(os.environ.get("PROFILAGE_PERIODE", 0.005))
+    PROFILAGE_DUREE_MAX  = float(os.environ.get("PROFILAGE_DUREE_MAX", 30))
+
     # ── Métadonnées de l'app ────────────────────────────────────
     APP_NAME    = "AI Inclusive Finance"
     APP_VERSION = "2.0.0"
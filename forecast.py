@@ -0,0 +1,118 @@
+"""
+GPS Financier — Projection 36 mois côté serveur
+═══════════════════════════════════════════════
+
+Reprise en Python de la projection auparavant calculée uniquement
+en JavaScript (buildProjection / toggleCrisis dans forecast.html),
+pour pouvoir la mettre en cache, la réutiliser au back-office et
+projeter un portefeuille entier d'un seul appel.
+
+Modèle (identique au front-end d'origine) :
+  • Inflation des dépenses : 4%/an, composée mensuellement.
+  • Imprévu tous les 8 mois : +30% des dépenses de base.
+  • Capital = épargne initiale + soldes mensuels, jamais < 0.
+  • Objectif : épargner 15% du revenu chaque mois.
+  • Scénario "crise" : −60% de revenus, +30% de dépenses.
+
+Différence assumée : les autres revenus sont inclus (le JS
+n'utilisait que le revenu principal). On ajoute aussi la
+trajectoire du score, recalculée chaque mois par le moteur
+vectorisé (analyse_financiere_batch).
+
+Tout est vectorisé sur (profils × scénarios × mois) ; le capital
+plancher à 0 se calcule sans boucle :
+    c_m = P_m − min(0, min_{k≤m} P_k)   avec P = épargne + cumul des soldes
+"""
+
+import numpy as np
+
+from ai_engine import analyse_financiere_batch
+from models import UserBatch
+
+
+HORIZON_MOIS     = 36
+INFLATION        = 0.04    # inflation annuelle Djibouti
+PERIODE_IMPREVU  = 8       # un imprévu tous les 8 mois
+CHOC_IMPREVU     = 0.30    # +30% des dépenses de base
+OBJECTIF_EPARGNE = 0.15    # part du revenu épargnée dans la courbe objectif
+JALONS           = (0, 12, 24, 36)
+
+# Scénario → (facteur revenus, facteur dépenses)
+SCENARIOS = {
+    "normal": (1.0, 1.0),
+    "crise":  (0.4, 1.3),   # perte d'emploi : −60% revenus, +30% dépenses
+}
+
+
+def projeter_lot(lot: UserBatch, mois: int = HORIZON_MOIS) -> dict:
+    """
+    Projette N profils sur `mois` mois pour chaque scénario.
+
+    Retourne un dict de tableaux numpy :
+        solde, capital, score : forme (N, S, mois + 1)
+        objectif              : forme (N, mois + 1)
+        scenarios             : noms des S scénarios (ordre de l'axe 1)
+    """
+    m = np.arange(mois + 1)
+    facteurs = np.array(list(SCENARIOS.values()))            # (S, 2)
+    f_rev = facteurs[:, 0][None, :, None]                     # (1, S, 1)
+    f_dep = facteurs[:, 1][None, :, None]
+
+    revenu         = lot.revenu[:, None, None] * f_rev        # (N, S, 1)
+    autres_revenus = lot.autres_revenus[:, None, None] * f_rev
+    depenses_base  = lot.depenses[:, None, None] * f_dep
+
+    depenses = depenses_base * (1 + INFLATION) ** (m / 12)    # (N, S, M)
+    choc     = np.where((m % PERIODE_IMPREVU == 0) & (m > 0), -CHOC_IMPREVU, 0.0)
+    solde    = (revenu + autres_revenus) - depenses + depenses_base * choc
+
+    cumul   = lot.epargne[:, None, None] + np.cumsum(solde, axis=-1)
+    capital = cumul - np.minimum(0.0, np.minimum.accumulate(cumul, axis=-1))
+
+    forme = solde.shape
+    scores = analyse_financiere_batch(UserBatch(
+        revenu=np.broadcast_to(revenu, forme).ravel(),
+        depenses=depenses.ravel(),
+        epargne=capital.ravel(),
+        autres_revenus=np.broadcast_to(autres_revenus, forme).ravel(),
+        objectif_epargne=np.broadcast_to(lot.objectif_epargne[:, None, None], forme).ravel(),
+        horizon=np.broadcast_to(lot.horizon[:, None, None], forme).ravel(),
+        banque=None if lot.banque is None
+               else np.broadcast_to(lot.banque[:, None, None], forme).ravel(),
+    ))["score"].reshape(forme)
+
+    objectif = lot.epargne[:, None] + lot.revenu_total[:, None] * OBJECTIF_EPARGNE * m
+
+    return {
+        "scenarios": tuple(SCENARIOS),
+        "solde":     solde,
+        "capital":   capital,
+        "score":     scores,
+        "objectif":  objectif,
+    }
+
+
+def projeter(user, mois: int = HORIZON_MOIS) -> dict:
+    """
+    Projection d'un seul profil, prête pour le template ou le JSON :
+    listes d'entiers par scénario + mois d'épuisement de l'épargne.
+    """
+    proj = projeter_lot(UserBatch.from_users([user]), mois)
+
+    scenarios = {}
+    for i, nom in enumerate(proj["scenarios"]):
+        capital = proj["capital"][0, i]
+        a_zero  = np.flatnonzero(capital <= 0)
+        scenarios[nom] = {
+            "solde":      np.round(proj["solde"][0, i]).astype(int).tolist(),
+            "capital":    np.round(capital).astype(int).tolist(),
+            "score":      proj["score"][0, i].tolist(),
+            "epuisement": int(a_zero[0]) if a_zero.size else None,
+        }
+
+    return {
+        "mois":      list(range(mois + 1)),
+        "objectif":  np.round(proj["objectif"][0]).astype(int).tolist(),
+        "scenarios": scenarios,
+        "jalons":    [j for j in JALONS if j <= mois],
+    }
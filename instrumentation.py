@@ -0,0 +1,193 @@
+"""
+Instrumentation des requêtes — AI Inclusive Finance
+═══════════════════════════════════════════════════
+
+Quand /coach est lent, où part le temps : lecture du formulaire,
+scoring, coaching ou rendu Jinja ? Chaque étape du pipeline est
+chronométrée :
+
+    with etape("score"):
+        resultat = analyse_financiere(profil)
+
+  • En-tête Server-Timing sur chaque réponse (visible dans l'onglet
+    Réseau du navigateur) : parse;dur=0.08, score;dur=0.02, …
+  • Histogrammes de latence par route et par étape, en mémoire,
+    exposés au format Prometheus sur /metrics.
+
+Coût :
+  • désactivé : etape() lit une ContextVar vide et rend un
+    contexte nul partagé (≈ 0,1 µs, aucune allocation) ;
+  • activé : deux perf_counter et un append par étape, puis un
+    bisect et une addition par histogramme en fin de requête.
+
+Les étapes imbriquées sont permises (Server-Timing liste chaque
+mesure séparément). En dehors d'une requête instrumentée (scoring
+en masse, benchmarks), etape() ne mesure rien.
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+
+# Bornes des histogrammes, en secondes (étapes de quelques µs
+# jusqu'aux stress-tests de plusieurs secondes)
+BORNES = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+          0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NUL     = nullcontext()
+_mesures = contextvars.ContextVar("mesures_requete", default=None)
+
+
+# ─────────────────────────────────────────────────────────────
+# ÉTAPES D'UNE REQUÊTE
+# ─────────────────────────────────────────────────────────────
+
+class _Chrono:
+    __slots__ = ("nom", "mesures", "debut")
+
+    def __init__(self, nom, mesures):
+        self.nom     = nom
+        self.mesures = mesures
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.mesures.append((self.nom, time.perf_counter() - self.debut))
+        return False
+
+
+def etape(nom: str):
+    """Contexte chronométrant une étape de la requête en cours (ou rien)."""
+    mesures = _mesures.get()
+    if mesures is None:
+        return _NUL
+    return _Chrono(nom, mesures)
+
+
+def demarrer_requete():
+    """Ouvre la liste des mesures de la requête ; retourne l'instant de départ."""
+    _mesures.set([])
+    return time.perf_counter()
+
+
+def terminer_requete() -> list:
+    """Ferme la requête et retourne ses mesures [(étape, secondes), …]."""
+    mesures = _mesures.get()
+    _mesures.set(None)
+    return mesures or []
+
+
+def server_timing(mesures: list, total: float) -> str:
+    """Valeur de l'en-tête Server-Timing (durées en millisecondes)."""
+    parties = [f"{nom};dur={duree * 1000:.3f}" for nom, duree in mesures]
+    parties.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parties)
+
+
+# ─────────────────────────────────────────────────────────────
+# HISTOGRAMMES ET EXPORT PROMETHEUS
+# ─────────────────────────────────────────────────────────────
+
+class Histogramme:
+    """Compteurs par intervalle (non cumulés : cumul fait à l'export)."""
+
+    __slots__ = ("compteurs", "somme", "n")
+
+    def __init__(self):
+        self.compteurs = [0] * (len(BORNES) + 1)   # dernier = +Inf
+        self.somme     = 0.0
+        self.n         = 0
+
+    def observer(self, secondes: float):
+        # le="x" est inclusif : première borne ≥ secondes
+        self.compteurs[bisect_left(BORNES, secondes)] += 1
+        self.somme += secondes
+        self.n     += 1
+
+
+def _label(valeur: str) -> str:
+    return str(valeur).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+class Metriques:
+    """Histogrammes par route (durée totale) et par (route, étape)."""
+
+    def __init__(self, prefixe: str = "finance"):
+        self.prefixe   = prefixe
+        self._verrou   = threading.Lock()
+        self._requetes = {}    # route → Histogramme
+        self._etapes   = {}    # (route, étape) → Histogramme
+        self._statuts  = {}    # (route, code) → nombre
+
+    def observer_requete(self, route: str, statut: int, total: float, mesures=()):
+        with self._verrou:
+            h = self._requetes.get(route)
+            if h is None:
+                h = self._requetes[route] = Histogramme()
+            h.observer(total)
+            cle = (route, statut)
+            self._statuts[cle] = self._statuts.get(cle, 0) + 1
+            for nom, duree in mesures:
+                h = self._etapes.get((route, nom))
+                if h is None:
+                    h = self._etapes[(route, nom)] = Histogramme()
+                h.observer(duree)
+
+    def vider(self):
+        with self._verrou:
+            self._requetes.clear()
+            self._etapes.clear()
+            self._statuts.clear()
+
+    @staticmethod
+    def _histogramme(lignes, nom, labels, compteurs, somme, n):
+        cumul = 0
+        for borne, compte in zip(BORNES + ("+Inf",), compteurs):
+            cumul += compte
+            lignes.append(f'{nom}_bucket{{{labels},le="{borne}"}} {cumul}')
+        lignes.append(f"{nom}_sum{{{labels}}} {somme:.9f}")
+        lignes.append(f"{nom}_count{{{labels}}} {n}")
+
+    def exporter(self, caches: dict = None) -> str:
+        """
+        Texte au format d'exposition Prometheus (version 0.0.4).
+        caches : {nom: {"hits", "misses", "taille", "max"}} (lru_cache).
+        """
+        # Copie sous verrou, mise en forme hors verrou
+        with self._verrou:
+            requetes = {r: (list(h.compteurs), h.somme, h.n) for r, h in self._requetes.items()}
+            etapes   = {c: (list(h.compteurs), h.somme, h.n) for c, h in self._etapes.items()}
+            statuts  = dict(self._statuts)
+
+        p = self.prefixe
+        lignes = [f"# HELP {p}_requete_duree_secondes Durée des requêtes par route.",
+                  f"# TYPE {p}_requete_duree_secondes histogram"]
+        for route in sorted(requetes):
+            self._histogramme(lignes, f"{p}_requete_duree_secondes",
+                              f'route="{_label(route)}"', *requetes[route])
+
+        lignes += [f"# HELP {p}_etape_duree_secondes Durée de chaque étape du pipeline par route.",
+                   f"# TYPE {p}_etape_duree_secondes histogram"]
+        for route, nom in sorted(etapes):
+            self._histogramme(lignes, f"{p}_etape_duree_secondes",
+                              f'route="{_label(route)}",etape="{_label(nom)}"',
+                              *etapes[(route, nom)])
+
+        lignes += [f"# HELP {p}_requetes_total Requêtes servies par route et code HTTP.",
+                   f"# TYPE {p}_requetes_total counter"]
+        for (route, code), n in sorted(statuts.items()):
+            lignes.append(f'{p}_requetes_total{{route="{_label(route)}",code="{code}"}} {n}')
+
+        for cle, type_, aide in (("hits", "counter", "Appels servis par le cache."),
+                                 ("misses", "counter", "Appels calculés (absents du cache)."),
+                                 ("taille", "gauge", "Entrées en cache.")) if caches else ():
+            nom = f"{p}_cache_{cle}" + ("_total" if type_ == "counter" else "")
+            lignes += [f"# HELP {nom} {aide}", f"# TYPE {nom} {type_}"]
+            for cache, stats in sorted(caches.items()):
+                lignes.append(f'{nom}{{cache="{_label(cache)}"}} {stats[cle]}')
+        return "\n".join(lignes) + "\n"
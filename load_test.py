@@ -0,0 +1,272 @@
+"""
+Test de charge local — AI Inclusive Finance
+═══════════════════════════════════════════
+
+Rejoue le parcours réel des utilisateurs, avec des profils
+synthétiques (benchmarks.profils_djibouti) :
+
+    GET /banks → GET /dashboard?banque=… → POST /analyse
+              → POST /coach → POST /forecast
+
+chaque étape POST renvoyant le même formulaire. N utilisateurs
+virtuels (threads, connexion keep-alive chacun) enchaînent les
+parcours pendant une durée donnée.
+
+Le serveur est lancé localement dans un processus séparé (le
+générateur de charge ne partage pas le GIL de l'application) :
+serveur Werkzeug multi-thread par défaut, ou Gunicorn s'il est
+installé (--gunicorn, pour dimensionner workers et threads).
+--url vise un serveur déjà démarré. Aucun accès réseau : tout
+passe par 127.0.0.1.
+
+Rapport : débit (parcours/s, requêtes/s), latences p50/p95/p99
+et taux d'erreur par route, en texte et en JSON (-o).
+
+Usage :
+    python load_test.py --utilisateurs 16 --duree 30
+    python load_test.py --gunicorn --workers 4 --threads 2 -u 32 -d 60 -o charge.json
+    python load_test.py --url http://127.0.0.1:5000 -u 8
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks import profils_djibouti
+
+
+# Étapes du parcours : (libellé de la route, méthode, chemin, formulaire envoyé ?)
+PARCOURS = (
+    ("GET /banks",      "GET",  "/banks",     False),
+    ("GET /dashboard",  "GET",  "/dashboard", False),
+    ("POST /analyse",   "POST", "/analyse",   True),
+    ("POST /coach",     "POST", "/coach",     True),
+    ("POST /forecast",  "POST", "/forecast",  True),
+)
+
+EN_TETES = {
+    "Accept":          "text/html,application/json",
+    "Accept-Encoding": "br, gzip",
+    "User-Agent":      "load_test/1.0",
+}
+
+
+# ─────────────────────────────────────────────────────────────
+# SERVEUR LOCAL
+# ─────────────────────────────────────────────────────────────
+
+def _port_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def demarrer_serveur(port: int, gunicorn: bool = False, workers: int = 2,
+                     threads: int = 4) -> subprocess.Popen:
+    """Lance app.py dans un processus séparé et attend qu'il réponde."""
+    env = {**os.environ, "DEBUG": "false"}
+    if gunicorn:
+        commande = [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}",
+                    "--workers", str(workers), "--threads", str(threads), "--log-level", "warning"]
+    else:
+        commande = [sys.executable, "-c",
+                    "import sys; from werkzeug.serving import run_simple; from app import app; "
+                    "run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)", str(port)]
+    serveur = subprocess.Popen(commande, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if serveur.poll() is not None:
+            raise RuntimeError(f"le serveur s'est arrêté au démarrage (code {serveur.returncode})")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return serveur
+        except OSError:
+            time.sleep(0.1)
+    serveur.terminate()
+    raise RuntimeError("le serveur local ne répond pas après 30 s")
+
+
+# ─────────────────────────────────────────────────────────────
+# UTILISATEURS VIRTUELS
+# ─────────────────────────────────────────────────────────────
+
+class Mesures:
+    """Latences et erreurs par route, partagées entre utilisateurs virtuels."""
+
+    def __init__(self):
+        self._verrou   = threading.Lock()
+        self.latences  = {route: [] for route, *_ in PARCOURS}
+        self.erreurs   = {route: {} for route, *_ in PARCOURS}
+        self.parcours  = 0
+
+    def ajouter(self, route: str, secondes: float, erreur: str = None):
+        with self._verrou:
+            self.latences[route].append(secondes)
+            if erreur:
+                self.erreurs[route][erreur] = self.erreurs[route].get(erreur, 0) + 1
+
+    def parcours_termine(self):
+        with self._verrou:
+            self.parcours += 1
+
+
+def _requete(connexion, methode, chemin, corps=None):
+    en_tetes = dict(EN_TETES)
+    if corps is not None:
+        en_tetes["Content-Type"] = "application/x-www-form-urlencoded"
+    connexion.request(methode, chemin, body=corps, headers=en_tetes)
+    reponse = connexion.getresponse()
+    reponse.read()                      # page entière (y compris en flux)
+    return reponse.status
+
+
+def utilisateur(hote, port, profils, fin, mesures, graine, pause):
+    """Enchaîne des parcours complets jusqu'à `fin` (time.monotonic)."""
+    rng = random.Random(graine)
+    connexion = http.client.HTTPConnection(hote, port, timeout=60)
+    try:
+        while time.monotonic() < fin:
+            profil = rng.choice(profils)
+            corps  = urlencode(profil)
+            banque = profil["banque"] or "bcimr"
+            for route, methode, chemin, formulaire in PARCOURS:
+                if chemin == "/dashboard":
+                    chemin = f"{chemin}?banque={banque}"
+                debut = time.perf_counter()
+                try:
+                    statut = _requete(connexion, methode, chemin, corps if formulaire else None)
+                    # Une route POST qui redirige a rencontré une erreur (flash + redirection)
+                    erreur = None if statut == 200 or (statut == 304 and methode == "GET") else f"HTTP {statut}"
+                except (OSError, http.client.HTTPException) as e:
+                    erreur = type(e).__name__
+                    connexion.close()
+                    connexion = http.client.HTTPConnection(hote, port, timeout=60)
+                mesures.ajouter(route, time.perf_counter() - debut, erreur)
+                if pause:
+                    time.sleep(rng.uniform(0, 2 * pause))
+            mesures.parcours_termine()
+    finally:
+        connexion.close()
+
+
+# ─────────────────────────────────────────────────────────────
+# RAPPORT
+# ─────────────────────────────────────────────────────────────
+
+def _centile(tries: list, p: float) -> float:
+    """Centile au rang le plus proche sur une liste triée."""
+    if not tries:
+        return 0.0
+    return tries[max(0, math.ceil(p / 100 * len(tries)) - 1)]
+
+
+def rapport(mesures: Mesures, duree: float, config: dict) -> dict:
+    routes = {}
+    for route, latences in mesures.latences.items():
+        tries   = sorted(latences)
+        erreurs = sum(mesures.erreurs[route].values())
+        routes[route] = {
+            "requetes":    len(tries),
+            "erreurs":     erreurs,
+            "taux_erreur": round(erreurs / len(tries), 4) if tries else 0.0,
+            "detail":      mesures.erreurs[route],
+            "p50_ms":      round(_centile(tries, 50) * 1000, 2),
+            "p95_ms":      round(_centile(tries, 95) * 1000, 2),
+            "p99_ms":      round(_centile(tries, 99) * 1000, 2),
+            "max_ms":      round(tries[-1] * 1000, 2) if tries else 0.0,
+        }
+    total = sum(r["requetes"] for r in routes.values())
+    return {
+        "config":        config,
+        "duree_s":       round(duree, 2),
+        "parcours":      mesures.parcours,
+        "parcours_s":    round(mesures.parcours / duree, 2),
+        "requetes":      total,
+        "requetes_s":    round(total / duree, 2),
+        "taux_erreur":   round(sum(r["erreurs"] for r in routes.values()) / total, 4) if total else 0.0,
+        "routes":        routes,
+    }
+
+
+def afficher(resultat: dict):
+    print(f"\n{resultat['parcours']} parcours, {resultat['requetes']} requêtes en "
+          f"{resultat['duree_s']} s — {resultat['parcours_s']} parcours/s, "
+          f"{resultat['requetes_s']} req/s, erreurs {resultat['taux_erreur']:.2%}\n")
+    print(f"  {'route':<18} {'n':>7} {'err %':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for route, r in resultat["routes"].items():
+        print(f"  {route:<18} {r['requetes']:>7} {r['taux_erreur']:>7.2%} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+        for erreur, n in r["detail"].items():
+            print(f"  {'':<18} {n:>7} × {erreur}")
+
+
+def executer(url: str, utilisateurs: int, duree: float, pause: float = 0.0,
+             profils: int = 500, graine: int = 2024) -> dict:
+    cible  = urlsplit(url)
+    lot    = profils_djibouti(profils, seed=graine, projet=True)
+    mesures = Mesures()
+    fin    = time.monotonic() + duree
+    debut  = time.perf_counter()
+    threads = [threading.Thread(target=utilisateur, daemon=True,
+                                args=(cible.hostname, cible.port, lot, fin, mesures, graine + i, pause))
+               for i in range(utilisateurs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    config = {"url": url, "utilisateurs": utilisateurs, "duree": duree,
+              "pause": pause, "profils": profils}
+    return rapport(mesures, time.perf_counter() - debut, config)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Test de charge local (parcours utilisateur complet).")
+    parser.add_argument("-u", "--utilisateurs", type=int, default=8, help="utilisateurs simultanés (défaut : 8)")
+    parser.add_argument("-d", "--duree", type=float, default=20, help="durée en secondes (défaut : 20)")
+    parser.add_argument("--pause", type=float, default=0.0,
+                        help="temps de réflexion moyen entre deux étapes, en secondes")
+    parser.add_argument("--profils", type=int, default=500, help="profils synthétiques distincts")
+    parser.add_argument("--url", help="serveur déjà démarré (sinon lancé localement)")
+    parser.add_argument("--gunicorn", action="store_true", help="lancer Gunicorn plutôt que Werkzeug")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("-o", "--sortie", help="fichier JSON du rapport")
+    args = parser.parse_args(argv)
+
+    serveur = None
+    url = args.url
+    if url is None:
+        port = _port_libre()
+        serveur = demarrer_serveur(port, args.gunicorn, args.workers, args.threads)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        print(f"{args.utilisateurs} utilisateurs pendant {args.duree} s → {url}", file=sys.stderr)
+        resultat = executer(url, args.utilisateurs, args.duree, args.pause, args.profils)
+    finally:
+        if serveur is not None:
+            serveur.terminate()
+            serveur.wait(timeout=10)
+
+    if serveur is not None:
+        resultat["config"]["serveur"] = (f"gunicorn {args.workers}×{args.threads}"
+                                         if args.gunicorn else "werkzeug (threaded)")
+    afficher(resultat)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(resultat, f, indent=2, ensure_ascii=False)
+    return 1 if resultat["requetes"] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,9 @@
+import math
+
+import numpy as np
+from functools import cached_property
+
+
 class UserData:
     """
     Modèle central de données utilisateur.
@@ -10,7 +16,8 @@ class UserData:
        conventions et les normalise en un seul nom interne.
 
     2. VALIDATION : Les valeurs négatives sont ramenées à 0.
-       Une ValueError est levée si les types sont invalides.
+       Une ValueError est levée si les types sont invalides
+       ou si un montant (ou l'horizon) n'est pas fini.
 
     3. CHAMPS ENRICHIS : On stocke maintenant aussi l'objectif,
        l'horizon, la banque choisie et la situation pro —
@@ -19,8 +26,24 @@ class UserData:
     4. PROPRIÉTÉS CALCULÉES : solde, taux_epargne et
        mois_securite sont calculés une seule fois ici
        et réutilisables partout sans recalcul.
+
+    5. OBJET IMMUABLE ET COMPACT : __slots__ (pas de __dict__),
+       métriques dérivées calculées une fois dans __init__ et
+       stockées comme de simples attributs. Toute modification
+       après construction lève une AttributeError — les moteurs
+       peuvent partager l'objet sans copie.
     """
 
+    _CHAMPS = (
+        "revenu", "depenses", "epargne", "objectif", "horizon", "banque",
+        "situation", "autres_revenus", "objectif_epargne", "pays",
+    )
+    _DERIVEES = (
+        "revenu_total", "solde", "taux_epargne", "ratio_depenses",
+        "mois_securite", "capacite_emprunt",
+    )
+    __slots__ = _CHAMPS + _DERIVEES
+
     def __init__(
         self,
         revenu=0,       # aussi accepté comme "salary"
@@ -34,61 +57,124 @@ class UserData:
         objectif_epargne=0,
         pays=None,
     ):
+        init = object.__setattr__
+
         # ── Conversion et validation ──────────────────────────
         try:
-            self.revenu          = max(0.0, float(revenu))
-            self.depenses        = max(0.0, float(depenses))
-            self.epargne         = max(0.0, float(epargne))
-            self.autres_revenus  = max(0.0, float(autres_revenus or 0))
-            self.objectif_epargne = max(0.0, float(objectif_epargne or 0))
-            self.horizon         = max(1, int(horizon or 12))
-        except (ValueError, TypeError) as e:
+            revenu, depenses, epargne = float(revenu), float(depenses), float(epargne)
+            if not all(map(math.isfinite, (revenu, depenses, epargne))):
+                raise ValueError("montant non fini (NaN ou infini)")
+            revenu           = max(0.0, revenu)
+            depenses         = max(0.0, depenses)
+            epargne          = max(0.0, epargne)
+            autres_revenus   = max(0.0, float(autres_revenus or 0))
+            objectif_epargne = max(0.0, float(objectif_epargne or 0))
+            horizon          = max(1, int(horizon or 12))
+        except (ValueError, TypeError, OverflowError) as e:
             raise ValueError(f"Données financières invalides : {e}")
 
+        init(self, "revenu",           revenu)
+        init(self, "depenses",         depenses)
+        init(self, "epargne",          epargne)
+        init(self, "autres_revenus",   autres_revenus)
+        init(self, "objectif_epargne", objectif_epargne)
+        init(self, "horizon",          horizon)
+
         # ── Champs contextuels ────────────────────────────────
-        self.objectif  = objectif  or "epargne"
-        self.banque    = banque
-        self.situation = situation
-        self.pays      = pays
-
-    # ── Propriétés calculées (une seule fois) ─────────────────
-
-    @property
-    def revenu_total(self):
-        """Revenu net + autres revenus."""
-        return self.revenu + self.autres_revenus
-
-    @property
-    def solde(self):
-        """Argent restant après charges."""
-        return self.revenu_total - self.depenses
-
-    @property
-    def taux_epargne(self):
-        """Part du revenu épargnée (0 à 1)."""
-        if self.revenu_total <= 0:
-            return 0.0
-        return max(0.0, self.solde / self.revenu_total)
-
-    @property
-    def ratio_depenses(self):
-        """Part du revenu consommée par les charges (0 à 1)."""
-        if self.revenu_total <= 0:
-            return 1.0
-        return min(1.0, self.depenses / self.revenu_total)
-
-    @property
-    def mois_securite(self):
-        """Nombre de mois de charges couvertes par l'épargne."""
-        if self.depenses <= 0:
-            return 0.0
-        return self.epargne / self.depenses
-
-    @property
-    def capacite_emprunt(self):
-        """Capacité d'emprunt estimée (règle du 33%)."""
-        mensualite_max = self.solde * 0.33
-        return max(0.0, round(mensualite_max * 12 * 10, 2))
+        init(self, "objectif",  objectif or "epargne")
+        init(self, "banque",    banque)
+        init(self, "situation", situation)
+        init(self, "pays",      pays)
+
+        # ── Métriques dérivées (une seule fois) ───────────────
+        # Revenu net + autres revenus
+        revenu_total = revenu + autres_revenus
+        # Argent restant après charges
+        solde = revenu_total - depenses
+        # Part du revenu épargnée (0 à 1)
+        taux_epargne = max(0.0, solde / revenu_total) if revenu_total > 0 else 0.0
+        # Part du revenu consommée par les charges (0 à 1)
+        ratio_depenses = min(1.0, depenses / revenu_total) if revenu_total > 0 else 1.0
+        # Nombre de mois de charges couvertes par l'épargne
+        mois_securite = epargne / depenses if depenses > 0 else 0.0
+        # Capacité d'emprunt estimée (règle du 33%)
+        capacite_emprunt = max(0.0, round(solde * 0.33 * 12 * 10, 2))
+
+        init(self, "revenu_total",     revenu_total)
+        init(self, "solde",            solde)
+        init(self, "taux_epargne",     taux_epargne)
+        init(self, "ratio_depenses",   ratio_depenses)
+        init(self, "mois_securite",    mois_securite)
+        init(self, "capacite_emprunt", capacite_emprunt)
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError(f"UserData est immuable (attribut '{nom}')")
+
+    def __delattr__(self, nom):
+        raise AttributeError(f"UserData est immuable (attribut '{nom}')")
+
+    def __reduce__(self):
+        # Reconstruit via __init__ (pickle ne peut pas passer par __setattr__)
+        return (UserData, tuple(getattr(self, c) for c in self._CHAMPS))
+
+    def __eq__(self, autre):
+        if not isinstance(autre, UserData):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(autre, c) for c in self._CHAMPS)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, c) for c in self._CHAMPS))
+
+    def __repr__(self):
+        return (f"UserData(revenu={self.revenu!r}, depenses={self.depenses!r}, "
+                f"epargne={self.epargne!r}, banque={self.banque!r})")
+
+    @classmethod
+    def from_form(cls, form):
+        """
+        Construit un UserData depuis un mapping de chaînes
+        (formulaire Flask, ligne csv.DictReader…).
+
+        Accepte les deux conventions de noms (revenu/salary…).
+        Lève une ValueError si un champ n'est pas numérique ou si
+        le revenu ou les dépenses ne sont pas strictement positifs.
+        """
+        def texte(key):
+            return (form.get(key) or "").strip()
+
+        def get_float(keys, default=0):
+            for key in keys:
+                val = texte(key)
+                if val:
+                    try:
+                        return float(val)
+                    except ValueError:
+                        raise ValueError(f"Le champ '{key}' doit être un nombre.")
+            return float(default)
+
+        def get_int(keys, default=0):
+            for key in keys:
+                val = texte(key)
+                if val:
+                    try: return int(val)
+                    except ValueError: return default
+            return default
+
+        revenu   = get_float(["revenu","salary"], default=0)
+        depenses = get_float(["depenses","expenses"], default=0)
+        epargne  = get_float(["epargne","savings"], default=0)
+        if revenu   <= 0: raise ValueError("Le revenu mensuel doit être supérieur à 0.")
+        if depenses <= 0: raise ValueError("Les dépenses mensuelles doivent être supérieures à 0.")
+        return cls(
+            revenu=revenu, depenses=depenses, epargne=epargne,
+            autres_revenus=get_float(["autres_revenus"], default=0),
+            objectif_epargne=get_float(["objectif_epargne"], default=0),
+            horizon=get_int(["horizon"], default=12),
+            banque=texte("banque") or None,
+            situation=texte("situation") or None,
+            pays=texte("pays") or None,
+            objectif=form.get("objectif") or "epargne",
+        )
 
     def to_dict(self):
         """Sérialisation complète pour debug ou stockage futur."""
@@ -108,4 +194,104 @@ class UserData:
             "banque":           self.banque,
             "situation":        self.situation,
             "pays":             self.pays,
-        }
\ No newline at end of file
+        }
+
+
+def _positif(valeurs) -> np.ndarray:
+    """Équivalent vectorisé de max(0.0, float(x)) (NaN → 0 comme max())."""
+    arr = np.asarray(valeurs, dtype=np.float64)
+    return np.where(arr > 0, arr, 0.0)
+
+
+def _diviser(num: np.ndarray, den: np.ndarray, masque: np.ndarray) -> np.ndarray:
+    """num / den là où masque est vrai, 0 ailleurs (sans avertissement numpy)."""
+    return np.divide(num, den, out=np.zeros_like(num), where=masque)
+
+
+class UserBatch:
+    """
+    N profils en colonnes numpy contiguës (struct-of-arrays).
+
+    Équivalent vectorisé de UserData pour les traitements de masse :
+    mêmes normalisations (négatifs → 0, horizon nul → 12, minimum 1)
+    et mêmes métriques dérivées, calculées une fois pour tout le lot,
+    sans créer un objet Python par client.
+
+    Les colonnes contextuelles (banque, situation, pays, objectif)
+    sont optionnelles et stockées en tableaux d'objets.
+    """
+
+    def __init__(self, revenu, depenses, epargne, autres_revenus=0,
+                 objectif_epargne=0, horizon=12, banque=None,
+                 situation=None, pays=None, objectif=None):
+        # Mêmes refus que UserData : un NaN ne doit pas devenir 0 (ou, pour
+        # l'horizon, un entier arbitraire après conversion)
+        for nom, valeurs in (("revenu", revenu), ("depenses", depenses),
+                             ("epargne", epargne), ("horizon", horizon)):
+            try:
+                finies = np.isfinite(np.asarray(valeurs, dtype=np.float64)).all()
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Données financières invalides : {e}") from None
+            if not finies:
+                raise ValueError(f"Données financières invalides : {nom} non fini (NaN ou infini)")
+        colonnes = np.broadcast_arrays(
+            _positif(revenu), _positif(depenses), _positif(epargne),
+            _positif(autres_revenus), _positif(objectif_epargne),
+            np.asarray(horizon, dtype=np.float64),
+        )
+        (self.revenu, self.depenses, self.epargne, self.autres_revenus,
+         self.objectif_epargne, horizon) = (np.ascontiguousarray(c) for c in colonnes)
+        self.horizon = np.maximum(1, np.where(horizon == 0, 12, np.trunc(horizon))).astype(np.int64)
+
+        n = len(self.revenu)
+        self.banque    = None if banque    is None else np.broadcast_to(np.asarray(banque, dtype=object), n)
+        self.situation = None if situation is None else np.broadcast_to(np.asarray(situation, dtype=object), n)
+        self.pays      = None if pays      is None else np.broadcast_to(np.asarray(pays, dtype=object), n)
+        self.objectif  = None if objectif  is None else np.broadcast_to(np.asarray(objectif, dtype=object), n)
+
+        # ── Métriques dérivées (cf. UserData) ─────────────────
+        self.revenu_total = self.revenu + self.autres_revenus
+        self.solde        = self.revenu_total - self.depenses
+        a_revenu          = self.revenu_total > 0
+        a_depenses        = self.depenses > 0
+
+        self.taux_epargne   = np.maximum(0.0, _diviser(self.solde, self.revenu_total, a_revenu))
+        self.ratio_depenses = np.where(
+            a_revenu,
+            np.minimum(1.0, _diviser(self.depenses, self.revenu_total, a_revenu)),
+            1.0,
+        )
+        self.mois_securite  = _diviser(self.epargne, self.depenses, a_depenses)
+
+    @classmethod
+    def from_users(cls, users):
+        """Construit un lot à partir d'une séquence de UserData."""
+        users = list(users)
+        colonnes = {c: [getattr(u, c) for u in users] for c in UserData._CHAMPS}
+        return cls(**colonnes)
+
+    def __len__(self):
+        return len(self.revenu)
+
+    @cached_property
+    def capacite_emprunt(self) -> np.ndarray:
+        """
+        Capacité d'emprunt (règle du 33%), calculée à la demande.
+        Arrondi Python (et non np.round) pour rester identique au
+        chemin scalaire au centime près.
+        """
+        brut = self.solde * 0.33 * 12 * 10
+        return np.maximum(0.0, np.fromiter((round(x, 2) for x in brut.tolist()),
+                                           dtype=np.float64, count=len(brut)))
+
+    def user(self, i: int) -> UserData:
+        """Matérialise le i-ème profil en UserData (pour le pipeline scalaire)."""
+        def ctx(col):
+            return None if col is None else col[i]
+        return UserData(
+            revenu=self.revenu[i], depenses=self.depenses[i], epargne=self.epargne[i],
+            objectif=ctx(self.objectif), horizon=int(self.horizon[i]),
+            banque=ctx(self.banque), situation=ctx(self.situation),
+            autres_revenus=self.autres_revenus[i],
+            objectif_epargne=self.objectif_epargne[i], pays=ctx(self.pays),
+        )
@@ -0,0 +1,334 @@
+"""
+Profils comme le vôtre — AI Inclusive Finance
+═════════════════════════════════════════════
+
+Pour un profil donné, les K profils anonymisés les plus proches et
+ce qu'ils sont devenus (score, épargne quelques mois plus tard) :
+
+    voisins = index.voisins(user, k=5)
+    # [{"distance": 0.12, "taux_epargne": 18.0, …,
+    #   "progression": {"mois": 11.8, "score_avant": 420, "score_apres": 515, …}}, …]
+
+Source : un historique anonymisé de relevés de clients (CSV, une
+ligne par client et par date, mêmes colonnes que bulk_scoring.py,
+plus `client` — identifiant opaque — et `date` au format ISO).
+Chaque relevé suivi d'un relevé plus récent du même client devient
+un point de l'index, avec sa progression jusqu'au dernier relevé.
+Les identifiants ne sont pas conservés.
+
+Espace de similarité : taux_epargne, ratio_depenses, mois_securite
+(plafonné à MOIS_MAX) et solde (log signé), centrés-réduits avec la
+moyenne et l'écart-type de l'historique.
+
+Index, en deux niveaux :
+  • base : KDTree scikit-learn construit hors ligne, sérialisé avec
+    joblib et chargé en mémoire partagée (mmap_mode="r") : ouverture
+    en quelques millisecondes, pages lues à la demande et partagées
+    entre workers ;
+  • complément : les points ajoutés depuis (fichier .delta.npz,
+    petit), parcourus par force brute numpy à chaque requête.
+Les K plus proches des deux niveaux sont fusionnés. Les fichiers
+sont surveillés (même principe que catalogue.py) : un complément
+modifié est relu seul ; compacter reconstruit la base avec le
+complément quand celui-ci grossit.
+
+    python neighbours.py construire historique.csv -o voisins.joblib
+    python neighbours.py ajouter releves_recents.csv --index voisins.joblib
+    python neighbours.py compacter --index voisins.joblib    # base + complément
+"""
+
+import argparse
+import csv
+import logging
+import os
+import sys
+import time
+from datetime import date
+
+import joblib
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from ai_engine import analyse_financiere_batch
+from models import UserBatch
+
+
+MOIS_MAX            = 36.0
+INTERVALLE_CONTROLE = float(os.environ.get("VOISINS_INTERVALLE", 10.0))   # secondes
+VERSION_FORMAT      = 1
+
+# Colonnes numériques d'un relevé, dans l'ordre de UserBatch
+_CHAMPS_NUMERIQUES = ("revenu", "depenses", "epargne", "autres_revenus",
+                      "objectif_epargne", "horizon")
+
+# Colonnes des points (base et complément), hors caractéristiques
+_COLONNES = ("score_avant", "score_apres", "epargne_avant", "epargne_apres", "mois")
+
+journal = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────
+# CARACTÉRISTIQUES
+# ─────────────────────────────────────────────────────────────
+
+def caracteristiques(taux_epargne, ratio_depenses, mois_securite, solde) -> np.ndarray:
+    """Coordonnées brutes (n, 4) avant centrage-réduction."""
+    solde = np.asarray(solde, dtype=np.float64)
+    return np.column_stack((
+        np.asarray(taux_epargne, dtype=np.float64),
+        np.asarray(ratio_depenses, dtype=np.float64),
+        np.minimum(np.asarray(mois_securite, dtype=np.float64), MOIS_MAX),
+        np.sign(solde) * np.log1p(np.abs(solde)),
+    ))
+
+
+def _mois_entre(debut: str, fin: str) -> float:
+    return (date.fromisoformat(fin) - date.fromisoformat(debut)).days / 30.44
+
+
+def points_depuis_historique(fichier) -> dict:
+    """
+    Points indexables d'un historique CSV : un par relevé suivi d'un
+    relevé plus récent du même client (progression jusqu'au dernier).
+    Lignes sans client, à la date ou aux montants invalides ignorées.
+    Retourne {"brut": (n, 4), colonnes…}.
+    """
+    releves = {}
+    for ligne in csv.DictReader(fichier, restval=""):
+        client, jour = ligne.get("client", "").strip(), ligne.get("date", "").strip()
+        try:
+            date.fromisoformat(jour)
+            valeurs = tuple(float(ligne.get(c) or 0) for c in _CHAMPS_NUMERIQUES)
+        except ValueError:
+            continue
+        if client:
+            releves.setdefault(client, []).append((jour, valeurs, ligne.get("banque") or None))
+
+    avant, apres, mois = [], [], []
+    for suivis in releves.values():
+        if len(suivis) < 2:
+            continue
+        suivis.sort(key=lambda r: r[0])
+        dernier = suivis[-1]
+        for releve in suivis[:-1]:
+            if releve[0] < dernier[0]:
+                avant.append(releve)
+                apres.append(dernier)
+                mois.append(_mois_entre(releve[0], dernier[0]))
+
+    def lot(releves):
+        numeriques = np.array([r[1] for r in releves], dtype=np.float64)
+        numeriques = numeriques.reshape(-1, len(_CHAMPS_NUMERIQUES))
+        return UserBatch(*numeriques.T, banque=[r[2] for r in releves])
+
+    lot_avant, lot_apres = lot(avant), lot(apres)
+    return {
+        "brut":          caracteristiques(lot_avant.taux_epargne, lot_avant.ratio_depenses,
+                                          lot_avant.mois_securite, lot_avant.solde),
+        "score_avant":   analyse_financiere_batch(lot_avant)["score"].astype(np.int16),
+        "score_apres":   analyse_financiere_batch(lot_apres)["score"].astype(np.int16),
+        "epargne_avant": lot_avant.epargne,
+        "epargne_apres": lot_apres.epargne,
+        "mois":          np.array(mois, dtype=np.float32),
+    }
+
+
+def _concatener(*blocs) -> dict:
+    blocs = [b for b in blocs if b is not None and len(b["brut"])]
+    if not blocs:
+        return {"brut": np.zeros((0, 4)), **{c: np.zeros(0) for c in _COLONNES}}
+    return {c: np.concatenate([b[c] for b in blocs]) for c in ("brut",) + _COLONNES}
+
+
+# ─────────────────────────────────────────────────────────────
+# FICHIERS
+# ─────────────────────────────────────────────────────────────
+
+def chemin_complement(index: str) -> str:
+    return index + ".delta.npz"
+
+
+def construire(points: dict, chemin: str, leaf_size: int = 40) -> int:
+    """Écrit la base (KDTree + colonnes) ; le complément éventuel est supprimé."""
+    brut = points["brut"]
+    if len(brut) == 0:
+        raise ValueError("aucun relevé suivi : index vide")
+    centre  = brut.mean(axis=0)
+    echelle = brut.std(axis=0)
+    echelle[echelle == 0] = 1.0
+    base = {
+        "version": VERSION_FORMAT,
+        "centre":  centre,
+        "echelle": echelle,
+        "arbre":   KDTree((brut - centre) / echelle, leaf_size=leaf_size),
+        **{c: np.ascontiguousarray(points[c]) for c in ("brut",) + _COLONNES},
+    }
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    joblib.dump(base, temporaire)
+    os.replace(temporaire, chemin)
+    if os.path.exists(chemin_complement(chemin)):
+        os.remove(chemin_complement(chemin))
+    return len(brut)
+
+
+def lire_complement(index: str):
+    chemin = chemin_complement(index)
+    if not os.path.exists(chemin):
+        return None
+    with np.load(chemin) as donnees:
+        return {c: donnees[c] for c in ("brut",) + _COLONNES}
+
+
+def ajouter(points: dict, index: str) -> int:
+    """Ajoute des points au complément de `index` ; retourne sa taille."""
+    complement = _concatener(lire_complement(index), points)
+    temporaire = f"{chemin_complement(index)}.{os.getpid()}.tmp.npz"
+    np.savez(temporaire, **complement)
+    os.replace(temporaire, chemin_complement(index))
+    return len(complement["brut"])
+
+
+def charger_base(chemin: str) -> dict:
+    """Base en mémoire partagée (tableaux numpy en lecture seule, mmap)."""
+    base = joblib.load(chemin, mmap_mode="r")
+    if not isinstance(base, dict) or base.get("version") != VERSION_FORMAT:
+        raise ValueError(f"{chemin} : format d'index inconnu")
+    # Petits tableaux lus à chaque requête : copiés en mémoire (les
+    # opérations sur un memmap rendent des memmap, nettement plus lents)
+    base["centre"], base["echelle"] = np.array(base["centre"]), np.array(base["echelle"])
+    return base
+
+
+# ─────────────────────────────────────────────────────────────
+# INDEX EN SERVICE
+# ─────────────────────────────────────────────────────────────
+
+class ProfilsVoisins:
+    """Base KDTree (mmap) + complément en force brute, rechargés à chaud."""
+
+    def __init__(self, chemin: str, intervalle: float = INTERVALLE_CONTROLE):
+        self.chemin      = chemin
+        self.intervalle  = intervalle
+        self.chargements = 0
+        self.erreur      = None
+        self._prochain   = time.monotonic() + intervalle
+        self._signatures = (None, None)
+        self._etat       = None      # (base, complément, complément centré-réduit)
+        self.recharger_si_modifie(forcer=True)
+        if self._etat is None:
+            raise ValueError(f"index de profils illisible : {self.erreur}")
+
+    def _signer(self, chemin):
+        try:
+            st = os.stat(chemin)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def recharger_si_modifie(self, forcer: bool = False) -> bool:
+        """
+        Relit la base et/ou le complément s'ils ont changé sur disque
+        (au plus une vérification par intervalle). Un fichier illisible
+        est refusé : l'index précédent reste en service.
+        """
+        maintenant = time.monotonic()
+        if not forcer and maintenant < self._prochain:
+            return False
+        self._prochain = maintenant + self.intervalle
+        signatures = (self._signer(self.chemin), self._signer(chemin_complement(self.chemin)))
+        if signatures == self._signatures and not forcer:
+            return False
+        try:
+            base = (self._etat[0] if self._etat is not None and signatures[0] == self._signatures[0]
+                    and not forcer else charger_base(self.chemin))
+            complement = lire_complement(self.chemin)
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            self.erreur = str(e)
+            self._signatures = signatures      # signalé une fois par version des fichiers
+            journal.error("Index des profils voisins non rechargé : %s", e)
+            return False
+        reduit = None
+        if complement is not None and len(complement["brut"]):
+            reduit = (complement["brut"] - base["centre"]) / base["echelle"]
+        self._etat       = (base, complement, reduit)
+        self._signatures = signatures
+        self.chargements += 1
+        self.erreur      = None
+        return True
+
+    def voisins(self, user, k: int = 5) -> list:
+        """Les k profils indexés les plus proches de `user`, du plus proche au plus lointain."""
+        base, complement, reduit = self._etat
+        x = (caracteristiques(user.taux_epargne, user.ratio_depenses, user.mois_securite,
+                              user.solde) - base["centre"]) / base["echelle"]
+
+        n_base = len(base["brut"])
+        distances, indices = base["arbre"].query(x, k=min(k, n_base))
+        candidats = [(d, base, i) for d, i in zip(distances[0].tolist(), indices[0].tolist())]
+        if reduit is not None:
+            d2 = ((reduit - x) ** 2).sum(axis=1)
+            proches = np.argpartition(d2, k)[:k] if len(d2) > k else np.arange(len(d2))
+            candidats += [(float(np.sqrt(d2[i])), complement, int(i)) for i in proches]
+        candidats.sort(key=lambda c: c[0])
+        return [_decrire(points, i, d) for d, points, i in candidats[:k]]
+
+    def stats(self) -> dict:
+        base, complement, _ = self._etat
+        return {"chemin": self.chemin, "base": len(base["brut"]),
+                "complement": 0 if complement is None else len(complement["brut"]),
+                "chargements": self.chargements, "erreur": self.erreur}
+
+
+def _decrire(points: dict, i: int, distance: float) -> dict:
+    """Point anonymisé : métriques arrondies et progression, sans identifiant."""
+    taux, ratio, mois_securite, log_solde = (float(v) for v in points["brut"][i])
+    solde = np.sign(log_solde) * np.expm1(abs(log_solde))
+    return {
+        "distance":       round(distance, 3),
+        "taux_epargne":   round(taux * 100, 1),
+        "ratio_depenses": round(ratio * 100, 1),
+        "mois_securite":  round(mois_securite, 1),
+        "solde":          float(round(solde, -3)),
+        "progression": {
+            "mois":          round(float(points["mois"][i]), 1),
+            "score_avant":   int(points["score_avant"][i]),
+            "score_apres":   int(points["score_apres"][i]),
+            "epargne_avant": float(round(points["epargne_avant"][i], -3)),
+            "epargne_apres": float(round(points["epargne_apres"][i], -3)),
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Index des profils voisins (KDTree).")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    p = commandes.add_parser("construire", help="base complète depuis un historique CSV")
+    p.add_argument("historique")
+    p.add_argument("-o", "--index", required=True)
+    p = commandes.add_parser("ajouter", help="relevés récents → complément de l'index")
+    p.add_argument("historique")
+    p.add_argument("--index", required=True)
+    p = commandes.add_parser("compacter", help="reconstruire la base avec son complément")
+    p.add_argument("--index", required=True)
+    args = parser.parse_args(argv)
+
+    if args.commande == "compacter":
+        base = charger_base(args.index)
+        points = _concatener({c: np.asarray(base[c]) for c in ("brut",) + _COLONNES},
+                             lire_complement(args.index))
+    else:
+        with open(args.historique, newline="", encoding="utf-8") as f:
+            points = points_depuis_historique(f)
+
+    if args.commande == "ajouter":
+        n = ajouter(points, args.index)
+        print(f"{len(points['brut']):,} points ajoutés, complément : {n:,} → "
+              f"{chemin_complement(args.index)}", file=sys.stderr)
+        return 0
+    n = construire(points, args.index)
+    print(f"{n:,} profils indexés → {args.index}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Centiles entre pairs — AI Inclusive Finance
+═══════════════════════════════════════════
+
+« 640 / 1000 », mais par rapport à qui ? Pour chaque analyse, on
+situe le score parmi les profils du même pays, de la même situation
+et de la même banque :
+
+    pairs = CENTILES.positionner(user, resultat["score"])
+    # {"tous": {"centile": 62.4, "n": 18_204}, "pays": {...}, ...}
+
+Esquisse de la distribution :
+  Le score est un entier de 0 à SCORE_MAX. Un tableau de
+  SCORE_MAX + 1 compteurs par groupe est donc une esquisse EXACTE
+  (là où un t-digest ou un KLL ne serait qu'approché), de taille
+  fixe (8 Kio par groupe) quelle que soit la population, et
+  fusionnable par simple addition (lots scorés en parallèle,
+  plusieurs fichiers). Le cumul est recalculé après chaque lot
+  ajouté : une consultation coûte O(1) (deux lectures de tableau).
+
+Rang centile = part des pairs au score strictement inférieur, plus
+la moitié des ex æquo. Un groupe de moins de MIN_PAIRS profils n'est
+pas affiché ; au plus MAX_GROUPES groupes sont suivis.
+
+Population :
+  • hors ligne, depuis le journal des analyses ou un portefeuille CSV
+    (mêmes colonnes que bulk_scoring.py), vers un fichier .npz :
+
+        python peer_percentiles.py construire --journal analyses.db -o centiles.npz
+        python peer_percentiles.py construire --clients clients.csv -o centiles.npz
+        python peer_percentiles.py fusionner a.npz b.npz -o centiles.npz
+
+  • en service, les analyses journalisées (persistence.py) depuis le
+    dernier identifiant vu sont ajoutées par le thread d'écriture du
+    journal après chaque lot : aucune E/S dans la requête, et les
+    analyses de tous les workers sont prises en compte.
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+from urllib.parse import quote
+
+import numpy as np
+
+from ai_engine import SCORE_MAX, analyse_financiere_batch
+from models import UserBatch, UserData
+
+
+DIMENSIONS   = ("pays", "situation", "banque")
+TOUS         = ("tous", "")
+MIN_PAIRS    = 30
+MAX_GROUPES  = 1_000
+_SEPARATEUR  = "\x1f"
+
+
+# ─────────────────────────────────────────────────────────────
+# DISTRIBUTION D'UN GROUPE
+# ─────────────────────────────────────────────────────────────
+
+class DistributionScores:
+    """Compteurs exacts par score (0 à SCORE_MAX) et leur cumul."""
+
+    __slots__ = ("comptes", "cumul")
+
+    def __init__(self, comptes=None):
+        self.comptes = (np.zeros(SCORE_MAX + 1, dtype=np.int64) if comptes is None
+                        else np.asarray(comptes, dtype=np.int64).copy())
+        self._cumuler()
+
+    def _cumuler(self):
+        # Nouveau tableau puis une seule affectation : un lecteur voit
+        # l'ancien cumul ou le nouveau, jamais un cumul à moitié calculé
+        self.cumul = np.cumsum(self.comptes)
+
+    @property
+    def n(self) -> int:
+        return int(self.cumul[-1])
+
+    def ajouter(self, scores):
+        self.comptes += np.bincount(np.clip(np.asarray(scores, dtype=np.int64), 0, SCORE_MAX),
+                                    minlength=SCORE_MAX + 1)
+        self._cumuler()
+
+    def fusionner(self, autre: "DistributionScores"):
+        self.comptes += autre.comptes
+        self._cumuler()
+
+    def centile(self, score: int) -> float:
+        """Rang centile de `score` (0 à 100) ; nan si le groupe est vide."""
+        cumul = self.cumul
+        n = cumul[-1]
+        if n == 0:
+            return float("nan")
+        s = min(max(int(score), 0), SCORE_MAX)
+        dessous = cumul[s - 1] if s > 0 else 0
+        egaux   = cumul[s] - dessous
+        return float(100.0 * (dessous + 0.5 * egaux) / n)
+
+    def quantile(self, q: float) -> int:
+        """Plus petit score dont le cumul atteint la proportion q."""
+        cumul = self.cumul
+        return int(np.searchsorted(cumul, max(1, np.ceil(q * cumul[-1])), side="left"))
+
+
+# ─────────────────────────────────────────────────────────────
+# GROUPES DE PAIRS
+# ─────────────────────────────────────────────────────────────
+
+def _groupes(pays, situation, banque):
+    yield TOUS
+    for dimension, valeur in zip(DIMENSIONS, (pays, situation, banque)):
+        if valeur:
+            yield dimension, valeur
+
+
+class CentilesPairs:
+    """Une DistributionScores par groupe (tous, pays, situation, banque)."""
+
+    def __init__(self, min_pairs: int = MIN_PAIRS, max_groupes: int = MAX_GROUPES):
+        self.min_pairs   = min_pairs
+        self.max_groupes = max_groupes
+        self.groupes     = {}          # (dimension, valeur) → DistributionScores
+        self.dernier_id  = 0           # dernière ligne du journal prise en compte
+        self.ignores     = 0           # profils d'un groupe au-delà de max_groupes
+        self._verrou     = threading.Lock()
+
+    # ── Construction ──────────────────────────────────────────
+
+    def ajouter_lot(self, pays, situation, banque, scores):
+        """Ajoute des colonnes de même longueur (valeurs vides : pas de groupe)."""
+        scores = np.asarray(scores, dtype=np.int64)
+        par_groupe = {}
+        for i, ligne in enumerate(zip(pays, situation, banque)):
+            for cle in _groupes(*ligne):
+                par_groupe.setdefault(cle, []).append(i)
+        with self._verrou:
+            for cle, indices in par_groupe.items():
+                distribution = self.groupes.get(cle)
+                if distribution is None:
+                    if len(self.groupes) >= self.max_groupes:
+                        self.ignores += len(indices)
+                        continue
+                    distribution = self.groupes[cle] = DistributionScores()
+                distribution.ajouter(scores[indices])
+
+    def fusionner(self, autre: "CentilesPairs"):
+        with self._verrou:
+            for cle, distribution in autre.groupes.items():
+                if cle in self.groupes:
+                    self.groupes[cle].fusionner(distribution)
+                elif len(self.groupes) < self.max_groupes:
+                    self.groupes[cle] = DistributionScores(distribution.comptes)
+                else:
+                    self.ignores += distribution.n
+            self.dernier_id = max(self.dernier_id, autre.dernier_id)
+
+    def rattraper(self, con, taille_lot: int = 50_000) -> int:
+        """
+        Ajoute les analyses du journal (table analyses) postérieures à
+        dernier_id ; `con` est une connexion SQLite ouverte sur le
+        journal. Retourne le nombre de lignes ajoutées.
+        """
+        total = 0
+        while True:
+            lignes = con.execute(
+                "SELECT id, pays, situation, banque, score FROM analyses "
+                "WHERE id > ? ORDER BY id LIMIT ?", (self.dernier_id, taille_lot)).fetchall()
+            if not lignes:
+                return total
+            ids, pays, situation, banque, scores = zip(*lignes)
+            self.ajouter_lot(pays, situation, banque, scores)
+            self.dernier_id = ids[-1]
+            total += len(lignes)
+
+    # ── Consultation ──────────────────────────────────────────
+
+    def positionner(self, user, score: int) -> dict:
+        """
+        Centile de `score` dans chaque groupe de pairs de `user` assez
+        peuplé : {"tous": {"centile", "n"}, "pays": {"valeur", "centile", "n"}, …}.
+        """
+        pairs = {}
+        for dimension, valeur in _groupes(user.pays, user.situation, user.banque):
+            distribution = self.groupes.get((dimension, valeur))
+            if distribution is None:
+                continue
+            n = distribution.n
+            if n < self.min_pairs:
+                continue
+            pairs[dimension] = {"centile": round(distribution.centile(score), 1), "n": n}
+            if valeur:
+                pairs[dimension]["valeur"] = valeur
+        return pairs
+
+    # ── Fichier .npz ──────────────────────────────────────────
+
+    def sauver(self, chemin: str):
+        with self._verrou:
+            cles = sorted(self.groupes)
+            comptes = (np.stack([self.groupes[c].comptes for c in cles]) if cles
+                       else np.zeros((0, SCORE_MAX + 1), dtype=np.int64))
+        np.savez_compressed(chemin, cles=np.array([_SEPARATEUR.join(c) for c in cles], dtype=str),
+                            comptes=comptes, dernier_id=np.int64(self.dernier_id))
+
+    @classmethod
+    def charger(cls, chemin: str, **options) -> "CentilesPairs":
+        centiles = cls(**options)
+        with np.load(chemin) as donnees:
+            if donnees["comptes"].shape[1:] != (SCORE_MAX + 1,):
+                raise ValueError(f"{chemin} : esquisses pour un autre SCORE_MAX")
+            for cle, comptes in zip(donnees["cles"], donnees["comptes"]):
+                centiles.groupes[tuple(str(cle).split(_SEPARATEUR, 1))] = DistributionScores(comptes)
+            centiles.dernier_id = int(donnees["dernier_id"])
+        return centiles
+
+    def stats(self) -> dict:
+        with self._verrou:
+            tous = self.groupes.get(TOUS)
+            return {"groupes": len(self.groupes), "population": tous.n if tous else 0,
+                    "dernier_id": self.dernier_id, "ignores": self.ignores,
+                    "octets": sum(d.comptes.nbytes + d.cumul.nbytes for d in self.groupes.values())}
+
+
+# ─────────────────────────────────────────────────────────────
+# CONSTRUCTION HORS LIGNE
+# ─────────────────────────────────────────────────────────────
+
+def depuis_clients(fichier, taille_lot: int = 5_000) -> CentilesPairs:
+    """Score un portefeuille CSV lot par lot (vectorisé) ; lignes invalides ignorées."""
+    from bulk_scoring import lire_lots
+
+    centiles = CentilesPairs()
+    for lignes in lire_lots(fichier, taille_lot):
+        users = []
+        for ligne in lignes:
+            try:
+                users.append(UserData.from_form(ligne))
+            except ValueError:
+                continue
+        if users:
+            scores = analyse_financiere_batch(UserBatch.from_users(users))["score"]
+            centiles.ajouter_lot([u.pays for u in users], [u.situation for u in users],
+                                 [u.banque for u in users], scores)
+    return centiles
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Esquisses de scores par groupe de pairs.")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    p = commandes.add_parser("construire", help="depuis le journal des analyses ou un CSV")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("--journal", help="base SQLite du journal (JOURNAL_DB)")
+    source.add_argument("--clients", help="portefeuille CSV (colonnes de bulk_scoring.py)")
+    p.add_argument("-o", "--sortie", required=True)
+    p = commandes.add_parser("fusionner", help="additionner plusieurs fichiers .npz")
+    p.add_argument("fichiers", nargs="+")
+    p.add_argument("-o", "--sortie", required=True)
+    p = commandes.add_parser("afficher", help="résumé d'un fichier .npz")
+    p.add_argument("fichier")
+    args = parser.parse_args(argv)
+
+    if args.commande == "afficher":
+        centiles = CentilesPairs.charger(args.fichier)
+        for (dimension, valeur), d in sorted(centiles.groupes.items()):
+            print(f"  {dimension:<10} {valeur:<16} n={d.n:>9,}  P25={d.quantile(0.25):>4}  "
+                  f"P50={d.quantile(0.5):>4}  P75={d.quantile(0.75):>4}")
+        return 0
+
+    if args.commande == "fusionner":
+        centiles = CentilesPairs(max_groupes=sys.maxsize)
+        for chemin in args.fichiers:
+            centiles.fusionner(CentilesPairs.charger(chemin))
+    elif args.journal:
+        centiles = CentilesPairs(max_groupes=sys.maxsize)
+        con = sqlite3.connect(f"file:{quote(args.journal)}?mode=ro", uri=True)
+        try:
+            centiles.rattraper(con)
+        finally:
+            con.close()
+    else:
+        with open(args.clients, newline="", encoding="utf-8") as f:
+            centiles = depuis_clients(f)
+    centiles.sauver(args.sortie)
+    stats = centiles.stats()
+    print(f"{stats['population']:,} profils, {stats['groupes']} groupes → {args.sortie}",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
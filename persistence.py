@@ -0,0 +1,300 @@
+"""
+Journal des analyses — AI Inclusive Finance
+═══════════════════════════════════════════
+
+Chaque analyse servie (profil, score, composantes, décision, meilleures
+opportunités) est gardée dans une base SQLite locale, pour le suivi
+de l'usage et le rejeu du trafic :
+
+    journal = JournalAnalyses("analyses.db")
+    journal.enregistrer("/coach", user, resultat, reco, coaching)
+
+Écriture différée (write-behind) :
+  • la requête ne fait que déposer un tuple dans une file bornée
+    (put_nowait) : aucune E/S disque, aucune mise en forme ;
+  • un thread d'arrière-plan vide la file par lots de `taille_lot`
+    lignes (ou toutes les `intervalle` secondes) en UNE transaction
+    executemany ;
+  • file pleine (disque lent, pic de trafic) : contre-pression par
+    délestage — l'analyse n'est pas journalisée et le compteur
+    `perdues` augmente ; la requête n'attend jamais le disque ;
+  • une analyse qui ne se met pas en forme est comptée dans `erreurs`
+    sans emporter son lot ; base indisponible : le thread journalise
+    l'erreur et réessaie (attente croissante), il ne s'arrête jamais ;
+  • arrêt du processus : la file restante est écrite (atexit).
+
+Le thread est démarré à la première analyse, dans le processus qui
+l'enregistre (sûr avec les workers Gunicorn forkés). Plusieurs
+workers peuvent partager le même fichier (WAL).
+
+Index : banque, pays et tranche de score (niveau), chacun suivi de
+l'horodatage pour les rapports par période.
+
+abonner(fonction) : fonction(con) est appelée dans le thread
+d'écriture après chaque lot écrit, avec la connexion au journal
+(mise à jour incrémentale des centiles entre pairs, par exemple).
+Elle est d'abord appelée une fois à l'abonnement, sur sa propre
+connexion : le rattrapage du journal existant ne passe jamais par
+le thread d'écriture.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+from bareme import BAREMES
+
+
+journal = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id               INTEGER PRIMARY KEY,
+    horodatage       REAL    NOT NULL,     -- secondes depuis l'epoch (UTC)
+    source           TEXT    NOT NULL,     -- route ou traitement d'origine
+    banque           TEXT,
+    pays             TEXT,
+    situation        TEXT,
+    revenu           REAL    NOT NULL,
+    depenses         REAL    NOT NULL,
+    epargne          REAL    NOT NULL,
+    autres_revenus   REAL    NOT NULL,
+    objectif         TEXT    NOT NULL,
+    objectif_epargne REAL    NOT NULL,
+    horizon          INTEGER NOT NULL,
+    score            INTEGER NOT NULL,
+    niveau           INTEGER NOT NULL,     -- tranche de score (0 à 4, cf. bareme.py)
+    profil           TEXT,
+    c_epargne        INTEGER,
+    c_endettement    INTEGER,
+    c_securite       INTEGER,
+    c_solde          INTEGER,
+    c_bonus          INTEGER,
+    decision         TEXT,
+    decision_type    TEXT,
+    opportunites     TEXT,                 -- JSON : produits et opportunités en tête
+    projet_perso     TEXT                  -- JSON, si saisi
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_banque ON analyses (banque, horodatage);
+CREATE INDEX IF NOT EXISTS idx_analyses_pays   ON analyses (pays, horodatage);
+CREATE INDEX IF NOT EXISTS idx_analyses_niveau ON analyses (niveau, horodatage);
+"""
+
+_COLONNES = ("horodatage", "source", "banque", "pays", "situation",
+             "revenu", "depenses", "epargne", "autres_revenus", "objectif",
+             "objectif_epargne", "horizon", "score", "niveau", "profil",
+             "c_epargne", "c_endettement", "c_securite", "c_solde", "c_bonus",
+             "decision", "decision_type", "opportunites", "projet_perso")
+
+_INSERTION = (f"INSERT INTO analyses ({', '.join(_COLONNES)}) "
+              f"VALUES ({', '.join('?' * len(_COLONNES))})")
+
+TOP_OPPORTUNITES = 3
+
+
+def ligne_analyse(horodatage, source, user, resultat, reco=None, coaching=None,
+                  projet_perso=None) -> tuple:
+    """Ligne de la table analyses (dans l'ordre de _COLONNES)."""
+    score = resultat["score"]
+    c = resultat.get("composantes", {})
+    opportunites = {}
+    if reco:
+        opportunites["produits"] = [p["nom"] for p in reco.get("produits", ())][:TOP_OPPORTUNITES]
+    if coaching:
+        opportunites["faisables"] = [o["id"] for o in coaching.get("opportunites", ())
+                                     if o["faisabilite"]["statut"] == "faisable"][:TOP_OPPORTUNITES]
+    return (
+        horodatage, source, user.banque, user.pays, user.situation,
+        user.revenu, user.depenses, user.epargne, user.autres_revenus, user.objectif,
+        user.objectif_epargne, user.horizon,
+        score, BAREMES.pour(user.banque).niveau(score), resultat.get("profil"),
+        c.get("epargne"), c.get("endettement"), c.get("securite"), c.get("solde"), c.get("bonus"),
+        reco.get("decision") if reco else None, reco.get("decision_type") if reco else None,
+        json.dumps(opportunites, ensure_ascii=False) if opportunites else None,
+        json.dumps(projet_perso, ensure_ascii=False) if projet_perso else None,
+    )
+
+
+class JournalAnalyses:
+    """File bornée + thread d'écriture par lots vers SQLite."""
+
+    def __init__(self, chemin: str, taille_file: int = 10_000, taille_lot: int = 500,
+                 intervalle: float = 1.0, actif: bool = True):
+        self.chemin     = chemin
+        self.taille_lot = taille_lot
+        self.intervalle = intervalle
+        self.actif      = actif
+        self._file      = queue.Queue(maxsize=taille_file)
+        self._verrou    = threading.Lock()
+        self._thread    = None
+        self._pid       = None
+        self._arret     = threading.Event()
+        self._abonnes   = []
+        # erreurs : analyses invalides ou d'un lot dont l'écriture a échoué
+        self._compteurs = dict.fromkeys(("recues", "ecrites", "perdues", "lots", "erreurs"), 0)
+        if actif:
+            con = sqlite3.connect(chemin)
+            try:
+                con.execute("PRAGMA journal_mode = WAL")
+                con.executescript(SCHEMA)
+            finally:
+                con.close()
+
+    # ── Côté requête ──────────────────────────────────────────
+
+    def enregistrer(self, source: str, user, resultat: dict, reco: dict = None,
+                    coaching: dict = None, projet_perso: dict = None) -> bool:
+        """
+        Dépose l'analyse dans la file (sans attendre) ; False si le
+        journal est inactif ou si la file est pleine (analyse perdue).
+        La ligne est mise en forme par le thread d'écriture : les
+        dicts passés ne doivent plus être modifiés par l'appelant.
+        """
+        if not self.actif:
+            return False
+        if self._pid != os.getpid():
+            self._demarrer()
+        try:
+            self._file.put_nowait((time.time(), source, user, resultat, reco, coaching, projet_perso))
+        except queue.Full:
+            with self._verrou:
+                self._compteurs["perdues"] += 1
+                perdues = self._compteurs["perdues"]
+            if perdues == 1 or perdues % 1000 == 0:
+                journal.warning("Journal des analyses saturé : %d analyses perdues", perdues)
+            return False
+        with self._verrou:
+            self._compteurs["recues"] += 1
+        return True
+
+    def abonner(self, fonction, rattraper: bool = True):
+        """
+        fonction(con) sera appelée dans le thread d'écriture après
+        chaque lot. Avec rattraper, elle est d'abord appelée ici, sur
+        une connexion en lecture seule : le retard accumulé (tout le
+        journal pour un abonné parti de zéro) est absorbé au démarrage
+        au lieu de bloquer le premier lot du thread d'écriture.
+        """
+        if rattraper:
+            con = sqlite3.connect(f"file:{quote(self.chemin)}?mode=ro", uri=True, timeout=30.0)
+            try:
+                fonction(con)
+            finally:
+                con.close()
+        self._abonnes.append(fonction)
+
+    # ── Thread d'écriture ─────────────────────────────────────
+
+    def _demarrer(self):
+        with self._verrou:
+            if self._pid == os.getpid():
+                return
+            # Processus forké : la file et le thread du parent ne sont pas hérités utilement
+            self._file   = queue.Queue(maxsize=self._file.maxsize)
+            self._arret  = threading.Event()
+            self._thread = threading.Thread(target=self._boucle, name="journal-analyses", daemon=True)
+            self._pid    = os.getpid()
+            self._thread.start()
+        atexit.register(self.arreter)
+
+    def _boucle(self):
+        # Le thread ne doit jamais mourir : sinon la file se remplit et
+        # toutes les analyses suivantes sont délestées sans bruit
+        con, echecs = None, 0
+        while not (self._arret.is_set() and self._file.empty()):
+            try:
+                if con is None:
+                    con = sqlite3.connect(self.chemin, timeout=30.0)
+                    con.execute("PRAGMA synchronous = NORMAL")
+                lot = self._prendre_lot()
+                if lot:
+                    self._ecrire(con, lot)
+                echecs = 0
+            except Exception:
+                echecs += 1
+                if echecs == 1:           # une trace par série d'échecs
+                    journal.exception("Journal des analyses en échec, nouvel essai")
+                if con is not None:
+                    con.close()
+                    con = None
+                self._arret.wait(min(60.0, self.intervalle * 2 ** echecs))
+        if con is not None:
+            con.close()
+
+    def _prendre_lot(self) -> list:
+        """Attend une première analyse puis complète le lot jusqu'à l'échéance."""
+        try:
+            lot = [self._file.get(timeout=self.intervalle)]
+        except queue.Empty:
+            return []
+        echeance = time.monotonic() + self.intervalle
+        while len(lot) < self.taille_lot:
+            # Arrêt demandé : plus d'attente, on prend ce qui est déjà en file
+            reste = 0 if self._arret.is_set() else echeance - time.monotonic()
+            try:
+                lot.append(self._file.get(timeout=reste) if reste > 0 else self._file.get_nowait())
+            except queue.Empty:
+                break
+        return lot
+
+    def _ecrire(self, con, lot: list):
+        # Mise en forme ligne par ligne : une analyse invalide n'emporte pas le lot
+        lignes = []
+        for element in lot:
+            try:
+                lignes.append(ligne_analyse(*element))
+            except Exception as e:
+                journal.error("Analyse non journalisée (%s) : %r", element[1], e)
+        invalides = len(lot) - len(lignes)
+        if invalides:
+            with self._verrou:
+                self._compteurs["erreurs"] += invalides
+        if not lignes:
+            return
+        try:
+            with con:                                   # une transaction par lot
+                con.executemany(_INSERTION, lignes)
+        except sqlite3.Error as e:
+            journal.error("Lot de %d analyses non écrit : %s", len(lignes), e)
+            with self._verrou:
+                self._compteurs["erreurs"] += len(lignes)
+            return
+        with self._verrou:
+            self._compteurs["ecrites"] += len(lignes)
+            self._compteurs["lots"]    += 1
+        for fonction in self._abonnes:
+            try:
+                fonction(con)
+            except Exception:
+                journal.exception("Abonné du journal des analyses en échec")
+
+    def vider(self, delai: float = 10.0) -> bool:
+        """Attend que la file soit écrite (tests, benchmarks) ; False si délai dépassé."""
+        limite = time.monotonic() + delai
+        while time.monotonic() < limite:
+            with self._verrou:
+                c = self._compteurs
+                if c["ecrites"] + c["erreurs"] >= c["recues"]:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def arreter(self, delai: float = 10.0):
+        """Écrit la file restante puis arrête le thread."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        self._arret.set()
+        thread.join(delai)
+
+    def stats(self) -> dict:
+        with self._verrou:
+            stats = dict(self._compteurs)
+        stats["en_file"] = self._file.qsize()
+        return stats
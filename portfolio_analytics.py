@@ -0,0 +1,414 @@
+"""
+Analyse de portefeuille — AI Inclusive Finance
+══════════════════════════════════════════════
+
+Tableaux de bord d'un portefeuille clients complet, par banque, par
+pays et par profil de score :
+
+  • distribution du score (histogramme exact, quantiles) ;
+  • répartition des décisions de recommander(), dont la part de
+    « Restructuration nécessaire » ;
+  • pour chaque opportunité de coach.OPPORTUNITES, le nombre de
+    clients pour qui elle est faisable, tendue, déconseillée ;
+  • quantiles du revenu et de l'épargne.
+
+Agrégation en flux :
+  Le portefeuille est lu par lots (bulk_scoring.lire_lots), scoré
+  en colonnes (analyse_financiere_batch, decisions_lot,
+  IndexAccessibilite.statuts_lot) puis réduit à des compteurs : la
+  mémoire ne dépend que du nombre de groupes, jamais du nombre de
+  clients. Tous les agrégats sont des compteurs de taille fixe
+  (score : un compteur par point, cf. peer_percentiles.py ; montants :
+  tranches géométriques à PRECISION relative près), donc
+  fusionnables par simple addition : chaque worker agrège ses lots,
+  les résultats partiels (fichiers .npz) s'additionnent.
+
+    python portfolio_analytics.py analyser clients.csv -o portefeuille.npz --workers 0
+    python portfolio_analytics.py fusionner agence_a.npz agence_b.npz -o portefeuille.npz
+    python portfolio_analytics.py rapport portefeuille.npz [--json]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ai_engine import CODES_PROFIL, SCORE_MAX, analyse_financiere_batch
+from bulk_scoring import TAILLE_LOT_DEFAUT, lire_lots
+from coach import OPPORTUNITES, STATUTS, IndexAccessibilite
+from models import UserBatch, UserData
+from peer_percentiles import DistributionScores
+from recommendation import DECISIONS, decisions_lot
+
+
+TOUS         = ("tous", "")
+MAX_GROUPES  = 1_000
+LARGEUR_HISTOGRAMME = 50          # points de score par barre du rapport
+_SEPARATEUR  = "\x1f"
+
+_INDEX    = IndexAccessibilite(OPPORTUNITES)
+_ANNONCES = tuple(item["id"] for items in OPPORTUNITES.values() for item in items)
+_PLACEMENTS = {item["id"] for item in OPPORTUNITES.get("epargne", ())}
+
+
+# ─────────────────────────────────────────────────────────────
+# ESQUISSE DES MONTANTS
+# ─────────────────────────────────────────────────────────────
+
+class EsquisseMontants:
+    """
+    Quantiles d'un montant ≥ 0 à PRECISION relative près : un
+    compteur par tranche géométrique ]γ^(i-1), γ^i] (principe de
+    DDSketch), la tranche 0 recevant les montants inférieurs à 1.
+    Taille fixe, fusionnable par addition.
+    """
+
+    PRECISION = 0.01
+    GAMMA     = (1 + PRECISION) / (1 - PRECISION)
+    MAXIMUM   = 1e12
+    TRANCHES  = math.ceil(math.log(MAXIMUM) / math.log(GAMMA)) + 2
+
+    __slots__ = ("comptes",)
+
+    def __init__(self, comptes=None):
+        self.comptes = (np.zeros(self.TRANCHES, dtype=np.int64) if comptes is None
+                        else np.asarray(comptes, dtype=np.int64).copy())
+
+    def ajouter(self, montants):
+        montants = np.clip(np.asarray(montants, dtype=np.float64), 0.0, self.MAXIMUM)
+        tranches = np.zeros(len(montants), dtype=np.int64)
+        au_dessus = montants >= 1.0
+        tranches[au_dessus] = np.ceil(np.log(montants[au_dessus]) / math.log(self.GAMMA)) + 1
+        self.comptes += np.bincount(tranches, minlength=self.TRANCHES)
+
+    def fusionner(self, autre: "EsquisseMontants"):
+        self.comptes += autre.comptes
+
+    def quantile(self, q: float) -> float:
+        """Montant représentatif de la tranche qui contient le quantile q."""
+        cumul = np.cumsum(self.comptes)
+        if cumul[-1] == 0:
+            return float("nan")
+        tranche = int(np.searchsorted(cumul, max(1, np.ceil(q * cumul[-1])), side="left"))
+        if tranche == 0:
+            return 0.0
+        return float(2 * self.GAMMA ** (tranche - 1) / (self.GAMMA + 1))
+
+
+# ─────────────────────────────────────────────────────────────
+# AGRÉGATS D'UN GROUPE
+# ─────────────────────────────────────────────────────────────
+
+class AgregatGroupe:
+    """Compteurs d'un groupe de clients (tous, une banque, un pays, un profil)."""
+
+    __slots__ = ("scores", "decisions", "faisabilite", "revenu", "epargne")
+
+    def __init__(self, n_annonces: int):
+        self.scores      = DistributionScores()
+        self.decisions   = np.zeros(len(DECISIONS), dtype=np.int64)
+        self.faisabilite = np.zeros((n_annonces, len(STATUTS)), dtype=np.int64)   # annonce × statut
+        self.revenu      = EsquisseMontants()
+        self.epargne     = EsquisseMontants()
+
+    @property
+    def n(self) -> int:
+        return self.scores.n
+
+    def ajouter(self, scores, decisions, statuts, revenu, epargne):
+        """Colonnes d'un lot restreintes au groupe ; statuts : (n_annonces, n)."""
+        self.scores.ajouter(scores)
+        self.decisions += np.bincount(decisions, minlength=len(DECISIONS))
+        n_annonces, n_statuts = self.faisabilite.shape
+        decalage = np.arange(n_annonces)[:, None] * n_statuts
+        self.faisabilite += np.bincount((statuts + decalage).ravel(),
+                                        minlength=n_annonces * n_statuts).reshape(n_annonces, n_statuts)
+        self.revenu.ajouter(revenu)
+        self.epargne.ajouter(epargne)
+
+    def fusionner(self, autre: "AgregatGroupe"):
+        self.scores.fusionner(autre.scores)
+        self.decisions   += autre.decisions
+        self.faisabilite += autre.faisabilite
+        self.revenu.fusionner(autre.revenu)
+        self.epargne.fusionner(autre.epargne)
+
+
+# ─────────────────────────────────────────────────────────────
+# PORTEFEUILLE
+# ─────────────────────────────────────────────────────────────
+
+def _par_valeur(colonne):
+    """(valeur, indices) pour chaque valeur non vide d'une colonne d'objets."""
+    if colonne is None:
+        return
+    valeurs = np.where(np.equal(colonne, None), "", colonne).astype(str)
+    noms, inverse = np.unique(valeurs, return_inverse=True)
+    for code, nom in enumerate(noms):
+        if nom:
+            yield str(nom), np.flatnonzero(inverse == code)
+
+
+class AnalysePortefeuille:
+    """Un AgregatGroupe par groupe (tous, banque, pays, profil)."""
+
+    def __init__(self, annonces=None, max_groupes: int = MAX_GROUPES):
+        self.annonces    = tuple(annonces) if annonces is not None else _ANNONCES
+        self.max_groupes = max_groupes
+        self.groupes     = {}          # (dimension, valeur) → AgregatGroupe
+        self.erreurs     = 0           # lignes invalides ignorées
+        self.ignores     = 0           # clients d'un groupe au-delà de max_groupes
+
+    @property
+    def clients(self) -> int:
+        tous = self.groupes.get(TOUS)
+        return tous.n if tous else 0
+
+    def _groupe(self, cle, n: int):
+        groupe = self.groupes.get(cle)
+        if groupe is None:
+            if len(self.groupes) >= self.max_groupes:
+                self.ignores += n
+                return None
+            groupe = self.groupes[cle] = AgregatGroupe(len(self.annonces))
+        return groupe
+
+    # ── Construction ──────────────────────────────────────────
+
+    def ajouter_lot(self, lot: UserBatch):
+        """Score un UserBatch et l'ajoute aux groupes de chacun de ses clients."""
+        if len(lot) == 0:
+            return
+        analyse = analyse_financiere_batch(lot)
+        ids, statuts = _INDEX.statuts_lot(lot)
+        if tuple(ids) != self.annonces:
+            raise ValueError("catalogue d'opportunités différent de celui de l'agrégat")
+        colonnes = (analyse["score"], decisions_lot(lot, analyse["profil"]), statuts,
+                    lot.revenu_total, lot.epargne)
+
+        decoupage = [(TOUS, slice(None))]
+        decoupage += [(("banque", v), i) for v, i in _par_valeur(lot.banque)]
+        decoupage += [(("pays", v), i) for v, i in _par_valeur(lot.pays)]
+        decoupage += [(("profil", CODES_PROFIL[code]), np.flatnonzero(analyse["profil"] == code))
+                      for code in np.unique(analyse["profil"]).tolist()]
+        for cle, indices in decoupage:
+            groupe = self._groupe(cle, len(lot) if isinstance(indices, slice) else len(indices))
+            if groupe is not None:
+                scores, decisions, statuts, revenu, epargne = colonnes
+                groupe.ajouter(scores[indices], decisions[indices], statuts[:, indices],
+                               revenu[indices], epargne[indices])
+
+    def ajouter_lignes(self, lignes):
+        """Lignes CSV (dicts, colonnes de bulk_scoring.py) ; lignes invalides comptées."""
+        users = []
+        for ligne in lignes:
+            try:
+                users.append(UserData.from_form(ligne))
+            except ValueError:
+                self.erreurs += 1
+        if users:
+            self.ajouter_lot(UserBatch.from_users(users))
+
+    def fusionner(self, autre: "AnalysePortefeuille"):
+        if autre.annonces != self.annonces:
+            raise ValueError("agrégats construits sur des catalogues d'opportunités différents")
+        for cle, groupe in autre.groupes.items():
+            if cle in self.groupes:
+                self.groupes[cle].fusionner(groupe)
+            else:
+                cible = self._groupe(cle, groupe.n)
+                if cible is not None:
+                    cible.fusionner(groupe)
+        self.erreurs += autre.erreurs
+        self.ignores += autre.ignores
+
+    # ── Rapport ───────────────────────────────────────────────
+
+    def rapport(self) -> dict:
+        """Synthèse JSON de chaque groupe, du plus peuplé au moins peuplé."""
+        groupes = sorted(self.groupes.items(), key=lambda g: (g[0] != TOUS, g[0][0], -g[1].n, g[0][1]))
+        return {
+            "clients":  self.clients,
+            "erreurs":  self.erreurs,
+            "ignores":  self.ignores,
+            "groupes":  [dict(dimension=d, valeur=v, **_synthese(g, self.annonces))
+                         for (d, v), g in groupes if g.n],
+        }
+
+    # ── Fichier .npz ──────────────────────────────────────────
+
+    def sauver(self, chemin: str):
+        cles = sorted(self.groupes)
+        groupes = [self.groupes[c] for c in cles]
+
+        def empiler(attribut, forme):
+            if not groupes:
+                return np.zeros((0, *forme), dtype=np.int64)
+            return np.stack([attribut(g) for g in groupes])
+
+        np.savez_compressed(
+            chemin,
+            cles=np.array([_SEPARATEUR.join(c) for c in cles], dtype=str),
+            annonces=np.array(self.annonces, dtype=str),
+            scores=empiler(lambda g: g.scores.comptes, (SCORE_MAX + 1,)),
+            decisions=empiler(lambda g: g.decisions, (len(DECISIONS),)),
+            faisabilite=empiler(lambda g: g.faisabilite, (len(self.annonces), len(STATUTS))),
+            revenu=empiler(lambda g: g.revenu.comptes, (EsquisseMontants.TRANCHES,)),
+            epargne=empiler(lambda g: g.epargne.comptes, (EsquisseMontants.TRANCHES,)),
+            compteurs=np.array([self.erreurs, self.ignores], dtype=np.int64),
+        )
+
+    @classmethod
+    def charger(cls, chemin: str, **options) -> "AnalysePortefeuille":
+        with np.load(chemin) as donnees:
+            if (donnees["scores"].shape[1:] != (SCORE_MAX + 1,)
+                    or donnees["revenu"].shape[1:] != (EsquisseMontants.TRANCHES,)
+                    or donnees["decisions"].shape[1:] != (len(DECISIONS),)):
+                raise ValueError(f"{chemin} : agrégats d'un autre format (SCORE_MAX, précision, décisions)")
+            analyse = cls(annonces=[str(a) for a in donnees["annonces"]], **options)
+            for i, cle in enumerate(donnees["cles"]):
+                groupe = AgregatGroupe(len(analyse.annonces))
+                groupe.scores      = DistributionScores(donnees["scores"][i])
+                groupe.decisions   = donnees["decisions"][i].copy()
+                groupe.faisabilite = donnees["faisabilite"][i].copy()
+                groupe.revenu      = EsquisseMontants(donnees["revenu"][i])
+                groupe.epargne     = EsquisseMontants(donnees["epargne"][i])
+                analyse.groupes[tuple(str(cle).split(_SEPARATEUR, 1))] = groupe
+            analyse.erreurs, analyse.ignores = (int(c) for c in donnees["compteurs"])
+        return analyse
+
+
+def _synthese(groupe: AgregatGroupe, annonces) -> dict:
+    n = groupe.n
+    scores = groupe.scores
+    histogramme = np.add.reduceat(scores.comptes, np.arange(0, SCORE_MAX + 1, LARGEUR_HISTOGRAMME))
+    return {
+        "n": n,
+        "score": {
+            "moyenne": round(float(scores.comptes @ np.arange(SCORE_MAX + 1)) / n, 1),
+            **{f"p{q}": scores.quantile(q / 100) for q in (10, 25, 50, 75, 90)},
+            "histogramme": {f"{i * LARGEUR_HISTOGRAMME}": int(c) for i, c in enumerate(histogramme)},
+        },
+        "decisions": {nom: {"n": int(c), "part": round(int(c) / n, 4)}
+                      for (nom, _), c in zip(DECISIONS, groupe.decisions)},
+        "part_restructuration": round(int(groupe.decisions[0]) / n, 4),
+        "revenu":  {f"p{q}": round(groupe.revenu.quantile(q / 100)) for q in (25, 50, 75)},
+        "epargne": {f"p{q}": round(groupe.epargne.quantile(q / 100)) for q in (25, 50, 75)},
+        "opportunites": {
+            id_annonce: {**{statut: int(c) for statut, c in zip(STATUTS, comptes)},
+                         "part_faisable": round(int(comptes[0]) / n, 4)}
+            for id_annonce, comptes in zip(annonces, groupe.faisabilite)
+        },
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# FICHIER CSV EN FLUX
+# ─────────────────────────────────────────────────────────────
+
+def agreger_lignes(lignes: list) -> AnalysePortefeuille:
+    """Agrégat partiel d'un lot (fonction de niveau module → picklable)."""
+    partiel = AnalysePortefeuille(max_groupes=sys.maxsize)
+    partiel.ajouter_lignes(lignes)
+    return partiel
+
+
+def analyser_fichier(fichier, taille_lot: int = TAILLE_LOT_DEFAUT, workers: int = None,
+                     max_groupes: int = MAX_GROUPES) -> AnalysePortefeuille:
+    """
+    Agrège un portefeuille CSV lot par lot. workers : None →
+    séquentiel, 0 → tous les cœurs, n → n processus ; au plus
+    2 × workers lots en vol (cf. bulk_scoring._resultats_parallele),
+    chaque worker renvoyant un agrégat partiel fusionné aussitôt.
+    """
+    analyse = AnalysePortefeuille(max_groupes=max_groupes)
+    lots = lire_lots(fichier, taille_lot)
+    if workers is None:
+        for lignes in lots:
+            analyse.ajouter_lignes(lignes)
+        return analyse
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_vol = deque()
+        for lignes in lots:
+            en_vol.append(pool.submit(agreger_lignes, lignes))
+            if len(en_vol) >= 2 * workers:
+                analyse.fusionner(en_vol.popleft().result())
+        while en_vol:
+            analyse.fusionner(en_vol.popleft().result())
+    return analyse
+
+
+# ─────────────────────────────────────────────────────────────
+# LIGNE DE COMMANDE
+# ─────────────────────────────────────────────────────────────
+
+def _afficher(rapport: dict):
+    print(f"{rapport['clients']:,} clients ({rapport['erreurs']:,} lignes invalides)")
+    for g in rapport["groupes"]:
+        s = g["score"]
+        # Placements faisables dès que le solde est positif : les crédits seuls
+        credits   = [o for o in g["opportunites"].items() if o[0] not in _PLACEMENTS]
+        faisables = sorted(credits, key=lambda o: -o[1]["part_faisable"])[:3]
+        print(f"  {g['dimension']:<7} {g['valeur']:<20} n={g['n']:>9,}  score P25/P50/P75="
+              f"{s['p25']:>4}/{s['p50']:>4}/{s['p75']:>4}  restructuration "
+              f"{g['part_restructuration'] * 100:5.1f} %  revenu P50={g['revenu']['p50']:>9,}  "
+              + "  ".join(f"{i} {o['part_faisable'] * 100:.0f} %" for i, o in faisables))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tableaux de bord d'un portefeuille clients.")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    p = commandes.add_parser("analyser", help="agréger un portefeuille CSV")
+    p.add_argument("clients", help="portefeuille CSV (colonnes de bulk_scoring.py, '-' pour stdin)")
+    p.add_argument("-o", "--sortie", required=True)
+    p.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT)
+    p.add_argument("--workers", type=int, default=None, help="pool de processus : 0 = tous les cœurs")
+    p = commandes.add_parser("fusionner", help="additionner plusieurs agrégats .npz")
+    p.add_argument("fichiers", nargs="+")
+    p.add_argument("-o", "--sortie", required=True)
+    p = commandes.add_parser("rapport", help="synthèse d'un agrégat .npz")
+    p.add_argument("fichier")
+    p.add_argument("--json", action="store_true", help="rapport complet en JSON")
+    args = parser.parse_args(argv)
+
+    if args.commande == "rapport":
+        rapport = AnalysePortefeuille.charger(args.fichier).rapport()
+        if args.json:
+            json.dump(rapport, sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        else:
+            _afficher(rapport)
+        return 0
+
+    if args.commande == "fusionner":
+        analyse = None
+        for chemin in args.fichiers:
+            partiel = AnalysePortefeuille.charger(chemin, max_groupes=sys.maxsize)
+            if analyse is None:
+                analyse = partiel
+            else:
+                analyse.fusionner(partiel)
+    else:
+        if args.taille_lot <= 0:
+            parser.error("--taille-lot doit être strictement positif")
+        fichier = sys.stdin if args.clients == "-" else open(args.clients, newline="", encoding="utf-8")
+        try:
+            analyse = analyser_fichier(fichier, args.taille_lot, args.workers)
+        finally:
+            if fichier is not sys.stdin:
+                fichier.close()
+    analyse.sauver(args.sortie)
+    print(f"{analyse.clients:,} clients, {len(analyse.groupes)} groupes → {args.sortie}",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
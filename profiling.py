@@ -0,0 +1,166 @@
+"""
+Profilage à la demande — AI Inclusive Finance
+═════════════════════════════════════════════
+
+Profiler UNE requête lente en production, sans redéployer :
+
+    curl -H "X-Profilage: $PROFILAGE_SECRET" -d @profil.txt https://…/coach
+
+La requête est servie normalement ; son profil est écrit dans
+PROFILAGE_REPERTOIRE et le nom du fichier est renvoyé dans
+l'en-tête X-Profilage-Fichier.
+
+Deux modes :
+  • "echantillons" (défaut) : un thread relève la pile du thread de
+    la requête toutes les `periode` secondes et écrit des piles
+    repliées (.folded : « a;b;c 12 ») pour flamegraph.pl ou
+    speedscope. Seul le thread profilé est observé. Tant que la
+    requête garde le GIL, la résolution réelle est bornée par
+    sys.getswitchinterval() (5 ms par défaut) : mode adapté aux
+    requêtes lentes (stress-test, batch).
+  • "cprofile" : cProfile sur le seul thread de la requête, écrit
+    un .prof (python -m pstats, snakeviz, flameprof). Exhaustif,
+    mais ralentit la requête profilée.
+
+Garde-fous, pour ne pas gêner le reste du trafic :
+  • désactivé par défaut, et secret comparé en temps constant ;
+  • un seul profilage à la fois, au plus un toutes les
+    `intervalle` secondes (les demandes en trop sont servies sans
+    profil) ;
+  • échantillonnage arrêté après `duree_max` secondes ;
+  • au plus `max_fichiers` profils conservés (les plus anciens
+    sont supprimés).
+"""
+
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+
+MODES = ("echantillons", "cprofile")
+
+
+# ─────────────────────────────────────────────────────────────
+# ÉCHANTILLONNEUR
+# ─────────────────────────────────────────────────────────────
+
+def _cadre(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class Echantillonneur(threading.Thread):
+    """Relève périodiquement la pile d'un thread et compte les piles repliées."""
+
+    def __init__(self, thread_id: int, periode: float = 0.005, duree_max: float = 30.0):
+        super().__init__(name="profilage-echantillons", daemon=True)
+        self.cible     = thread_id
+        self.periode   = periode
+        self.duree_max = duree_max
+        self.piles     = Counter()
+        self._arret    = threading.Event()
+
+    def run(self):
+        fin = time.monotonic() + self.duree_max
+        cadres = sys._current_frames
+        while not self._arret.wait(self.periode) and time.monotonic() < fin:
+            f = cadres().get(self.cible)
+            pile = []
+            while f is not None:
+                pile.append(_cadre(f.f_code))
+                f = f.f_back
+            if pile:
+                self.piles[";".join(reversed(pile))] += 1
+
+    def arreter(self) -> Counter:
+        self._arret.set()
+        self.join()
+        return self.piles
+
+
+def piles_repliees(piles: Counter) -> str:
+    """Format « collapsed stacks » de flamegraph.pl (une pile par ligne)."""
+    return "".join(f"{pile} {n}\n" for pile, n in piles.most_common())
+
+
+# ─────────────────────────────────────────────────────────────
+# PROFILAGE D'UNE REQUÊTE
+# ─────────────────────────────────────────────────────────────
+
+class Profilage:
+    """Autorisation, limitation et écriture des profils de requêtes."""
+
+    def __init__(self, repertoire: str, secret: str, mode: str = "echantillons",
+                 intervalle: float = 60.0, periode: float = 0.005,
+                 duree_max: float = 30.0, max_fichiers: int = 50):
+        if mode not in MODES:
+            raise ValueError(f"mode de profilage inconnu : {mode} (attendu : {', '.join(MODES)})")
+        self.repertoire   = repertoire
+        self.secret       = secret
+        self.mode         = mode
+        self.intervalle   = intervalle
+        self.periode      = periode
+        self.duree_max    = duree_max
+        self.max_fichiers = max_fichiers
+        self._verrou      = threading.Lock()
+        self._dernier     = float("-inf")
+        self.refus        = 0
+
+    def autoriser(self, en_tete: str) -> bool:
+        """
+        Vrai si le secret est bon ET qu'aucun profilage n'est en cours
+        ni n'a eu lieu depuis moins de `intervalle` secondes. En cas
+        de succès, le verrou est pris : terminer() le rend.
+        """
+        if not self.secret or not hmac.compare_digest(en_tete.encode(), self.secret.encode()):
+            return False
+        if not self._verrou.acquire(blocking=False):
+            self.refus += 1
+            return False
+        if time.monotonic() - self._dernier < self.intervalle:
+            self._verrou.release()
+            self.refus += 1
+            return False
+        return True
+
+    def demarrer(self, methode: str, route: str) -> tuple:
+        """
+        Lance le profileur sur le thread courant (verrou déjà pris).
+        Retourne (profileur, nom du fichier à venir).
+        """
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "racine"
+        nom  = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{methode}_{slug}"
+        if self.mode == "cprofile":
+            profileur = cProfile.Profile()
+            profileur.enable()
+            return profileur, nom + ".prof"
+        profileur = Echantillonneur(threading.get_ident(), self.periode, self.duree_max)
+        profileur.start()
+        return profileur, nom + ".folded"
+
+    def terminer(self, profileur, nom: str):
+        """Arrête le profileur, écrit le fichier et rend la main."""
+        try:
+            chemin = os.path.join(self.repertoire, nom)
+            os.makedirs(self.repertoire, exist_ok=True)
+            if isinstance(profileur, cProfile.Profile):
+                profileur.disable()
+                profileur.dump_stats(chemin)
+            else:
+                piles = profileur.arreter()
+                with open(chemin, "w", encoding="utf-8") as f:
+                    f.write(piles_repliees(piles))
+            self._purger()
+        finally:
+            self._dernier = time.monotonic()
+            self._verrou.release()
+
+    def _purger(self):
+        fichiers = sorted(f for f in os.listdir(self.repertoire) if f.endswith((".prof", ".folded")))
+        for ancien in fichiers[:max(0, len(fichiers) - self.max_fichiers)]:
+            os.remove(os.path.join(self.repertoire, ancien))
@@ -27,18 +27,52 @@ Corrections & améliorations apportées :
 5. LISTE DE PRODUITS SUGGÉRÉS
    On retourne maintenant des produits financiers concrets
    adaptés au profil et à la banque choisie.
+
+6. TABLES DE PRODUITS FIGÉES
+   L'ancienne version faisait produits.insert(0, ...) sur la
+   liste globale PRODUITS pour Salaam Bank : chaque requête
+   l'allongeait d'un produit, sans limite. Les sélections
+   (niveau, banque) sont maintenant précalculées à l'import
+   en tuples de produits immuables : une recherche O(1), sans
+   allocation ni copie, et rien ne peut plus modifier le catalogue.
 """
 
-from ai_engine import (
-    SEUIL_EXCELLENT,
-    SEUIL_BON,
-    SEUIL_EQUILIBRE,
-    SEUIL_FRAGILE,
-)
+import numpy as np
+
+from ai_engine import NIVEAUX, niveau_score
 
 
 # ── Produits financiers par niveau de score ───────────────────
 
+class ProduitFige(dict):
+    """
+    Produit du catalogue en lecture seule. Reste un dict (accès
+    p["nom"], sérialisation JSON et pickle inchangés), mais toute
+    modification lève une TypeError.
+    """
+
+    __slots__ = ()
+
+    def _immuable(self, *args, **kwargs):
+        raise TypeError("Produit du catalogue en lecture seule")
+
+    __setitem__ = __delitem__ = __ior__ = _immuable
+    clear = pop = popitem = setdefault = update = _immuable
+
+    def __reduce__(self):
+        return (ProduitFige, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _figer(produits) -> tuple:
+    return tuple(ProduitFige(p) for p in produits)
+
+
 PRODUITS = {
     "precaire": [
         {"nom": "Tontine digitale",      "type": "epargne",   "desc": "Épargne collective entre pairs, sans banque."},
@@ -67,25 +101,52 @@ PRODUITS = {
         {"nom": "Conseil patrimonial",           "type": "conseil",        "desc": "Accompagnement personnalisé par un conseiller IMF."},
     ],
 }
+PRODUITS = {niveau: _figer(produits) for niveau, produits in PRODUITS.items()}
+
+# Offres propres à certaines banques, placées en tête de liste
+PRODUIT_BCIMR = ProduitFige({
+    "nom":  "Crédit habitat BCIMR",
+    "type": "credit",
+    "desc": "Offre immobilière prioritaire via votre banque BCIMR sélectionnée."
+})
+PRODUIT_SALAAM = ProduitFige({
+    "nom":  "Financement Murabaha",
+    "type": "credit",
+    "desc": "Financement islamique sans intérêt via Salaam Bank."
+})
+
+MAX_PRODUITS = 4   # produits affichés au plus
+
+
+def _selection(niveau: str, banque) -> tuple:
+    """Produits affichés pour un niveau et une banque (calcul d'import)."""
+    produits = PRODUITS[niveau]
+    if banque == "bcimr" and NIVEAUX.index(niveau) >= 2:   # profil « équilibré » ou mieux
+        # BCIMR est spécialisée immobilier
+        produits = (PRODUIT_BCIMR,) + tuple(p for p in produits if p["type"] != "investissement")
+    elif banque == "salaam":
+        # Salaam Bank = finance islamique
+        produits = (PRODUIT_SALAAM,) + produits
+    return produits[:MAX_PRODUITS]
 
 
-def _niveau_produits(score: float) -> str:
-    """Retourne la clé de niveau pour les produits."""
-    if score >= SEUIL_EXCELLENT: return "excellent"
-    if score >= SEUIL_BON:       return "bon"
-    if score >= SEUIL_EQUILIBRE: return "equilibre"
-    if score >= SEUIL_FRAGILE:   return "fragile"
-    return "precaire"
+# (niveau, banque) → tuple de produits ; banque None = sans personnalisation
+TABLE_PRODUITS = {
+    (niveau, banque): _selection(niveau, banque)
+    for niveau in NIVEAUX
+    for banque in (None, "bcimr", "salaam")
+}
 
 
-def recommander(user, score: float) -> dict:
+def recommander(user, score: float = None) -> dict:
     """
     Génère les recommandations produits et la décision
     d'investissement pour un profil donné.
 
     Paramètres :
-        user  : objet UserData (modèle unifié)
-        score : score calculé par ai_engine.analyse_financiere()
+        user  : objet UserData (modèle unifié) ou FinancialSnapshot
+        score : score calculé par ai_engine.analyse_financiere() —
+                facultatif avec un FinancialSnapshot (repris de celui-ci)
 
     Retourne un dict avec :
         decision        : texte de la décision principale
@@ -96,6 +157,13 @@ def recommander(user, score: float) -> dict:
         prochaine_etape : action concrète à faire maintenant
     """
 
+    # Tranche de score : reprise de l'instantané si possible
+    if score is None:
+        score, tranche = user.score, user.niveau
+    else:
+        tranche = niveau_score(score, getattr(user, 'banque', None))
+    niveau = NIVEAUX[tranche]
+
     # ── Décision principale ───────────────────────────────────
     if user.ratio_depenses > 0.85 or user.solde < 0:
         decision      = "Restructuration nécessaire"
@@ -116,7 +184,7 @@ def recommander(user, score: float) -> dict:
         )
         prochaine_etape = "Ouvrez un compte épargne automatique et épargnez 10% de vos revenus chaque mois."
 
-    elif score >= SEUIL_BON:
+    elif tranche >= 3:   # profil « bon » ou mieux pour la banque
         decision      = "Investissement recommandé"
         decision_type = "green"
         raison        = (
@@ -134,33 +202,40 @@ def recommander(user, score: float) -> dict:
         )
         prochaine_etape = "Fixez un objectif d'épargne mensuel et suivez-le pendant 3 mois consécutifs."
 
-    # ── Produits adaptés ──────────────────────────────────────
-    niveau   = _niveau_produits(score)
-    produits = PRODUITS.get(niveau, [])
-
-    # ── Personnalisation selon la banque ─────────────────────
-    banque = getattr(user, 'banque', None)
-    if banque == "bcimr" and score >= SEUIL_EQUILIBRE:
-        # BCIMR est spécialisée immobilier
-        produits = [p for p in produits if p["type"] != "investissement"]
-        produits.insert(0, {
-            "nom":  "Crédit habitat BCIMR",
-            "type": "credit",
-            "desc": "Offre immobilière prioritaire via votre banque BCIMR sélectionnée."
-        })
-    elif banque == "salaam":
-        # Salaam Bank = finance islamique
-        produits.insert(0, {
-            "nom":  "Financement Murabaha",
-            "type": "credit",
-            "desc": "Financement islamique sans intérêt via Salaam Bank."
-        })
+    # ── Produits adaptés au niveau et à la banque ────────────
+    banque   = getattr(user, 'banque', None)
+    produits = TABLE_PRODUITS.get((niveau, banque)) or TABLE_PRODUITS[(niveau, None)]
 
     return {
         "decision":         decision,
         "decision_type":    decision_type,
         "raison":           raison,
-        "produits":         produits[:4],          # max 4 produits affichés
+        "produits":         produits,              # tuple partagé, max 4 produits
         "capacite_emprunt": user.capacite_emprunt,
         "prochaine_etape":  prochaine_etape,
-    }
\ No newline at end of file
+    }
+
+
+# ── Décisions par lots (portefeuille complet) ─────────────────
+
+# Codes renvoyés par decisions_lot : (decision, decision_type), dans
+# l'ordre des règles de recommander()
+DECISIONS = (
+    ("Restructuration nécessaire", "red"),
+    ("Épargner en priorité",       "orange"),
+    ("Investissement recommandé",  "green"),
+    ("Consolidation recommandée",  "gold"),
+)
+
+
+def decisions_lot(lot, niveau) -> np.ndarray:
+    """
+    Décision de chaque profil d'un UserBatch (indice dans DECISIONS),
+    identique à recommander() ligne à ligne. `niveau` : tranche du
+    score, soit le code "profil" de analyse_financiere_batch.
+    """
+    return np.select(
+        [(lot.ratio_depenses > 0.85) | (lot.solde < 0),
+         (lot.ratio_depenses > 0.60) | (lot.mois_securite < 1),
+         np.asarray(niveau) >= 3],
+        [0, 1, 2], 3).astype(np.int8)
@@ -0,0 +1,325 @@
+"""
+Résultats de session — AI Inclusive Finance
+═══════════════════════════════════════════
+
+Le parcours /opportunities → /forecast → /coach renvoie le même
+formulaire à chaque étape : sans mémoire côté serveur, chaque page
+relit le profil, relance analyse_financiere et souvent recommander.
+
+Ici, le premier calcul est gardé sous un jeton opaque (champ caché
+« jeton » des formulaires de la page) ; l'étape suivante reprend
+UserData, score et recommandations et ne calcule que ce qui lui
+manque (coaching avec projet_perso, projection…).
+
+    jeton = sessions.ecrire({"user": user, "resultat": …})   # nouveau jeton
+    etat  = sessions.lire(jeton)          # None si inconnu ou expiré
+    etat["reco"] = …
+    sessions.ecrire(etat)                 # même jeton, expiration repoussée
+
+Principes :
+  • Jeton aléatoire (secrets) : il ne révèle rien du profil et ne se
+    devine pas. Un jeton inconnu, expiré ou évincé ramène simplement
+    au calcul complet depuis le formulaire, sous un nouveau jeton :
+    un jeton fourni par le client n'est jamais adopté (sinon un tiers
+    pourrait imposer un jeton puis relire les résultats enregistrés
+    dessous).
+  • État sérialisé (pickle), comme dans analysis_cache.py : chaque
+    lecture rend une copie neuve et la taille en octets est exacte.
+    Chaque partie (user, resultat, reco, coaching…) est sérialisée à
+    part et n'est désérialisée que si l'étape la lit : /coach ne paie
+    pas la projection 36 mois gardée par /forecast.
+  • Expiration (TTL depuis la dernière écriture) et bornes en
+    entrées et en octets, éviction des plus anciennes.
+  • Barème ou catalogue modifié (invalider_tout) : les résultats
+    écrits avant sont écartés à la lecture, seul le profil est gardé.
+
+Deux stockages :
+  • StockageMemoire (défaut) : dict LRU du processus. Avec plusieurs
+    workers Gunicorn, un jeton n'est retrouvé que par le worker qui
+    l'a créé (les autres recalculent) ;
+  • StockageSQLite : fichier local partagé par les workers d'une même
+    machine (WAL). Il ne contient que des données écrites par
+    l'application elle-même.
+"""
+
+import pickle
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from analysis_cache import abonner
+
+
+_JETON_VALIDE = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+
+# ─────────────────────────────────────────────────────────────
+# STOCKAGES
+# ─────────────────────────────────────────────────────────────
+
+class StockageMemoire:
+    """États de session en mémoire : LRU borné en entrées et en octets."""
+
+    # Surcoût approximatif d'une entrée (jeton, tuple, nœud OrderedDict)
+    _SURCOUT_ENTREE = 300
+
+    def __init__(self, max_entrees: int = 10_000, max_octets: int = 32 * 2**20):
+        self.max_entrees = max_entrees
+        self.max_octets  = max_octets
+        self._entrees    = OrderedDict()   # jeton → (expiration, pickle)
+        self._octets     = 0
+        self._verrou     = threading.Lock()
+        self.evictions   = 0
+
+    def lire(self, jeton: str):
+        with self._verrou:
+            entree = self._entrees.get(jeton)
+            if entree is None:
+                return None
+            expiration, donnees = entree
+            if expiration < time.time():
+                self._retirer(jeton)
+                return None
+            self._entrees.move_to_end(jeton)
+            return donnees
+
+    def ecrire(self, jeton: str, donnees: bytes, expiration: float):
+        with self._verrou:
+            if jeton in self._entrees:
+                self._retirer(jeton)
+            self._entrees[jeton] = (expiration, donnees)
+            self._octets += len(donnees) + self._SURCOUT_ENTREE
+            while (len(self._entrees) > self.max_entrees
+                   or self._octets > self.max_octets):
+                self._retirer(next(iter(self._entrees)))
+                self.evictions += 1
+
+    def _retirer(self, jeton):
+        _, donnees = self._entrees.pop(jeton)
+        self._octets -= len(donnees) + self._SURCOUT_ENTREE
+
+    def stats(self) -> dict:
+        with self._verrou:
+            return {"entrees": len(self._entrees), "octets": self._octets,
+                    "evictions": self.evictions}
+
+
+class StockageSQLite:
+    """
+    États de session dans un fichier SQLite partagé entre workers.
+    Les entrées expirées puis les plus anciennes au-delà de
+    `max_entrees` sont purgées toutes les `purge_toutes` écritures.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        jeton      TEXT PRIMARY KEY,
+        expiration REAL NOT NULL,
+        donnees    BLOB NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_sessions_expiration ON sessions (expiration);
+    """
+    MAX_CONNEXIONS = 8
+
+    def __init__(self, chemin: str, max_entrees: int = 100_000, purge_toutes: int = 500):
+        self.chemin       = chemin
+        self.max_entrees  = max_entrees
+        self.purge_toutes = purge_toutes
+        self.evictions    = 0
+        self._verrou      = threading.Lock()
+        self._connexions  = []         # connexions libres
+        self._ecritures   = 0
+        con = self._ouvrir()
+        try:
+            con.execute("PRAGMA journal_mode = WAL")
+            con.executescript(self.SCHEMA)
+        finally:
+            con.close()
+
+    def _ouvrir(self):
+        con = sqlite3.connect(self.chemin, timeout=5.0, isolation_level=None,
+                              check_same_thread=False)
+        con.execute("PRAGMA synchronous = NORMAL")
+        return con
+
+    def _emprunter(self):
+        with self._verrou:
+            if self._connexions:
+                return self._connexions.pop()
+        return self._ouvrir()
+
+    def _rendre(self, con):
+        with self._verrou:
+            if len(self._connexions) < self.MAX_CONNEXIONS:
+                self._connexions.append(con)
+                return
+        con.close()
+
+    def lire(self, jeton: str):
+        con = self._emprunter()
+        try:
+            ligne = con.execute("SELECT donnees FROM sessions WHERE jeton = ? AND expiration >= ?",
+                                (jeton, time.time())).fetchone()
+        finally:
+            self._rendre(con)
+        return ligne[0] if ligne else None
+
+    def ecrire(self, jeton: str, donnees: bytes, expiration: float):
+        con = self._emprunter()
+        try:
+            con.execute("INSERT OR REPLACE INTO sessions (jeton, expiration, donnees) VALUES (?, ?, ?)",
+                        (jeton, expiration, donnees))
+            with self._verrou:
+                self._ecritures += 1
+                purger = self._ecritures % self.purge_toutes == 0
+            if purger:
+                self._purger(con)
+        finally:
+            self._rendre(con)
+
+    def _purger(self, con):
+        con.execute("DELETE FROM sessions WHERE expiration < ?", (time.time(),))
+        # Au-delà de max_entrees : les plus proches de l'expiration partent
+        curseur = con.execute(
+            "DELETE FROM sessions WHERE jeton IN (SELECT jeton FROM sessions "
+            "ORDER BY expiration LIMIT max(0, (SELECT count(*) FROM sessions) - ?))",
+            (self.max_entrees,))
+        self.evictions += max(curseur.rowcount, 0)
+
+    def stats(self) -> dict:
+        con = self._emprunter()
+        try:
+            entrees, octets = con.execute(
+                "SELECT count(*), coalesce(sum(length(donnees)), 0) FROM sessions").fetchone()
+        finally:
+            self._rendre(con)
+        return {"entrees": entrees, "octets": octets, "evictions": self.evictions}
+
+
+# ─────────────────────────────────────────────────────────────
+# SESSIONS DE RÉSULTATS
+# ─────────────────────────────────────────────────────────────
+
+class EtatSession:
+    """
+    Parties d'un état de session ("user", "resultat", "reco"…),
+    désérialisées à la première lecture. Les parties non lues ni
+    modifiées sont réécrites telles quelles.
+    """
+
+    __slots__ = ("bruts", "valeurs", "jeton")
+
+    def __init__(self, bruts: dict = None, valeurs: dict = None, jeton: str = None):
+        self.bruts   = bruts or {}       # partie → pickle
+        self.valeurs = valeurs or {}     # partie → objet
+        self.jeton   = jeton             # jeton sous lequel l'état a été lu
+
+    def __contains__(self, partie):
+        return partie in self.valeurs or partie in self.bruts
+
+    def __getitem__(self, partie):
+        valeur = self.valeurs.get(partie, self)
+        if valeur is self:
+            valeur = self.valeurs[partie] = pickle.loads(self.bruts[partie])
+        return valeur
+
+    def __setitem__(self, partie, valeur):
+        self.bruts.pop(partie, None)
+        self.valeurs[partie] = valeur
+
+    def __delitem__(self, partie):
+        if self.bruts.pop(partie, None) is None:
+            del self.valeurs[partie]
+        else:
+            self.valeurs.pop(partie, None)
+
+    def __iter__(self):
+        return iter(dict.fromkeys([*self.bruts, *self.valeurs]))
+
+    def serialiser(self) -> dict:
+        bruts = dict(self.bruts)
+        for partie, valeur in self.valeurs.items():
+            if partie not in bruts:
+                bruts[partie] = pickle.dumps(valeur, protocol=pickle.HIGHEST_PROTOCOL)
+        return bruts
+
+
+class SessionsResultats:
+    """
+    États de parcours {"user": UserData, "resultat": …, "reco": …}
+    sous un jeton opaque, sur un stockage mémoire ou SQLite.
+    """
+
+    def __init__(self, stockage=None, ttl: float = 1800.0, max_octets_etat: int = 256 * 1024,
+                 actif: bool = True):
+        self.stockage        = stockage if stockage is not None else StockageMemoire()
+        self.ttl             = ttl
+        self.max_octets_etat = max_octets_etat
+        self.actif           = actif
+        # Horloge murale : comparable entre workers partageant un fichier SQLite
+        self._invalide_a     = 0.0
+        self._compteurs      = dict.fromkeys(("hits", "misses", "perimes", "ecritures", "rejets"), 0)
+        self._verrou         = threading.Lock()
+        abonner(self)
+
+    def _compter(self, nom: str):
+        with self._verrou:
+            self._compteurs[nom] += 1
+
+    def lire(self, jeton: str):
+        """
+        État de la session `jeton` (EtatSession, copie neuve), ou None.
+        Résultats antérieurs à la dernière invalidation : seul le
+        profil reste.
+        """
+        if not self.actif or not jeton or not _JETON_VALIDE.fullmatch(jeton):
+            return None
+        donnees = self.stockage.lire(jeton)
+        if donnees is None:
+            self._compter("misses")
+            return None
+        ecrit, bruts = pickle.loads(donnees)
+        if ecrit < self._invalide_a:
+            self._compter("perimes")
+            return EtatSession({"user": bruts["user"]}, jeton=jeton)
+        self._compter("hits")
+        return EtatSession(bruts, jeton=jeton)
+
+    def ecrire(self, etat):
+        """
+        Enregistre `etat` et repousse son expiration : sous son jeton
+        si c'est un EtatSession rendu par lire(), sous un nouveau jeton
+        sinon (dict). Retourne le jeton, ou None si la session est
+        désactivée ou l'état trop volumineux.
+        """
+        if not self.actif:
+            return None
+        if isinstance(etat, EtatSession) and etat.jeton:
+            jeton = etat.jeton
+        else:
+            jeton = secrets.token_urlsafe(18)
+        maintenant = time.time()
+        if not isinstance(etat, EtatSession):
+            etat = EtatSession(valeurs=dict(etat))
+        donnees = pickle.dumps((maintenant, etat.serialiser()), protocol=pickle.HIGHEST_PROTOCOL)
+        if len(donnees) > self.max_octets_etat:
+            self._compter("rejets")
+            return None
+        self.stockage.ecrire(jeton, donnees, maintenant + self.ttl)
+        self._compter("ecritures")
+        return jeton
+
+    def invalider(self):
+        """Barème ou catalogue modifié : les résultats déjà écrits sont périmés."""
+        self._invalide_a = time.time()
+
+    def stats(self) -> dict:
+        with self._verrou:
+            stats = dict(self._compteurs)
+        stats.update(self.stockage.stats())
+        lectures = stats["hits"] + stats["misses"] + stats["perimes"]
+        stats["taux_hit"] = round(stats["hits"] / lectures, 4) if lectures else 0.0
+        return stats
@@ -0,0 +1,148 @@
+"""
+Pages statiques précompilées — AI Inclusive Finance
+═══════════════════════════════════════════════════
+
+/, /banks et /about ne dépendent d'aucune donnée utilisateur :
+les rendre avec Jinja à chaque visite ne sert à rien. Ce module
+les rend une seule fois au démarrage et les sert depuis la
+mémoire, déjà compressées.
+
+  • Les blocs <style> et <script> en ligne sont extraits dans des
+    bundles nommés d'après leur empreinte (/assets/<sha>.css|js),
+    servis avec un cache d'un an : le CSS/JS de base.html, commun
+    à toutes les pages, n'est téléchargé qu'une fois. Chaque bloc
+    est remplacé à sa place par un <link> / <script src> : l'ordre
+    d'exécution ne change pas.
+  • static/style.css est lui aussi servi sous un nom à empreinte
+    (asset_url dans les templates).
+  • Chaque ressource existe en clair, gzip et brotli (si le module
+    brotli est installé) ; la variante est choisie selon
+    Accept-Encoding. ETag fort par variante, réponse 304 si le
+    client a déjà la bonne version.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+
+from flask import Response, request
+
+from compression import brotli, choisir_encodage
+
+
+CACHE_ASSETS = "public, max-age=31536000, immutable"   # nom à empreinte
+CACHE_PAGES  = "no-cache"                              # revalidation par ETag
+
+# Blocs en ligne sans attribut (un <script src=...> ou un
+# <script type="application/json"> n'est pas touché)
+_BLOC_EN_LIGNE = re.compile(r"<(style|script)>(.*?)</\1>", re.S)
+
+_TYPES = {
+    "css":  "text/css; charset=utf-8",
+    "js":   "text/javascript; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+}
+
+
+def empreinte(contenu: bytes) -> str:
+    return hashlib.sha256(contenu).hexdigest()[:16]
+
+
+def compresser(contenu: bytes) -> dict:
+    """Variantes {encodage: octets}, seulement si elles sont plus petites."""
+    variantes = {"gzip": gzip.compress(contenu, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes["br"] = brotli.compress(contenu, quality=11)
+    return {enc: v for enc, v in variantes.items() if len(v) < len(contenu)}
+
+
+class Ressource:
+    """Contenu figé, ses variantes compressées et leurs ETag forts."""
+
+    __slots__ = ("type", "cache_control", "empreinte", "variantes")
+
+    def __init__(self, contenu: bytes, extension: str, cache_control: str):
+        self.type          = _TYPES[extension]
+        self.cache_control = cache_control
+        self.empreinte     = empreinte(contenu)
+        self.variantes     = {"identity": contenu, **compresser(contenu)}
+
+    def etag(self, encodage: str) -> str:
+        return self.empreinte if encodage == "identity" else f"{self.empreinte}-{encodage}"
+
+    def reponse(self) -> Response:
+        encodage = choisir_encodage(self.variantes)
+        etag     = self.etag(encodage)
+
+        if request.if_none_match.contains(etag):
+            reponse = Response(status=304)
+        else:
+            reponse = Response(self.variantes[encodage], content_type=self.type)
+            if encodage != "identity":
+                reponse.headers["Content-Encoding"] = encodage
+        reponse.set_etag(etag)
+        reponse.headers["Cache-Control"] = self.cache_control
+        reponse.vary.add("Accept-Encoding")
+        return reponse
+
+
+class RessourcesStatiques:
+    """Bundles à empreinte (/assets/...) et pages HTML précompilées."""
+
+    def __init__(self, dossier_static: str, prefixe: str = "/assets/"):
+        self.dossier_static = dossier_static
+        self.prefixe        = prefixe
+        self.assets         = {}    # nom à empreinte → Ressource
+        self.pages          = {}    # chemin → Ressource
+        self._fichiers      = {}    # fichier de static/ → nom à empreinte
+
+    # ── Bundles ───────────────────────────────────────────────
+
+    def ajouter_asset(self, contenu: bytes, extension: str, base: str = "") -> str:
+        """Enregistre un bundle et retourne son URL (nom = empreinte)."""
+        nom = f"{base}.{empreinte(contenu)}.{extension}" if base else \
+              f"{empreinte(contenu)}.{extension}"
+        if nom not in self.assets:
+            self.assets[nom] = Ressource(contenu, extension, CACHE_ASSETS)
+        return self.prefixe + nom
+
+    def asset_url(self, fichier: str) -> str:
+        """URL à empreinte d'un fichier de static/ (lu une fois)."""
+        if fichier not in self._fichiers:
+            with open(os.path.join(self.dossier_static, fichier), "rb") as f:
+                contenu = f.read()
+            base, extension = os.path.splitext(fichier)
+            self._fichiers[fichier] = self.ajouter_asset(contenu, extension.lstrip("."), base)
+        return self._fichiers[fichier]
+
+    def extraire_blocs(self, html: str) -> str:
+        """Remplace chaque <style>/<script> en ligne par un lien vers son bundle."""
+        def remplacer(m):
+            balise, code = m.group(1), m.group(2)
+            if not code.strip():
+                return m.group(0)
+            if balise == "style":
+                url = self.ajouter_asset(code.encode(), "css")
+                return f'<link rel="stylesheet" href="{url}">'
+            url = self.ajouter_asset(code.encode(), "js")
+            return f'<script src="{url}"></script>'
+        return _BLOC_EN_LIGNE.sub(remplacer, html)
+
+    # ── Pages ─────────────────────────────────────────────────
+
+    def ajouter_page(self, chemin: str, html: str):
+        """Précompile une page rendue : bundles extraits, variantes compressées."""
+        contenu = self.extraire_blocs(html).encode()
+        self.pages[chemin] = Ressource(contenu, "html", CACHE_PAGES)
+
+    def stats(self) -> dict:
+        def taille(ressources, encodage):
+            return sum(len(r.variantes.get(encodage, r.variantes["identity"]))
+                       for r in ressources.values())
+        return {
+            "pages":  len(self.pages),
+            "assets": len(self.assets),
+            "octets": {enc: taille(self.pages, enc) + taille(self.assets, enc)
+                       for enc in ("identity", "gzip", "br")},
+        }
@@ -0,0 +1,176 @@
+"""
+Stress-test Monte Carlo — AI Inclusive Finance
+══════════════════════════════════════════════
+
+Le "mode crise" du GPS Financier applique un seul choc déterministe.
+Pour les comités de risque, ce module tire des milliers de
+trajectoires aléatoires par profil et en déduit :
+
+  • les bandes P5 / P50 / P95 du capital mois par mois ;
+  • la probabilité que l'épargne tombe à zéro sous 36 mois ;
+  • pour chaque crédit du catalogue coach, la probabilité qu'il
+    devienne "déconseillé" (mensualité > 40% des revenus) à un
+    moment de l'horizon.
+
+Chocs simulés (chaque mois, indépendants d'un chemin à l'autre) :
+  • bruit de revenu log-normal (σ = 10%) ;
+  • pic de dépenses avec une probabilité de 8% (+20% à +80%) ;
+  • perte d'emploi (risque 1.5%/mois, au plus une par chemin),
+    revenus à 40% pendant une durée géométrique (6 mois en moyenne).
+L'inflation des dépenses et le plancher à 0 du capital suivent
+forecast.py.
+
+Tout est vectorisé (chemins × mois). Les tirages utilisent un
+générateur numpy par profil, dérivé de (seed, index du profil) :
+un portefeuille donne les mêmes résultats en séquentiel ou avec
+un pool de processus, quel que soit le découpage.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import coach
+from forecast import HORIZON_MOIS, INFLATION
+from models import UserBatch
+
+
+N_CHEMINS             = 10_000
+SIGMA_REVENU          = 0.10    # volatilité mensuelle des revenus
+PROBA_PIC_DEPENSES    = 0.08    # probabilité mensuelle d'un pic de dépenses
+PIC_DEPENSES          = (0.20, 0.80)
+RISQUE_PERTE_EMPLOI   = 0.015   # probabilité mensuelle de perdre son emploi
+REVENU_CHOMAGE        = 0.40    # part des revenus conservée (cf. scénario crise)
+DUREE_CHOMAGE_MOYENNE = 6       # mois
+PERCENTILES           = (5, 50, 95)
+
+
+def _generateur(seed, index: int) -> np.random.Generator:
+    """Générateur reproductible propre au profil `index`."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def _simuler(revenu_total: float, depenses: float, epargne: float,
+             n_chemins: int, mois: int, rng: np.random.Generator):
+    """
+    Tire n_chemins trajectoires sur mois + 1 mois.
+    Retourne (revenus, capital), deux tableaux (n_chemins, mois + 1).
+    """
+    m = np.arange(mois + 1)
+
+    # Revenus : bruit log-normal centré, puis perte d'emploi éventuelle
+    bruit = rng.normal(-SIGMA_REVENU ** 2 / 2, SIGMA_REVENU, (n_chemins, mois + 1))
+    revenus = revenu_total * np.exp(bruit)
+
+    debut_chomage = rng.geometric(RISQUE_PERTE_EMPLOI, n_chemins) - 1
+    duree_chomage = rng.geometric(1 / DUREE_CHOMAGE_MOYENNE, n_chemins)
+    au_chomage = (m >= debut_chomage[:, None]) & (m < (debut_chomage + duree_chomage)[:, None])
+    revenus = np.where(au_chomage, revenus * REVENU_CHOMAGE, revenus)
+
+    # Dépenses : inflation + pics aléatoires
+    pic = (rng.random((n_chemins, mois + 1)) < PROBA_PIC_DEPENSES) \
+        * rng.uniform(*PIC_DEPENSES, (n_chemins, mois + 1))
+    depenses_m = depenses * (1 + INFLATION) ** (m / 12) * (1 + pic)
+
+    cumul   = epargne + np.cumsum(revenus - depenses_m, axis=1)
+    capital = cumul - np.minimum(0.0, np.minimum.accumulate(cumul, axis=1))
+    return revenus, capital
+
+
+def _credits_catalogue():
+    """(ids, seuils de revenu 'tendu' triés par id) des crédits du catalogue."""
+    seuils = coach._INDEX.seuils()
+    ids = sorted(seuils)
+    return ids, np.array([seuils[i][1] for i in ids])
+
+
+def _resumer(revenus, capital, seuils_tendu) -> tuple:
+    bandes = np.percentile(capital, PERCENTILES, axis=0)
+    prob_epuisement = float(np.mean((capital <= 0).any(axis=1)))
+    # Déconseillé dès que le revenu d'un mois passe sous le seuil "tendu" (40%)
+    revenu_min = np.sort(revenus.min(axis=1))
+    prob_deconseille = np.searchsorted(revenu_min, seuils_tendu, side="left") / len(revenu_min)
+    return bandes, prob_epuisement, prob_deconseille
+
+
+def stresser(user, n_chemins: int = N_CHEMINS, mois: int = HORIZON_MOIS,
+             seed=None) -> dict:
+    """
+    Stress-test d'un profil. Avec seed=None, les tirages changent à
+    chaque appel ; passer un entier pour un résultat reproductible.
+    """
+    rng = _generateur(seed, 0) if seed is not None else np.random.default_rng()
+    revenus, capital = _simuler(user.revenu_total, user.depenses, user.epargne,
+                                n_chemins, mois, rng)
+    ids, seuils_tendu = _credits_catalogue()
+    bandes, prob_epuisement, prob_deconseille = _resumer(revenus, capital, seuils_tendu)
+
+    return {
+        "mois":             list(range(mois + 1)),
+        "bandes":           {f"p{p}": np.round(b).astype(int).tolist()
+                             for p, b in zip(PERCENTILES, bandes)},
+        "prob_epuisement":  round(prob_epuisement, 4),
+        "prob_deconseille": {i: round(float(p), 4) for i, p in zip(ids, prob_deconseille)},
+        "n_chemins":        n_chemins,
+        "seed":             seed,
+    }
+
+
+def _stresser_tranche(colonnes, debut, n_chemins, mois, seed):
+    """Stress-test des profils [debut, debut + n) — exécuté dans un worker."""
+    revenu_total, depenses, epargne = colonnes
+    ids, seuils_tendu = _credits_catalogue()
+    n = len(revenu_total)
+    bandes = np.empty((n, len(PERCENTILES), mois + 1))
+    prob_epuisement = np.empty(n)
+    prob_deconseille = np.empty((n, len(ids)))
+    for k in range(n):
+        rng = _generateur(seed, debut + k)
+        revenus, capital = _simuler(revenu_total[k], depenses[k], epargne[k],
+                                    n_chemins, mois, rng)
+        bandes[k], prob_epuisement[k], prob_deconseille[k] = _resumer(
+            revenus, capital, seuils_tendu)
+    return bandes, prob_epuisement, prob_deconseille
+
+
+def stresser_lot(lot: UserBatch, n_chemins: int = 2_000, mois: int = HORIZON_MOIS,
+                 seed: int = 0, workers: int = None, taille_tranche: int = 256) -> dict:
+    """
+    Stress-test d'un portefeuille. Les profils sont traités par
+    tranches (mémoire bornée à une tranche de chemins à la fois) ;
+    workers : None → séquentiel, 0 → tous les cœurs, n → n processus.
+
+    Retourne des tableaux numpy :
+        bandes           : (N, 3, mois + 1) — P5, P50, P95 du capital
+        prob_epuisement  : (N,)
+        prob_deconseille : (N, L) — colonnes dans l'ordre de `credits`
+        credits          : ids des L crédits du catalogue
+    """
+    n = len(lot)
+    tranches = [
+        ((lot.revenu_total[d:d + taille_tranche], lot.depenses[d:d + taille_tranche],
+          lot.epargne[d:d + taille_tranche]), d)
+        for d in range(0, n, taille_tranche)
+    ]
+
+    if workers is None:
+        resultats = [_stresser_tranche(c, d, n_chemins, mois, seed) for c, d in tranches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            futures = [pool.submit(_stresser_tranche, c, d, n_chemins, mois, seed)
+                       for c, d in tranches]
+            resultats = [f.result() for f in futures]
+
+    ids, _ = _credits_catalogue()
+    if not resultats:
+        return {"bandes": np.empty((0, len(PERCENTILES), mois + 1)),
+                "prob_epuisement": np.empty(0),
+                "prob_deconseille": np.empty((0, len(ids))), "credits": ids}
+    bandes, prob_epuisement, prob_deconseille = (np.concatenate(p) for p in zip(*resultats))
+    return {
+        "bandes":           bandes,
+        "prob_epuisement":  prob_epuisement,
+        "prob_deconseille": prob_deconseille,
+        "credits":          ids,
+    }
@@ -0,0 +1,107 @@
+"""Garde-fous de app.py : profilage à la demande, taille des lots d'API, jetons de session."""
+
+import re
+
+import pytest
+
+import app as application
+from session_store import _JETON_VALIDE
+
+FORMULAIRE = {"revenu": "150000", "depenses": "60000", "epargne": "400000", "banque": "bcimr"}
+PROFIL_API = {"revenu": 150000, "depenses": 60000, "epargne": 400000}
+_JETON     = re.compile(r'name="jeton" value="([^"]+)"')
+
+
+@pytest.fixture
+def client():
+    flask_app = application.app
+    config = dict(flask_app.config)
+    sessions_actives = application.sessions_resultats.actif
+    application.sessions_resultats.actif = True
+    yield flask_app.test_client()
+    application.sessions_resultats.actif = sessions_actives
+    flask_app.config.clear()
+    flask_app.config.update(config)
+
+
+@pytest.fixture
+def profilage(tmp_path):
+    p = application.profilage
+    avant = (p.repertoire, p.secret, p.mode, p.intervalle)
+    p.repertoire, p.secret, p.mode, p.intervalle = str(tmp_path), "secret-de-test", "cprofile", 0
+    yield p
+    p.repertoire, p.secret, p.mode, p.intervalle = avant
+
+
+def _jeton(reponse) -> str:
+    return _JETON.search(reponse.get_data(as_text=True)).group(1)
+
+
+# ── Profilage ─────────────────────────────────────────────────
+
+def test_profilage_refuse_quand_desactive(client, profilage, tmp_path):
+    application.app.config["PROFILAGE_ACTIF"] = False
+    reponse = client.get("/banks", headers={"X-Profilage": "secret-de-test"})
+    assert reponse.status_code == 200
+    assert "X-Profilage-Fichier" not in reponse.headers
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("secret, en_tete", [("", ""), ("", "x"), ("secret-de-test", "mauvais")])
+def test_profilage_refuse_sans_le_bon_secret(client, profilage, tmp_path, secret, en_tete):
+    application.app.config["PROFILAGE_ACTIF"] = True
+    profilage.secret = secret
+    reponse = client.get("/banks", headers={"X-Profilage": en_tete})
+    assert "X-Profilage-Fichier" not in reponse.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_profilage_accepte_avec_le_secret(client, profilage, tmp_path):
+    application.app.config["PROFILAGE_ACTIF"] = True
+    reponse = client.get("/banks", headers={"X-Profilage": "secret-de-test"})
+    nom = reponse.headers["X-Profilage-Fichier"]
+    assert (tmp_path / nom).exists()
+
+
+# ── API par lots ──────────────────────────────────────────────
+
+def test_lot_trop_grand_refuse_en_413(client):
+    application.app.config["API_BATCH_MAX"] = 2
+    reponse = client.post("/api/v1/batch/analyse", json={"profils": [PROFIL_API] * 3})
+    assert reponse.status_code == 413
+    assert "erreur" in reponse.get_json()
+
+    reponse = client.post("/api/v1/batch/analyse", json={"profils": [PROFIL_API] * 2})
+    assert reponse.status_code == 200
+    assert len(reponse.get_json()["resultats"]) == 2
+
+
+# ── Jetons de session ─────────────────────────────────────────
+
+@pytest.mark.parametrize("jeton", ["", "court", "a" * 65, "../../etc/passwd", "jeton avec espaces!",
+                                   "x" * 20 + "\n"])
+def test_jeton_forge_hors_format_rejete(jeton):
+    assert not _JETON_VALIDE.fullmatch(jeton)
+    assert application.sessions_resultats.lire(jeton) is None
+
+
+def test_jeton_inconnu_ne_reprend_aucune_session(client):
+    # Jeton bien formé mais jamais émis : retour au formulaire, pas de résultats
+    reponse = client.post("/forecast", data={"jeton": "A" * 24})
+    assert reponse.status_code == 302
+
+
+def test_jeton_fourni_par_le_client_jamais_adopte(client):
+    victime = _jeton(client.post("/opportunities", data=FORMULAIRE))
+    fixe = "B" * 24
+
+    # L'attaquant soumet son propre profil avec un jeton choisi par lui
+    attaquant = {**FORMULAIRE, "revenu": "900000", "jeton": fixe}
+    jeton = _jeton(client.post("/opportunities", data=attaquant))
+    assert jeton not in (fixe, victime)
+    assert application.sessions_resultats.lire(fixe) is None
+
+    # Ni le jeton fixé ni celui de l'attaquant ne donnent la session de la victime
+    etat = application.sessions_resultats.lire(victime)
+    assert etat["user"].revenu == 150000
+    assert application.sessions_resultats.lire(jeton)["user"].revenu == 900000
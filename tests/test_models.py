@@ -0,0 +1,22 @@
+"""Validation commune de UserData et UserBatch."""
+
+import warnings
+
+import pytest
+
+from models import UserBatch, UserData
+
+BASE = {"revenu": [150000.0, 90000.0], "depenses": [60000.0, 50000.0],
+        "epargne": [400000.0, 0.0], "horizon": [12, 24]}
+
+
+@pytest.mark.parametrize("champ", ["revenu", "depenses", "epargne", "horizon"])
+@pytest.mark.parametrize("valeur", [float("nan"), float("inf"), float("-inf")])
+def test_valeur_non_finie_refusee_par_les_deux_chemins(champ, valeur):
+    colonnes = {**BASE, champ: [BASE[champ][0], valeur]}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")            # aucun cast invalide silencieux
+        with pytest.raises(ValueError):
+            UserBatch(**colonnes)
+    with pytest.raises(ValueError):
+        UserData(**{c: v[1] for c, v in colonnes.items()})
@@ -0,0 +1,48 @@
+"""Rendu en flux des pages de résultats (app._rendre)."""
+
+import pytest
+from jinja2 import ChoiceLoader, DictLoader
+
+import app as application
+
+GABARITS = {
+    # Premier morceau complet, puis une erreur au milieu de la page
+    "milieu.html": "<html><body>{{ 'x' * 200 }}{{ echec() }}<p>fin</p></body></html>",
+    "tete.html":   "{{ echec() }}{{ 'x' * 200 }}",
+}
+
+
+def _echec():
+    raise RuntimeError("rendu cassé")
+
+
+@pytest.fixture
+def app():
+    flask_app = application.app
+    config  = dict(flask_app.config)
+    chargeur = flask_app.jinja_env.loader
+    flask_app.config.update(STREAMING_RESULTATS=True, STREAMING_TRONCON=64)
+    flask_app.jinja_env.loader = ChoiceLoader([DictLoader(GABARITS), chargeur])
+    flask_app.jinja_env.cache.clear()
+    yield flask_app
+    flask_app.jinja_env.loader = chargeur
+    flask_app.jinja_env.cache.clear()
+    flask_app.config.clear()
+    flask_app.config.update(config)
+
+
+def test_erreur_en_milieu_de_page_termine_la_page(app):
+    with app.test_request_context("/coach", method="POST"):
+        reponse = application._rendre("milieu.html", echec=_echec)
+        assert reponse.status_code == 200
+        corps = "".join(reponse.response)
+
+    assert corps.startswith("<html><body>" + "x" * 50)
+    assert "<p>fin</p>" not in corps
+    assert corps.endswith(application._FIN_RENDU_INTERROMPU)
+
+
+def test_erreur_dans_le_premier_morceau_remonte_a_la_route(app):
+    with app.test_request_context("/coach", method="POST"):
+        with pytest.raises(RuntimeError):
+            application._rendre("tete.html", echec=_echec)